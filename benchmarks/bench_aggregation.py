@@ -0,0 +1,37 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.aggregation import ReviewColumns, review_stats, grouped_stats
+
+
+def synthetic_columns(count: int, cards: int = 1000) -> ReviewColumns:
+    rng = np.random.default_rng(42)
+    start = 1_577_836_800.0  # 2020-01-01
+    review_ts = start + rng.uniform(0, 4 * 365 * 86400, count)
+    response_ts = np.where(rng.random(count) < 0.4, review_ts + rng.exponential(2 * 86400, count), np.nan)
+    rating = rng.integers(1, 6, count).astype(np.float64)
+    card_index = rng.integers(0, cards, count).astype(np.int32)
+    return ReviewColumns(rating, review_ts, response_ts, card_index)
+
+
+def main(count: int = 10_000_000):
+    columns = synthetic_columns(count)
+
+    started = time.perf_counter()
+    stats = review_stats(columns)
+    elapsed = time.perf_counter() - started
+    print(f"review_stats: {count:,} reviews in {elapsed:.2f} s, {len(stats['trend'])} trend buckets")
+
+    started = time.perf_counter()
+    groups = grouped_stats(columns, columns.card_index, int(columns.card_index.max()) + 1)
+    elapsed = time.perf_counter() - started
+    print(f"grouped_stats: {count:,} reviews, {len(groups)} cards in {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
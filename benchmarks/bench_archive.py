@@ -0,0 +1,103 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.aggregation import review_stats
+from src.archive import FILE_SCHEMA, ReviewArchive
+
+PHRASES = ("Отличный магазин, всегда свежие продукты", "Долго ждали на кассе", "Вежливый персонал",
+           "Цены выше, чем у конкурентов", "Удобная парковка и широкий ассортимент", "Грязно в торговом зале")
+START = datetime(2020, 1, 1).timestamp()
+YEARS = 5
+
+
+def synthetic_chunk(rng: np.random.Generator, count: int, companies: int, cards_per_company: int,
+                    offset: int) -> pa.Table:
+    company_index = rng.integers(0, companies, count).astype(np.int32)
+    card_index = company_index * cards_per_company + rng.integers(0, cards_per_company, count).astype(np.int32)
+    review_ts = (START + rng.uniform(0, YEARS * 365 * 86400, count)).astype(np.int64)
+    answered = rng.random(count) < 0.4
+    response_ts = review_ts + rng.exponential(2 * 86400, count).astype(np.int64)
+    phrases = pa.array(PHRASES)
+
+    company_names = pa.array([f"Компания {i}" for i in range(companies)])
+    card_urls = pa.array([f"https://yandex.ru/maps/org/{i}/" for i in range(companies * cards_per_company)])
+    return pa.table({
+        "company": pa.DictionaryArray.from_arrays(company_index, company_names),
+        "company_site": pa.DictionaryArray.from_arrays(company_index, pa.array(
+            [f"https://company{i}.ru/" for i in range(companies)])),
+        "card_url": pa.DictionaryArray.from_arrays(card_index, card_urls),
+        "review_key": pa.array([f"r{offset + i}" for i in range(count)]),
+        "rating": rng.integers(1, 6, count).astype(np.float32),
+        "review_ts": pa.array(review_ts, pa.timestamp("s")),
+        "response_ts": pa.array(response_ts, pa.timestamp("s"), mask=~answered),
+        "answered": answered,
+        "text": phrases.take(rng.integers(0, len(PHRASES), count)),
+        "response_text": pa.array(np.where(answered, "Спасибо за отзыв!", None)),
+        "archived_at": pa.array(np.full(count, int(time.time())), pa.timestamp("s")),
+    }).cast(FILE_SCHEMA)
+
+
+def directory_size_mb(path: str) -> float:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return round(total / 2 ** 20, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic review archive and time single-company scans")
+    parser.add_argument("--reviews", type=int, default=10_000_000)
+    parser.add_argument("--companies", type=int, default=2000)
+    parser.add_argument("--cards-per-company", type=int, default=3)
+    parser.add_argument("--chunk", type=int, default=2_000_000)
+    parser.add_argument("--root", help="archive directory (default: a temporary one, removed afterwards)")
+    args = parser.parse_args()
+
+    root = args.root or tempfile.mkdtemp(prefix="review-archive-")
+    archive = ReviewArchive(root)
+    rng = np.random.default_rng(42)
+    try:
+        started = time.perf_counter()
+        written = 0
+        while written < args.reviews:
+            count = min(args.chunk, args.reviews - written)
+            archive.append_table("Yandex", synthetic_chunk(rng, count, args.companies, args.cards_per_company,
+                                                           written))
+            written += count
+        write_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        archive.compact()
+        compact_seconds = time.perf_counter() - started
+        print(f"write: {written:,} reviews in {write_seconds:.1f} s, compact {compact_seconds:.1f} s, "
+              f"{directory_size_mb(root)} MB on disk")
+
+        for label, filters in (
+            ("one company, all years", {"company": "Компания 7"}),
+            ("one company, last year", {"company": "Компания 7", "since": datetime(2024, 1, 1)}),
+            ("one company, negative", {"company": "Компания 7", "max_rating": 3}),
+        ):
+            started = time.perf_counter()
+            columns, cards = archive.review_columns(**filters)
+            scan_seconds = time.perf_counter() - started
+            stats = review_stats(columns)
+            total_seconds = time.perf_counter() - started
+            print(f"{label}: {len(columns):,} reviews from {len(cards)} cards, scan {scan_seconds:.2f} s, "
+                  f"with response-time trend {total_seconds:.2f} s ({len(stats['trend'])} buckets)")
+    finally:
+        if args.root is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.scraper import BLOCK_PROFILES, apply_block_profile, drain_traffic
+
+DEFAULT_URLS = {
+    "gis2": ["https://2gis.ru/moscow/search/Маяк"],
+    "yandex": ["https://yandex.ru/maps/?text=Маяк"],
+}
+
+
+def headless_driver(profile: str):
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.page_load_strategy = "eager"
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    driver = webdriver.Chrome(options=options)
+    if profile != "none":
+        apply_block_profile(driver, profile)
+    else:
+        driver.execute_cdp_cmd('Network.enable', {})
+    return driver
+
+
+def load_pages(profile: str, urls: list[str], settle: float, rounds: int) -> dict:
+    # A fresh browser per profile, so neither run is served from the other's HTTP cache
+    totals = {"requests": 0, "blocked": 0, "bytes": 0}
+    driver = headless_driver(profile)
+    try:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for url in urls:
+                driver.get(url)
+                time.sleep(settle)
+                for key, value in drain_traffic(driver).items():
+                    totals[key] += value
+                driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+        totals["seconds"] = round(time.perf_counter() - started, 2)
+    finally:
+        driver.quit()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bytes a block profile saves: the same pages are loaded "
+                                                 "with no profile and with the profile, in headless Chrome")
+    parser.add_argument("urls", nargs="*", help="pages to load (default: a search page of the profile's platform)")
+    parser.add_argument("--profile", choices=[name for name in BLOCK_PROFILES if name != "none"], default="gis2")
+    parser.add_argument("--settle", type=float, default=5.0, help="seconds to let late requests finish per page")
+    parser.add_argument("--rounds", type=int, default=1)
+    args = parser.parse_args()
+
+    urls = args.urls or DEFAULT_URLS[args.profile]
+    baseline = load_pages("none", urls, args.settle, args.rounds)
+    blocked = load_pages(args.profile, urls, args.settle, args.rounds)
+
+    for name, stats in (("none", baseline), (args.profile, blocked)):
+        print(f"{name:>8}: {stats['requests']} requests, {stats['blocked']} blocked, "
+              f"{stats['bytes'] / 1024:.0f} KB in {stats['seconds']} s")
+    saved = baseline["bytes"] - blocked["bytes"]
+    share = saved / baseline["bytes"] if baseline["bytes"] else 0.0
+    print(f"saved: {saved / 1024:.0f} KB ({share:.0%}), {blocked['blocked']} requests blocked "
+          f"over {len(urls) * args.rounds} page loads")
+
+
+if __name__ == "__main__":
+    main()
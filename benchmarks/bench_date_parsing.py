@@ -0,0 +1,104 @@
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.utils.date_utils import parse_date, parse_dates, MONTHS
+
+
+def legacy_parse_date(date_str: str) -> datetime | None:
+    # BaseParser._parse_date before it moved to src/utils/date_utils.py
+    try:
+        date_str = date_str.lower().strip()
+        now = datetime.now()
+
+        if "час назад" in date_str:
+            hours = int(date_str.split()[0])
+            return now - timedelta(hours=hours)
+        elif "дня назад" in date_str or "дней назад" in date_str:
+            days = int(date_str.split()[0])
+            return now - timedelta(days=days)
+        elif "минут назад" in date_str:
+            minutes = int(date_str.split()[0])
+            return now - timedelta(minutes=minutes)
+        elif "сегодня" in date_str:
+            time_part = date_str.replace("сегодня", "").strip()
+            if time_part and ":" in time_part:
+                return datetime.combine(now.date(), datetime.strptime(time_part, "%H:%M").time())
+            return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        parts = date_str.split()
+        day = None
+        month = None
+        year = now.year
+
+        if len(parts) >= 2:
+            try:
+                day = int(parts[0])
+                month_name = parts[1]
+
+                month_map = {
+                    "января": 1, "февраля": 2, "марта": 3, "апреля": 4,
+                    "мая": 5, "июня": 6, "июля": 7, "августа": 8,
+                    "сентября": 9, "октября": 10, "ноября": 11, "декабря": 12
+                }
+                month = month_map.get(month_name)
+
+                if len(parts) == 3:
+                    year = int(parts[2])
+
+                if day and month:
+                    return datetime(year, month, day)
+            except ValueError:
+                pass
+
+        if "." in date_str:
+            date_parts = date_str.split('.')
+            if len(date_parts) == 3:
+                return datetime.strptime(date_str, "%d.%m.%Y")
+            elif len(date_parts) == 2:
+                return datetime.strptime(date_str, "%d.%m").replace(year=now.year)
+
+        return None
+
+    except Exception as e:
+        return None
+
+
+def synthetic_dates(count: int) -> list[str]:
+    month_names = list(MONTHS)
+    rng = random.Random(42)
+    dates = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.6:
+            dates.append(f"{rng.randint(1, 28)} {rng.choice(month_names)} {rng.randint(2015, 2024)}")
+        elif kind < 0.8:
+            dates.append(f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{rng.randint(2015, 2024)}")
+        elif kind < 0.9:
+            dates.append(f"{rng.randint(2, 9)} дня назад")
+        else:
+            dates.append(f"сегодня {rng.randint(0, 23)}:{rng.randint(0, 59):02d}")
+    return dates
+
+
+def measure(name: str, func, dates: list[str]):
+    started = time.perf_counter()
+    func(dates)
+    elapsed = time.perf_counter() - started
+    print(f"{name:>8}: {elapsed:.2f} s, {elapsed / len(dates) * 1e9:,.0f} ns/call")
+
+
+def main(count: int = 1_000_000):
+    dates = synthetic_dates(count)
+    now = datetime.now()
+    measure("legacy", lambda items: [legacy_parse_date(d) for d in items], dates)
+    measure("new", lambda items: [parse_date(d, now) for d in items], dates)
+    measure("batch", lambda items: parse_dates(items, now), dates)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,53 @@
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.db import Database
+
+
+def synthetic_reviews(count: int):
+    start = datetime(2020, 1, 1)
+    for i in range(count):
+        date = start + timedelta(minutes=i)
+        review = {
+            "id": f"r{i}",
+            "rating": float(random.randint(1, 5)),
+            "text": f"Отзыв номер {i} " * 5,
+            "date": date,
+            "response": None,
+        }
+        if i % 3 == 0:
+            review["response"] = {"text": "Спасибо за отзыв!", "date": date + timedelta(days=1)}
+        yield review
+
+
+def main(count: int = 200_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        company_id = db.upsert_company("Bench", "https://example.com")
+        card_id = db.upsert_card(company_id, "GIS2", {"url": "https://2gis.ru/firm/1", "rating": 4.5})
+
+        started = time.perf_counter()
+        db.save_reviews(card_id, synthetic_reviews(count))
+        elapsed = time.perf_counter() - started
+        print(f"insert: {count} reviews in {elapsed:.2f} s ({count / elapsed:,.0f} rows/s)")
+
+        started = time.perf_counter()
+        db.save_reviews(card_id, synthetic_reviews(count))
+        elapsed = time.perf_counter() - started
+        print(f"upsert: {count} reviews in {elapsed:.2f} s ({count / elapsed:,.0f} rows/s)")
+
+        started = time.perf_counter()
+        read = sum(1 for _ in db.iter_reviews(card_id, since=datetime(2020, 1, 15)))
+        elapsed = time.perf_counter() - started
+        print(f"read: {read} reviews in {elapsed:.2f} s")
+        db.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
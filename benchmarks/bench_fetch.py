@@ -0,0 +1,72 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mock_server import MockServer, MockSite
+from src.fetcher import FetchEngine
+from src.metrics import Metrics
+from src.scheduler import RequestScheduler
+
+
+def legacy_fetch(urls: list[str]) -> int:
+    # What the parsers did before FetchEngine: a blocking requests.get per page, a new connection each time
+    import requests
+
+    ok = 0
+    for url in urls:
+        response = requests.get(url, timeout=20)
+        ok += response.status_code == 200
+    return ok
+
+
+def engine_fetch(urls: list[str], max_in_flight: int) -> int:
+    scheduler = RequestScheduler(metrics=Metrics(), host_rate=1e6, host_burst=10_000, host_limits={},
+                                 max_concurrency=max_in_flight + 4)
+    with FetchEngine(metrics=Metrics(), scheduler=scheduler, max_connections_per_proxy=max_in_flight) as engine:
+        if max_in_flight == 1:
+            return sum(engine.fetch(url) is not None for url in urls)
+        return sum(body is not None for body in engine.fetch_many(urls, max_in_flight=max_in_flight))
+
+
+def measure(label: str, run, count: int) -> float:
+    started = time.perf_counter()
+    ok = run()
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed
+    print(f"{label:>28}: {ok}/{count} ok in {elapsed:.2f} s, {rate:.1f} req/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Requests/sec of per-call requests.get against FetchEngine, "
+                                                 "on a local mock of Yandex Maps card pages")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02, help="server-side latency per response, seconds")
+    parser.add_argument("--connect-latency", type=float, default=0.05,
+                        help="delay before a new connection is served, standing in for TCP and TLS handshakes")
+    parser.add_argument("--in-flight", type=int, default=10)
+    args = parser.parse_args()
+
+    site = MockSite(cards=20, reviews=(20, 20), latency=args.latency, connect_latency=args.connect_latency)
+    with MockServer(site) as server:
+        urls = [f"{server.base_url}/maps/org/mayak/{1001 + i % 20}/" for i in range(args.requests)]
+
+        try:
+            legacy = measure("requests.get per call", lambda: legacy_fetch(urls), len(urls))
+        except ImportError:
+            legacy = None
+            print("requests is not installed, skipping the per-call requests.get baseline")
+        sequential = measure("FetchEngine, sequential", lambda: engine_fetch(urls, 1), len(urls))
+        concurrent = measure(f"FetchEngine, {args.in_flight} in flight",
+                             lambda: engine_fetch(urls, args.in_flight), len(urls))
+
+    if legacy:
+        print(f"speedup over requests.get: keep-alive x{sequential / legacy:.2f}, "
+              f"concurrent x{concurrent / legacy:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.fingerprints import FingerprintPool
+
+
+def legacy_headers() -> dict:
+    from fake_useragent import UserAgent
+
+    ua = UserAgent()
+    return {"User-Agent": ua.random, "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7"}
+
+
+def main(count: int = 100_000, legacy_count: int = 50):
+    started = time.perf_counter()
+    pool = FingerprintPool()
+    print(f"pool of {len(pool)} profiles built in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    proxies = [f"10.0.0.{i}:8080" for i in range(50)]
+    started = time.perf_counter()
+    for i in range(count):
+        headers = dict(pool.for_key(proxies[i % len(proxies)]).headers)
+    elapsed = time.perf_counter() - started
+    print(f"pooled: {elapsed / count * 1e6:.2f} µs per request")
+
+    try:
+        started = time.perf_counter()
+        for _ in range(legacy_count):
+            legacy_headers()
+        elapsed = time.perf_counter() - started
+        print(f"UserAgent() per request: {elapsed / legacy_count * 1e3:.2f} ms per request")
+    except ImportError:
+        print("fake_useragent is not installed, skipping the per-request UserAgent() baseline")
+
+
+if __name__ == "__main__":
+    main()
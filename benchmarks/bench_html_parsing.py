@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.parsers.html_backend import BACKENDS, iter_org_links, extract_embedded_state
+from src.parsers.yandex_parser import SNIPPET_LINK_SELECTOR
+
+
+def synthetic_search_page(snippets: int = 400, padding_kb: int = 2048) -> str:
+    parts = ["<html><head><title>Поиск</title></head><body><div class='search-list-view'>"]
+    for i in range(snippets):
+        parts.append(
+            "<div class='search-business-snippet-view'>"
+            "<div class='search-business-snippet-view__content'>"
+            f"<a class='link-overlay' role='link' href='/maps/org/company_{i}/{100000 + i}/'></a>"
+            f"<div class='search-business-snippet-view__title'>Компания {i}</div>"
+            "</div></div>"
+        )
+    parts.append("<div class='filler'>" + "<span>x</span>" * (padding_kb * 1024 // 13) + "</div>")
+    parts.append('<script type="application/json" class="state-view">{"config": {"query": "test"}}</script>')
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def measure(name: str, func, pages: list[str], rounds: int) -> list[int]:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        found = [len(func(page)) for page in pages]
+    elapsed = (time.perf_counter() - started) / (rounds * len(pages))
+    print(f"{name:>22}: {elapsed * 1000:8.1f} ms/page, {sum(found)} links")
+    return found
+
+
+def main(paths: list[str], rounds: int = 5):
+    if paths:
+        pages = []
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                pages.append(f.read())
+    else:
+        pages = [synthetic_search_page()]
+    print(f"pages: {len(pages)}, avg size: {sum(map(len, pages)) / len(pages) / 1024:.0f} KB")
+
+    links = {}
+    for name, backend_class in BACKENDS.items():
+        try:
+            backend = backend_class()
+        except ImportError:
+            print(f"{name:>22}: not installed")
+            continue
+        links[name] = measure(name, lambda page: set(backend.select_attr(page, SNIPPET_LINK_SELECTOR, "href")),
+                              pages, rounds)
+
+    links["streaming links"] = measure("streaming links", lambda page: list(iter_org_links(page)), pages, rounds)
+    measure("streaming state", lambda page: extract_embedded_state(page) or {}, pages, rounds)
+    # A faster backend is only a win if it finds the same cards
+    assert len({tuple(found) for found in links.values()}) == 1, f"link counts differ per page: {links}"
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mock_server import MockServer, MockSite
+from src.metrics import Metrics
+from src.parsers.yandex_parser import YandexParser
+from src.proxy_manager import ProxyManager
+from src.scheduler import RequestScheduler
+
+COMPANY_NAME = "Маяк"
+COMPANY_SITE = "https://igevsk.magazinmayak.ru/"
+
+
+def peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+
+class StageTimer:
+    def __init__(self, site: MockSite):
+        self.site = site
+
+    def __call__(self, func, *args):
+        before = self.site.stats()
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        after = self.site.stats()
+        return result, elapsed, after["requests"] - before["requests"]
+
+
+def _card_reviews(card: dict | None) -> int:
+    return len(card.get("reviews", [])) if card else 0
+
+
+def run_parser(parser, site: MockSite, workers: int) -> dict:
+    timed = StageTimer(site)
+    urls, search_seconds, search_pages = timed(parser.search_company_urls)
+
+    card_latencies = []
+    cards = []
+    card_pages = 0
+    for url in urls:
+        card, seconds, pages = timed(parser.parse_card_details, url)
+        card_latencies.append(seconds)
+        card_pages += pages
+        if card:
+            cards.append(card)
+    card_seconds = sum(card_latencies)
+    reviews = sum(_card_reviews(card) for card in cards)
+
+    summary, aggregate_seconds, _ = timed(parser.aggregate_platform_data, cards)
+    analyzed, analyze_seconds, analyze_pages = timed(parser.analyze_platform_data, workers)
+    analyzed_reviews = sum(_card_reviews(card) for card in analyzed.get("cards_details", []))
+
+    return {
+        "cards_found": len(urls),
+        "cards_parsed": len(cards),
+        "reviews": reviews,
+        "search_seconds": round(search_seconds, 4),
+        "search_pages": search_pages,
+        "card_pages": card_pages,
+        "pages_per_second": round(card_pages / card_seconds, 2) if card_seconds else None,
+        "reviews_per_second": round(reviews / card_seconds, 2) if card_seconds else None,
+        "card_latency_p50": percentile(card_latencies, 0.5),
+        "card_latency_p99": percentile(card_latencies, 0.99),
+        "aggregate_seconds": round(aggregate_seconds, 4),
+        "summary_reviews": summary.get("total_reviews_count"),
+        "analyze": {
+            "workers": workers,
+            "seconds": round(analyze_seconds, 4),
+            "pages": analyze_pages,
+            "reviews": analyzed_reviews,
+            "pages_per_second": round(analyze_pages / analyze_seconds, 2) if analyze_seconds else None,
+            "reviews_per_second": round(analyzed_reviews / analyze_seconds, 2) if analyze_seconds else None,
+            "error": analyzed.get("error"),
+        },
+    }
+
+
+def run_yandex(server: MockServer, workers: int) -> dict:
+    parser = YandexParser(COMPANY_NAME, COMPANY_SITE, proxy_manager=ProxyManager([]))
+    parser.base_url = parser.search_base_url = server.base_url + "/maps/"
+    parser.REVIEWS_API_URL = server.base_url + "/maps/api/business/fetchReviews"
+    parser.MAX_REVIEW_PAGES = 1000
+    try:
+        return run_parser(parser, server.site, workers)
+    finally:
+        parser.close()
+
+
+def headless_driver():
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.page_load_strategy = "eager"
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return webdriver.Chrome(options=options)
+
+
+def run_gis2(server: MockServer, workers: int) -> dict:
+    from src.parsers.gis2_parser import GIS2Parser
+    from src.scraper import DriverPool
+
+    with DriverPool(headless_driver, size=workers) as pool:
+        with pool.lease() as session:
+            parser = GIS2Parser(None, COMPANY_NAME, COMPANY_SITE, session=session, pool=pool)
+            parser.base_url = server.base_url
+            return run_parser(parser, server.site, workers)
+
+
+def parse_reviews(value: str) -> tuple[int, int]:
+    low, _, high = value.partition(":")
+    return int(low), int(high or low)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark against a local mock of 2GIS and Yandex Maps")
+    parser.add_argument("--cards", type=int, default=5)
+    parser.add_argument("--reviews", type=parse_reviews, default=(10, 1000),
+                        help="reviews per card: N or MIN:MAX (10 to 10000)")
+    parser.add_argument("--latency", type=float, default=0.0, help="base response latency, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 503")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--host-rate", type=float, default=1000.0,
+                        help="scheduler requests per second for the mock host (production hosts use HOST_LIMITS)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", help="directory of captured pages served by URL path before synthetic ones")
+    parser.add_argument("--platforms", nargs="+", choices=("yandex", "gis2"), default=["yandex"],
+                        help="gis2 drives headless Chrome")
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/offline-<time>.json)")
+    args = parser.parse_args()
+
+    site = MockSite(args.cards, args.reviews, args.latency, args.jitter, args.error_rate, args.seed, args.fixtures)
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+    }
+    with MockServer(site) as server:
+        RequestScheduler.shared().set_host_limit("127.0.0.1", args.host_rate, max(1, int(args.host_rate)))
+        if "yandex" in args.platforms:
+            results["yandex"] = run_yandex(server, args.workers)
+        if "gis2" in args.platforms:
+            results["gis2"] = run_gis2(server, args.workers)
+        results["server"] = site.stats()
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    results["scheduler"] = RequestScheduler.shared().stats()
+    results["metrics"] = Metrics.shared().profile()
+
+    output = args.output or os.path.join(os.path.dirname(__file__), "results",
+                                         f"offline-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    for name in args.platforms:
+        stats = results[name]
+        print(f"{name}: {stats['cards_parsed']} cards, {stats['reviews']} reviews, "
+              f"{stats['pages_per_second']} pages/s, {stats['reviews_per_second']} reviews/s, "
+              f"card p50 {stats['card_latency_p50']} s, p99 {stats['card_latency_p99']} s; "
+              f"analyze x{args.workers}: {stats['analyze']['seconds']} s")
+    print(f"peak RSS: {results['peak_rss_mb']} MB, results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
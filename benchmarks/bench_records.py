@@ -0,0 +1,69 @@
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.records import Card
+
+
+def synthetic_card(index: int, reviews: int) -> dict:
+    start = datetime(2020, 1, 1)
+    card = {
+        "url": f"https://2gis.ru/izhevsk/firm/{index}",
+        "rating": 4.5,
+        "total_reviews": reviews,
+        "answered_reviews": reviews // 3,
+        "unanswered_reviews": reviews - reviews // 3,
+        "avg_response_time_seconds": 86400.0,
+        "negative_reviews": reviews // 5,
+        "positive_reviews": reviews - reviews // 5,
+        "reviews": [],
+    }
+    for i in range(reviews):
+        date = start + timedelta(minutes=i)
+        review = {
+            "id": f"{index}-{i}",
+            "rating": float(i % 5 + 1),
+            "text": f"Отзыв номер {i} " * 5,
+            "date": date,
+            "response": None,
+        }
+        if i % 3 == 0:
+            review["response"] = {"text": f"Спасибо за отзыв {i}!", "date": date + timedelta(days=1)}
+        card["reviews"].append(review)
+    return card
+
+
+def measure(build) -> int:
+    tracemalloc.start()
+    value = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del value
+    return size
+
+
+def main(cards: int = 50, reviews: int = 2000):
+    total = cards * reviews
+
+    def as_dicts():
+        return [synthetic_card(i, reviews) for i in range(cards)]
+
+    def as_records(drop_text: bool = False):
+        result = []
+        for i in range(cards):
+            card = Card.from_dict("GIS2", synthetic_card(i, reviews))
+            if drop_text:
+                card.drop_text()
+            result.append(card)
+        return result
+
+    print(f"dicts:          {measure(as_dicts) / total:.0f} bytes/review")
+    print(f"records:        {measure(as_records) / total:.0f} bytes/review")
+    print(f"records, -text: {measure(lambda: as_records(drop_text=True)) / total:.0f} bytes/review")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.utils.report_generator import generate_report
+
+
+def synthetic_sections(cards: int, reviews_per_card: int):
+    start = datetime(2020, 1, 1)
+    # A small pool of distinct rows keeps generation cost out of the measurement
+    pool = []
+    for i in range(1000):
+        date = start + timedelta(minutes=i)
+        answered = i % 3 == 0
+        pool.append((float(i % 5 + 1), date.isoformat(), f"Отзыв <номер> {i} " * 5,
+                     "Спасибо за отзыв!" if answered else None,
+                     (date + timedelta(days=1)).isoformat() if answered else None))
+
+    def reviews(card_index: int):
+        for i in range(reviews_per_card):
+            yield (f"{card_index}-{i}",) + pool[i % len(pool)]
+
+    summary = {"platform": "GIS2", "card_count": cards, "overall_rating": 4.2,
+               "total_reviews_count": cards * reviews_per_card}
+    cards_iter = (({"url": f"https://2gis.ru/firm/{i}", "rating": 4.2}, reviews(i)) for i in range(cards))
+    yield summary, cards_iter
+
+
+def main(cards: int = 100, reviews_per_card: int = 10_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        for suffix in (".html", ".csv", ".jsonl"):
+            path = os.path.join(tmp, "report" + suffix)
+            started = time.perf_counter()
+            written = generate_report(synthetic_sections(cards, reviews_per_card), path)
+            elapsed = time.perf_counter() - started
+            size = os.path.getsize(path) / 2 ** 20
+            print(f"{suffix}: {written:,} reviews in {elapsed:.2f} s, {size:.0f} MB")
+
+            # Peak memory stays at the chunk size regardless of the report size
+            tracemalloc.start()
+            generate_report(synthetic_sections(2, reviews_per_card), path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{suffix}: peak traced memory {peak / 2 ** 20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
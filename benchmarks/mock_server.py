@@ -0,0 +1,232 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+MONTHS_GENITIVE = ("января", "февраля", "марта", "апреля", "мая", "июня", "июля", "августа", "сентября", "октября",
+                   "ноября", "декабря")
+YANDEX_PAGE_SIZE = 50
+PHRASES = ("Отличный магазин, всегда свежие продукты", "Долго ждали на кассе", "Вежливый персонал",
+           "Цены выше, чем у конкурентов", "Удобная парковка и широкий ассортимент", "Грязно в торговом зале")
+# Filler keeps synthetic pages above the parsers' minimum HTML length
+FILLER = "<!-- " + "mock page padding " * 40 + "-->"
+
+
+class MockSite:
+    def __init__(self, cards: int = 5, reviews: tuple[int, int] = (100, 100), latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0, fixtures: str | None = None,
+                 connect_latency: float = 0.0):
+        self.cards = cards
+        self.reviews = reviews
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self.fixtures = Path(fixtures) if fixtures else None
+        # Stands in for the TCP and TLS handshakes a real host costs on every new connection
+        self.connect_latency = connect_latency
+        self.now = datetime(2025, 6, 1, 12, 0)
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def card_ids(self) -> list[int]:
+        return [1001 + i for i in range(self.cards)]
+
+    @lru_cache(maxsize=256)
+    def card_reviews(self, card_id: int) -> list[tuple]:
+        rng = random.Random(self.seed * 100003 + card_id)
+        low, high = self.reviews
+        count = rng.randint(low, high)
+        reviews = []
+        for i in range(count):
+            age = timedelta(hours=i * 7 + rng.randint(0, 6))
+            rating = rng.choice((1, 2, 3, 4, 5, 5, 5, 4))
+            answered = rng.random() < 0.4
+            reviews.append((
+                f"r{card_id}x{i}",
+                rating,
+                f"{rng.choice(PHRASES)}. Отзыв {i}.",
+                self.now - age,
+                f"Спасибо за отзыв, {i}!" if answered else None,
+                self.now - age + timedelta(hours=rng.randint(1, 96)) if answered else None,
+            ))
+        return reviews
+
+    def card_rating(self, card_id: int) -> float:
+        reviews = self.card_reviews(card_id)
+        return round(sum(review[1] for review in reviews) / len(reviews), 1) if reviews else 0.0
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def delay(self) -> float:
+        with self._lock:
+            return self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def note(self, size: int, failed: bool):
+        with self._lock:
+            self.requests += 1
+            self.bytes += size
+            if failed:
+                self.errors += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors, "bytes": self.bytes}
+
+    def fixture(self, path: str) -> tuple[str, bytes] | None:
+        if self.fixtures is None:
+            return None
+        base = self.fixtures / path.strip("/")
+        for candidate, content_type in ((base.with_suffix(".html"), "text/html"), (base / "index.html", "text/html"),
+                                        (base.with_suffix(".json"), "application/json")):
+            if candidate.is_file():
+                return content_type, candidate.read_bytes()
+        return None
+
+    @staticmethod
+    def _text_date(value: datetime) -> str:
+        return f"{value.day} {MONTHS_GENITIVE[value.month - 1]} {value.year}"
+
+    def gis2_search(self) -> str:
+        items = "".join(f'<div class="_zjunba"><a class="_1rehek" href="/firms/{card_id}">Маяк №{card_id}</a></div>'
+                        for card_id in self.card_ids())
+        return (f'<html><head><title>Поиск</title></head><body>'
+                f'<div class="_1kf6gff" style="height:400px;overflow:auto">{items}</div>{FILLER}</body></html>')
+
+    def gis2_card(self, card_id: int) -> str:
+        reviews = self.card_reviews(card_id)
+        parts = [f'<html><head><title>Маяк №{card_id}</title></head><body>'
+                 f'<span data-testid="rating-value">{self.card_rating(card_id)}</span>'
+                 f'<a data-testid="reviews-link" href="#reviews">{len(reviews)} отзывов</a>'
+                 f'<section data-id="reviews">']
+        for review_id, rating, text, date, response_text, response_date in reviews:
+            response = ""
+            if response_text:
+                response = (f'<div class="response-block"><div class="response-text">{escape(response_text)}</div>'
+                            f'<span class="response-date">{self._text_date(response_date)}</span></div>')
+            parts.append(f'<div class="review-item" data-review-id="{review_id}">'
+                         f'<span class="star-rating" aria-label="{rating}"></span>'
+                         f'<div class="review-text">{escape(text)}</div>'
+                         f'<span class="review-date">{self._text_date(date)}</span>{response}</div>')
+        parts.append(f"</section>{FILLER}</body></html>")
+        return "".join(parts)
+
+    @staticmethod
+    def _yandex_review(review: tuple) -> dict:
+        review_id, rating, text, date, response_text, response_date = review
+        raw = {"reviewId": review_id, "rating": rating, "text": text, "updatedTime": date.isoformat() + "Z"}
+        if response_text:
+            raw["businessComment"] = {"text": response_text, "updatedTime": response_date.isoformat() + "Z"}
+        return raw
+
+    def yandex_search(self) -> str:
+        snippets = "".join(
+            f'<div class="search-business-snippet-view"><div class="search-business-snippet-view__content">'
+            f'<a class="link-overlay" role="link" href="/maps/org/mayak/{card_id}"></a></div></div>'
+            for card_id in self.card_ids())
+        return f"<html><head><title>Яндекс Карты</title></head><body>{snippets}{FILLER}</body></html>"
+
+    def yandex_card(self, card_id: int) -> str:
+        reviews = self.card_reviews(card_id)
+        pages = max(1, -(-len(reviews) // YANDEX_PAGE_SIZE))
+        state = {
+            "config": {"csrfToken": "mock-token"},
+            "stack": [{"response": {
+                "businessId": str(card_id),
+                "ratingData": {"ratingValue": self.card_rating(card_id), "reviewCount": len(reviews)},
+                "reviewResults": {"reviews": [self._yandex_review(r) for r in reviews[:YANDEX_PAGE_SIZE]],
+                                  "params": {"totalPages": pages}},
+            }}],
+        }
+        return (f'<html><head><title>Маяк №{card_id}</title></head><body>'
+                f'<script type="application/json" class="state-view">{json.dumps(state, ensure_ascii=False)}</script>'
+                f'{FILLER}</body></html>')
+
+    def yandex_reviews(self, card_id: int, page: int) -> str:
+        reviews = self.card_reviews(card_id)
+        chunk = reviews[(page - 1) * YANDEX_PAGE_SIZE:page * YANDEX_PAGE_SIZE]
+        return json.dumps({"data": {"reviews": [self._yandex_review(r) for r in chunk]}}, ensure_ascii=False)
+
+    def route(self, path: str, query: dict) -> tuple[int, str, str]:
+        if path.startswith("/search/"):
+            return 200, "text/html", self.gis2_search()
+        if path.startswith("/firms/"):
+            return 200, "text/html", self.gis2_card(int(path.rsplit("/", 1)[1]))
+        if path.startswith("/maps/search"):
+            return 200, "text/html", self.yandex_search()
+        if path.startswith("/maps/org/"):
+            return 200, "text/html", self.yandex_card(int(path.rstrip("/").rsplit("/", 1)[1]))
+        if path.startswith("/maps/api/business/fetchReviews"):
+            card_id = int(query.get("businessId", ["0"])[0])
+            return 200, "application/json", self.yandex_reviews(card_id, int(query.get("page", ["1"])[0]))
+        return 404, "text/plain", "not found"
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, keep-alive clients stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        if self.site.connect_latency:
+            time.sleep(self.site.connect_latency)
+        super().setup()
+    site: MockSite = None
+
+    def do_GET(self):
+        site = self.site
+        time.sleep(site.delay())
+        parsed = urlparse(self.path)
+
+        if site.should_fail():
+            status, content_type, body = 503, "text/plain", b"temporarily unavailable"
+        else:
+            fixture = site.fixture(parsed.path)
+            if fixture is not None:
+                status, (content_type, body) = 200, fixture
+            else:
+                status, content_type, text = site.route(parsed.path, parse_qs(parsed.query))
+                body = text.encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        site.note(len(body), status != 200)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockServer:
+    def __init__(self, site: MockSite, host: str = "127.0.0.1", port: int = 0):
+        handler = type("BoundMockHandler", (MockHandler,), {"site": site})
+        self.site = site
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-server", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -1,78 +1,56 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from src.parsers.gis2_parser import GIS2Parser
+from src.orchestrator import analyze_company
+from src.scraper import DriverPool, setup_driver
+from src.page_cache import PageCache
+from src.db import Database
+from src.archive import ReviewArchive
+from src.metrics import Metrics
+from src.job_queue import PriorityBoard
+from src.scheduler import RequestScheduler
+from src.utils.report_generator import generate_report, sections_from_summaries
 import time
 import os
 
 
-def load_proxies(filepath="proxies.txt"):
-    proxies = []
-    if not os.path.exists(filepath):
-        print(f"Proxy file not found: {filepath}")
-        return proxies
-    try:
-        with open(filepath, "r") as f:
-            for line in f:
-                proxy = line.strip()
-                if proxy:
-                    proxies.append(proxy)
-    except Exception as e:
-        print(f"Error loading proxies from {filepath}: {e}")
-    return proxies
-
-
-def setup_driver():
-    options = webdriver.ChromeOptions()
-    # options.add_argument('--headless')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-
-    # --- ИЗМЕНЕНИЕ ЗДЕСЬ ---
-    # Закомментируйте или удалите блок, связанный с загрузкой и применением прокси
-
-    # proxies = load_proxies()
-    # if proxies:
-    #     proxy = proxies[0] # Using the first proxy from the list
-    #     options.add_argument(f'--proxy-server={proxy}')
-    #     print(f"Using proxy: {proxy}")
-
-    # --- КОНЕЦ ИЗМЕНЕНИЯ ---
-
-    script_dir = os.path.dirname(__file__)
-    driver_path = os.path.join(script_dir, 'chromedriver.exe')
-
-    if not os.path.exists(driver_path):
-        raise FileNotFoundError(
-            f"ChromeDriver not found at {driver_path}. Please ensure it's in the project root or specify the correct path.")
-
-    service = Service(executable_path=driver_path)
-    driver = webdriver.Chrome(service=service, options=options)
-    return driver
-
-
 def main():
     company_name_input = "Маяк"
     company_site_input = "https://igevsk.magazinmayak.ru/"
     email_input = "test@example.com"
 
-    driver = None
+    pool = None
+    # Batch workers sharing the queue database hold back on hosts this lookup waits for
+    board = PriorityBoard()
+    RequestScheduler.shared().share_priorities(board)
     try:
-        driver = setup_driver()
+        pool = DriverPool(setup_driver, size=1)
+
+        print("\n--- Starting 2GIS and Yandex Parsing ---")
+        report_data = analyze_company(company_name_input, company_site_input, pool=pool, cache=PageCache())
+        print(f" Parsing finished in {report_data['elapsed_seconds']} s. Errors: {report_data['errors']}")
+        summary = {key: value for key, value in report_data.items() if key != "platforms"}
+        print(f" Summary: {summary}")
 
-        print("\n--- Starting 2GIS Parsing ---")
-        gis_parser = GIS2Parser(driver=driver, company_name=company_name_input, company_site=company_site_input)
+        db = Database()
+        archive = ReviewArchive()
+        for platform_result in report_data["platforms"].values():
+            db.save_platform_result(company_name_input, company_site_input, platform_result)
+            archive.append_platform_result(company_name_input, company_site_input, platform_result)
+        db.close()
 
-        report_data_gis = gis_parser.analyze_platform_data()
-        print(f" 2GIS Parsing finished. Data received: {report_data_gis}")
+        generate_report(sections_from_summaries(list(report_data["platforms"].values())), "report.html",
+                        title=f"Отзывы о компании {company_name_input}")
 
     except FileNotFoundError as fnf_error:
         print(f"Configuration error: {fnf_error}")
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
     finally:
-        if driver:
-            print("\n--- Quitting driver ---")
-            driver.quit()
+        if pool:
+            print("\n--- Closing driver pool ---")
+            pool.close()
+        RequestScheduler.shared().share_priorities(None)
+        board.close()
+        Metrics.shared().write_prometheus("metrics.prom")
+        Metrics.shared().write_profile("run_profile.json")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import deque
+
+from selenium.common.exceptions import TimeoutException
+
+FIND_ANY_JS = """
+const [selectors, markers, visible] = arguments;
+const isVisible = el => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+for (let i = 0; i < selectors.length; i++) {
+    const el = document.querySelector(selectors[i]);
+    if (el && (!visible || isVisible(el))) return {index: i, element: el};
+}
+let bodyText = null;
+for (const [name, kind, value] of markers) {
+    if (kind === 'css' && document.querySelector(value)) return {marker: name};
+    if (kind === 'title' && (document.title || '').includes(value)) return {marker: name};
+    if (kind === 'title_prefix' && (document.title || '').trimStart().startsWith(value)) return {marker: name};
+    if (kind === 'text') {
+        if (bodyText === null) bodyText = document.body ? document.body.textContent : '';
+        if (bodyText.includes(value)) return {marker: name};
+    }
+}
+return null;
+"""
+
+CAPTCHA_MARKERS = (
+    ("captcha", "css", "iframe[src*='captcha']"),
+    ("captcha", "css", "form[action*='captcha']"),
+    ("captcha", "css", "#captcha, .captcha, .smart-captcha"),
+)
+# Card titles carry the address, so "404" only counts at the start of the title
+NOT_FOUND_MARKERS = (
+    ("not_found", "title_prefix", "404"),
+    ("not_found", "title", "Страница не найдена"),
+)
+
+
+class PageMarkerFound(Exception):
+    def __init__(self, marker: str, target: str):
+        super().__init__(f"{marker} page while waiting for {target}")
+        self.marker = marker
+        self.target = target
+
+
+class AdaptiveWait:
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, default_timeout: float = 10, min_timeout: float = 2, max_timeout: float = 40,
+                 factor: float = 2.0, poll_interval: float = 0.1, window: int = 200, min_samples: int = 5):
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.factor = factor
+        self.poll_interval = poll_interval
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: dict[str, deque] = {}
+        self._widened: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "AdaptiveWait":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def record(self, target: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(target)
+            if samples is None:
+                samples = self._samples[target] = deque(maxlen=self.window)
+            samples.append(seconds)
+            # Each success after a miss takes back one widening step, but never below what this success needed
+            widened = self._widened.get(target)
+            if widened is not None:
+                widened = max(widened / self.factor, seconds * self.factor)
+                if widened <= self.min_timeout:
+                    del self._widened[target]
+                else:
+                    self._widened[target] = min(self.max_timeout, widened)
+
+    def record_miss(self, target: str, timeout: float):
+        # A timeout says the page needed longer than that; the next wait gets factor times more
+        with self._lock:
+            self._widened[target] = min(self.max_timeout, max(self._widened.get(target, 0.0), timeout * self.factor))
+
+    def timeout_for(self, target: str) -> float:
+        with self._lock:
+            samples = sorted(self._samples.get(target, ()))
+            widened = self._widened.get(target, 0.0)
+        if len(samples) < self.min_samples:
+            return max(self.default_timeout, widened)
+        p99 = samples[int(0.99 * (len(samples) - 1))]
+        return max(widened, min(self.max_timeout, max(self.min_timeout, p99 * self.factor)))
+
+    def wait_for(self, driver, target: str, selectors: list[str], markers=(), visible: bool = False,
+                 timeout: float | None = None, learn: bool = True):
+        timeout = self.timeout_for(target) if timeout is None else timeout
+        markers = [list(marker) for marker in markers]
+        started = time.monotonic()
+        deadline = started + timeout
+        while True:
+            found = driver.execute_script(FIND_ANY_JS, selectors, markers, visible)
+            if found:
+                if "marker" in found:
+                    raise PageMarkerFound(found["marker"], target)
+                if learn:
+                    self.record(target, time.monotonic() - started)
+                return found["index"], found["element"]
+            if time.monotonic() >= deadline:
+                if learn:
+                    self.record_miss(target, timeout)
+                raise TimeoutException(f"{target}: none of {selectors} appeared within {timeout:.1f} s")
+            time.sleep(self.poll_interval)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {target: len(samples) for target, samples in self._samples.items()}
+        return {target: {"samples": count, "timeout": round(self.timeout_for(target), 2)}
+                for target, count in counts.items()}
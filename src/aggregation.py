@@ -0,0 +1,216 @@
+from datetime import datetime
+
+import numpy as np
+
+from .records import Card
+
+SECONDS_PER_DAY = 60 * 60 * 24
+NEGATIVE_RATING_THRESHOLD = 3.0
+
+
+def _timestamp(value: datetime | None) -> float:
+    return value.timestamp() if value is not None else np.nan
+
+
+class ReviewColumns:
+    __slots__ = ("rating", "review_ts", "response_ts", "card_index")
+
+    def __init__(self, rating: np.ndarray, review_ts: np.ndarray, response_ts: np.ndarray, card_index: np.ndarray):
+        self.rating = rating
+        self.review_ts = review_ts
+        self.response_ts = response_ts
+        self.card_index = card_index
+
+    def __len__(self):
+        return len(self.rating)
+
+    @classmethod
+    def empty(cls) -> "ReviewColumns":
+        return cls(np.empty(0), np.empty(0), np.empty(0), np.empty(0, dtype=np.int32))
+
+    @classmethod
+    def from_reviews(cls, reviews: list[dict], card_index: int = 0) -> "ReviewColumns":
+        count = len(reviews)
+        rating = np.fromiter(
+            (r["rating"] if r.get("rating") is not None else np.nan for r in reviews), dtype=np.float64, count=count)
+        review_ts = np.fromiter((_timestamp(r.get("date")) for r in reviews), dtype=np.float64, count=count)
+        response_ts = np.fromiter(
+            (_timestamp(r["response"].get("date")) if r.get("response") else np.nan for r in reviews),
+            dtype=np.float64, count=count)
+        answered = np.fromiter((bool(r.get("response")) for r in reviews), dtype=bool, count=count)
+        # Answered reviews without a parsed response date still count as answered
+        response_ts[answered & np.isnan(response_ts)] = -np.inf
+        return cls(rating, review_ts, response_ts, np.full(count, card_index, dtype=np.int32))
+
+    @classmethod
+    def from_records(cls, reviews: list, card_index: int = 0) -> "ReviewColumns":
+        # Review records already hold integer timestamps
+        count = len(reviews)
+        rating = np.fromiter(
+            (r.rating if r.rating is not None else np.nan for r in reviews), dtype=np.float64, count=count)
+        review_ts = np.fromiter(
+            (r.date if r.date is not None else np.nan for r in reviews), dtype=np.float64, count=count)
+        response_ts = np.fromiter(
+            (np.nan if r.response is None else -np.inf if r.response.date is None else r.response.date
+             for r in reviews), dtype=np.float64, count=count)
+        return cls(rating, review_ts, response_ts, np.full(count, card_index, dtype=np.int32))
+
+    @classmethod
+    def from_cards(cls, cards_data: list) -> "ReviewColumns":
+        parts = [cls.from_records(card.reviews, i) if isinstance(card, Card)
+                 else cls.from_reviews(card.get("reviews") or [], i) for i, card in enumerate(cards_data)]
+        return cls.concat(parts)
+
+    @classmethod
+    def concat(cls, parts: list["ReviewColumns"]) -> "ReviewColumns":
+        if not parts:
+            return cls.empty()
+        return cls(
+            np.concatenate([p.rating for p in parts]),
+            np.concatenate([p.review_ts for p in parts]),
+            np.concatenate([p.response_ts for p in parts]),
+            np.concatenate([p.card_index for p in parts]),
+        )
+
+    @property
+    def answered(self) -> np.ndarray:
+        return ~np.isnan(self.response_ts)
+
+    @property
+    def response_seconds(self) -> np.ndarray:
+        valid = np.isfinite(self.response_ts) & ~np.isnan(self.review_ts)
+        return self.response_ts[valid] - self.review_ts[valid]
+
+
+def card_column(cards_data: list[dict], key: str, default=0) -> np.ndarray:
+    return np.fromiter(
+        (card.get(key) if card.get(key) is not None else default for card in cards_data),
+        dtype=np.float64, count=len(cards_data))
+
+
+def summarize_cards(cards_data: list[dict], platform: str) -> dict:
+    total_cards = len(cards_data)
+
+    summary = {
+        "platform": platform,
+        "card_count": total_cards,
+        "overall_rating": 0.0,
+        "total_reviews_count": 0,
+        "answered_reviews_count": 0,
+        "unanswered_reviews_count": 0,
+        "negative_reviews_count": 0,
+        "positive_reviews_count": 0,
+        "avg_response_time_days": None,
+        "review_stats": review_stats(ReviewColumns.empty()),
+        "card_stats": [],
+        "cards_details": cards_data
+    }
+
+    if total_cards == 0:
+        return summary
+
+    ratings = card_column(cards_data, "rating", np.nan)
+    rated = ~np.isnan(ratings)
+    if rated.any():
+        summary["overall_rating"] = round(float(ratings[rated].mean()), 2)
+
+    response_times = card_column(cards_data, "avg_response_time_seconds", np.nan)
+    timed = ~np.isnan(response_times)
+    if timed.any():
+        # A card's average stands for all of its answered reviews, so busier cards weigh more
+        weights = card_column(cards_data, "answered_reviews")[timed]
+        mean = np.average(response_times[timed], weights=weights) if weights.sum() else response_times[timed].mean()
+        summary["avg_response_time_days"] = round(float(mean) / SECONDS_PER_DAY, 2)
+
+    summary["total_reviews_count"] = int(card_column(cards_data, "total_reviews").sum())
+    summary["answered_reviews_count"] = int(card_column(cards_data, "answered_reviews").sum())
+    summary["unanswered_reviews_count"] = int(card_column(cards_data, "unanswered_reviews").sum())
+    summary["negative_reviews_count"] = int(card_column(cards_data, "negative_reviews").sum())
+    summary["positive_reviews_count"] = int(card_column(cards_data, "positive_reviews").sum())
+
+    # Per-review statistics cover the reviews parsed in this run; incremental runs carry only new ones
+    columns = ReviewColumns.from_cards(cards_data)
+    summary["review_stats"] = review_stats(columns)
+    summary["card_stats"] = [{"url": card.get("url"), **stats}
+                             for card, stats in zip(cards_data, grouped_stats(columns, columns.card_index, total_cards))]
+
+    return summary
+
+
+def review_stats(columns: ReviewColumns, trend_bucket_days: int = 30) -> dict:
+    total = len(columns)
+    answered = columns.answered
+    rated = ~np.isnan(columns.rating)
+    response_seconds = columns.response_seconds
+
+    stats = {
+        "reviews": total,
+        "answered": int(answered.sum()),
+        "unanswered": int(total - answered.sum()),
+        "mean_rating": round(float(columns.rating[rated].mean()), 2) if rated.any() else None,
+        "negative": int((columns.rating[rated] <= NEGATIVE_RATING_THRESHOLD).sum()),
+        "positive": int((columns.rating[rated] > NEGATIVE_RATING_THRESHOLD).sum()),
+        "rating_histogram": {},
+        "response_time_days": None,
+        "trend": [],
+    }
+
+    if rated.any():
+        stars = np.clip(np.rint(columns.rating[rated]).astype(np.int64), 1, 5)
+        counts = np.bincount(stars, minlength=6)[1:]
+        stats["rating_histogram"] = {star: int(count) for star, count in zip(range(1, 6), counts)}
+
+    if response_seconds.size:
+        p50, p90, p99 = np.percentile(response_seconds, [50, 90, 99]) / SECONDS_PER_DAY
+        stats["response_time_days"] = {
+            "mean": round(float(response_seconds.mean()) / SECONDS_PER_DAY, 2),
+            "p50": round(float(p50), 2),
+            "p90": round(float(p90), 2),
+            "p99": round(float(p99), 2),
+        }
+
+    dated = ~np.isnan(columns.review_ts)
+    if dated.any():
+        bucket_seconds = trend_bucket_days * SECONDS_PER_DAY
+        buckets = (columns.review_ts[dated] // bucket_seconds).astype(np.int64)
+        first = buckets.min()
+        offsets = buckets - first
+        counts = np.bincount(offsets)
+        rating_values = np.where(rated[dated], columns.rating[dated], 0.0)
+        rating_sums = np.bincount(offsets, weights=rating_values)
+        rating_counts = np.bincount(offsets, weights=rated[dated].astype(np.float64))
+        answered_counts = np.bincount(offsets, weights=answered[dated].astype(np.float64))
+        for offset in np.flatnonzero(counts):
+            stats["trend"].append({
+                "start": datetime.fromtimestamp(int((first + offset) * bucket_seconds)).date().isoformat(),
+                "reviews": int(counts[offset]),
+                "mean_rating": (round(float(rating_sums[offset] / rating_counts[offset]), 2)
+                                if rating_counts[offset] else None),
+                "answered_share": round(float(answered_counts[offset] / counts[offset]), 3),
+            })
+
+    return stats
+
+
+def grouped_stats(columns: ReviewColumns, group_index: np.ndarray, group_count: int) -> list[dict]:
+    rated = ~np.isnan(columns.rating)
+    reviews = np.bincount(group_index, minlength=group_count)
+    answered = np.bincount(group_index, weights=columns.answered.astype(np.float64), minlength=group_count)
+    rating_sums = np.bincount(group_index, weights=np.where(rated, columns.rating, 0.0), minlength=group_count)
+    rating_counts = np.bincount(group_index, weights=rated.astype(np.float64), minlength=group_count)
+
+    valid = np.isfinite(columns.response_ts) & ~np.isnan(columns.review_ts)
+    response_sums = np.bincount(group_index[valid], weights=columns.response_ts[valid] - columns.review_ts[valid],
+                                minlength=group_count)
+    response_counts = np.bincount(group_index[valid], minlength=group_count)
+
+    result = []
+    for i in range(group_count):
+        result.append({
+            "reviews": int(reviews[i]),
+            "answered": int(answered[i]),
+            "mean_rating": round(float(rating_sums[i] / rating_counts[i]), 2) if rating_counts[i] else None,
+            "avg_response_time_days": (round(float(response_sums[i] / response_counts[i]) / SECONDS_PER_DAY, 2)
+                                       if response_counts[i] else None),
+        })
+    return result
@@ -0,0 +1,223 @@
+import os
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from .aggregation import ReviewColumns
+from .db import Database
+from .records import Card
+
+FILE_SCHEMA = pa.schema([
+    ("company", pa.string()),
+    ("company_site", pa.string()),
+    ("card_url", pa.string()),
+    ("review_key", pa.string()),
+    ("rating", pa.float32()),
+    ("review_ts", pa.timestamp("s")),
+    ("response_ts", pa.timestamp("s")),
+    ("answered", pa.bool_()),
+    ("text", pa.string()),
+    ("response_text", pa.string()),
+    ("archived_at", pa.timestamp("s")),
+])
+PARTITION_SCHEMA = pa.schema([("platform", pa.string()), ("month", pa.string())])
+SCHEMA = pa.unify_schemas([FILE_SCHEMA, PARTITION_SCHEMA])
+# Dictionary-encoded in the Parquet pages only: an Arrow dictionary type would switch off row-group pruning
+DICTIONARY_COLUMNS = ["company", "company_site", "card_url"]
+SORT_KEYS = [("company", "ascending"), ("card_url", "ascending"), ("review_ts", "ascending")]
+UNKNOWN_MONTH = "unknown"
+
+
+def _epoch(value: datetime | None) -> int | None:
+    return int(value.timestamp()) if value is not None else None
+
+
+def _month(value: datetime) -> str:
+    # Partitions follow UTC months so the writer and the reader's pruning agree
+    return datetime.fromtimestamp(value.timestamp(), tz=timezone.utc).strftime("%Y-%m")
+
+
+class ReviewArchive:
+    def __init__(self, root: str = "archive", row_group_size: int = 65536, compression: str = "zstd"):
+        self.root = root
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.partitioning = ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+    def append_platform_result(self, company_name: str, company_site: str, result: dict) -> int:
+        if "error" in result:
+            return 0
+        return self.append_cards(company_name, company_site, result.get("platform", ""),
+                                 result.get("cards_details", []))
+
+    def append_cards(self, company_name: str, company_site: str, platform: str, cards) -> int:
+        columns = {name: [] for name in FILE_SCHEMA.names}
+        archived_at = int(datetime.now().timestamp())
+        for card in cards:
+            if isinstance(card, Card):
+                card = card.to_dict()
+            if card.get("unchanged_since") is not None:
+                # The reviews went into the archive when the card last changed
+                continue
+            for review in card.get("reviews", []):
+                response = review.get("response") or {}
+                columns["company"].append(company_name)
+                columns["company_site"].append(company_site)
+                columns["card_url"].append(card.get("url"))
+                columns["review_key"].append(Database.review_key(review))
+                columns["rating"].append(review.get("rating"))
+                columns["review_ts"].append(_epoch(review.get("date")))
+                columns["response_ts"].append(_epoch(response.get("date")))
+                columns["answered"].append(bool(review.get("response")))
+                columns["text"].append(review.get("text"))
+                columns["response_text"].append(response.get("text"))
+                columns["archived_at"].append(archived_at)
+        if not columns["review_key"]:
+            return 0
+        return self.append_table(platform, pa.table(columns, schema=FILE_SCHEMA))
+
+    def append_table(self, platform: str, table: pa.Table) -> int:
+        table = table.select(FILE_SCHEMA.names).cast(FILE_SCHEMA)
+        months = pc.fill_null(pc.strftime(table["review_ts"], format="%Y-%m"), UNKNOWN_MONTH)
+        for month in pc.unique(months).to_pylist():
+            self._write_partition(platform, month, table.filter(pc.equal(months, month)))
+        return table.num_rows
+
+    def _partition_dir(self, platform: str, month: str) -> str:
+        return os.path.join(self.root, f"platform={platform}", f"month={month}")
+
+    def _write_partition(self, platform: str, month: str, table: pa.Table) -> str:
+        directory = self._partition_dir(platform, month)
+        os.makedirs(directory, exist_ok=True)
+        name = f"part-{uuid.uuid4().hex}.parquet"
+        # Dot-prefixed files are invisible to dataset discovery until the rename
+        temp_path = os.path.join(directory, f".{name}")
+        pq.write_table(table.sort_by(SORT_KEYS), temp_path, row_group_size=self.row_group_size,
+                       compression=self.compression, use_dictionary=DICTIONARY_COLUMNS, write_statistics=True)
+        path = os.path.join(directory, name)
+        os.replace(temp_path, path)
+        return path
+
+    def dataset(self) -> ds.Dataset:
+        if not os.path.isdir(self.root):
+            return ds.dataset(pa.table({name: [] for name in SCHEMA.names}, schema=SCHEMA))
+        return ds.dataset(self.root, schema=SCHEMA, format="parquet", partitioning=self.partitioning,
+                          filesystem=pafs.LocalFileSystem(use_mmap=True))
+
+    @staticmethod
+    def _filter(company: str | None = None, company_site: str | None = None, platform: str | None = None,
+                since: datetime | None = None, until: datetime | None = None, min_rating: float | None = None,
+                max_rating: float | None = None):
+        conditions = []
+        if platform is not None:
+            conditions.append(ds.field("platform") == platform)
+        if company is not None:
+            conditions.append(ds.field("company") == company)
+        if company_site is not None:
+            conditions.append(ds.field("company_site") == company_site)
+        if since is not None:
+            conditions.append(ds.field("month") >= _month(since))
+            conditions.append(ds.field("review_ts") >= pa.scalar(_epoch(since), pa.timestamp("s")))
+        if until is not None:
+            conditions.append(ds.field("month") <= _month(until))
+            conditions.append(ds.field("review_ts") < pa.scalar(_epoch(until), pa.timestamp("s")))
+        if min_rating is not None:
+            conditions.append(ds.field("rating") >= min_rating)
+        if max_rating is not None:
+            conditions.append(ds.field("rating") <= max_rating)
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def scan(self, columns: list[str] | None = None, **filters) -> pa.Table:
+        # Unchanged reviews are archived again on every run; readers see only the latest copy. Rating filters
+        # apply after that, so an edited rating is not matched through one of its older copies
+        rating_filters = {name: filters.pop(name) for name in ("min_rating", "max_rating") if name in filters}
+        read_columns = None
+        if columns is not None:
+            read_columns = list(dict.fromkeys(columns + ["card_url", "review_key", "rating", "archived_at"]))
+        table = self._latest_copies(self.dataset().to_table(columns=read_columns, filter=self._filter(**filters)))
+        rating_filter = self._filter(**rating_filters)
+        if rating_filter is not None:
+            table = table.filter(rating_filter)
+        return table if columns is None else table.select(columns)
+
+    def review_columns(self, **filters) -> tuple[ReviewColumns, list[str]]:
+        table = self.scan(["card_url", "rating", "review_ts", "response_ts", "answered"], **filters)
+        if table.num_rows == 0:
+            return ReviewColumns.empty(), []
+
+        cards = pc.dictionary_encode(table["card_url"].combine_chunks())
+        rating = self._float_column(table["rating"])
+        review_ts = self._float_column(table["review_ts"])
+        response_ts = self._float_column(table["response_ts"])
+        answered = table["answered"].to_numpy()
+        # Same convention as ReviewColumns.from_reviews: answered without a parsed date
+        response_ts = np.where(answered & np.isnan(response_ts), -np.inf, response_ts)
+        columns = ReviewColumns(rating, review_ts, response_ts, cards.indices.to_numpy().astype(np.int32))
+        return columns, cards.dictionary.to_pylist()
+
+    @staticmethod
+    def _float_column(column: pa.ChunkedArray) -> np.ndarray:
+        if pa.types.is_timestamp(column.type):
+            column = pc.cast(column, pa.int64())
+        column = pc.fill_null(pc.cast(column, pa.float64()), np.nan)
+        return column.to_numpy()
+
+    def compact(self, platform: str | None = None, month: str | None = None) -> int:
+        # Merges each partition into one sorted file, keeping the latest copy of re-archived reviews
+        removed = 0
+        for directory in self._partitions(platform, month):
+            paths = [os.path.join(directory, name) for name in os.listdir(directory)
+                     if name.endswith(".parquet") and not name.startswith(".")]
+            if len(paths) < 2:
+                continue
+            table = ds.dataset(paths, schema=FILE_SCHEMA, format="parquet").to_table()
+            unique = self._latest_copies(table)
+            removed += table.num_rows - unique.num_rows
+            self._write_partition(*self._partition_key(directory), unique)
+            for path in paths:
+                os.remove(path)
+        return removed
+
+    def _partitions(self, platform: str | None, month: str | None) -> list[str]:
+        if not os.path.isdir(self.root):
+            return []
+        if platform:
+            platforms = [f"platform={platform}"]
+        else:
+            platforms = sorted(name for name in os.listdir(self.root) if name.startswith("platform="))
+        directories = []
+        for platform_dir in platforms:
+            platform_path = os.path.join(self.root, platform_dir)
+            if not os.path.isdir(platform_path):
+                continue
+            months = [f"month={month}"] if month else sorted(os.listdir(platform_path))
+            directories.extend(os.path.join(platform_path, name) for name in months
+                               if os.path.isdir(os.path.join(platform_path, name)))
+        return directories
+
+    @staticmethod
+    def _partition_key(directory: str) -> tuple[str, str]:
+        platform_dir, month_dir = os.path.normpath(directory).split(os.sep)[-2:]
+        return platform_dir.split("=", 1)[1], month_dir.split("=", 1)[1]
+
+    @staticmethod
+    def _latest_copies(table: pa.Table) -> pa.Table:
+        if table.num_rows < 2:
+            return table
+        table = table.sort_by([("card_url", "ascending"), ("review_key", "ascending"), ("archived_at", "descending")])
+        cards = table["card_url"].combine_chunks()
+        keys = table["review_key"].combine_chunks()
+        first = np.ones(table.num_rows, dtype=bool)
+        same = (pc.equal(cards[1:], cards[:-1]).to_numpy(zero_copy_only=False) &
+                pc.equal(keys[1:], keys[:-1]).to_numpy(zero_copy_only=False))
+        first[1:] = ~same
+        return table.filter(pa.array(first))
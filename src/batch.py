@@ -0,0 +1,167 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import time
+import traceback
+
+from .archive import ReviewArchive
+from .db import Database
+from .job_queue import JobQueue, PriorityBoard, DONE
+from .metrics import Metrics
+from .orchestrator import PLATFORMS as PLATFORM_PARSERS, BROWSER
+from .page_cache import PageCache
+from .scheduler import BATCH, RequestScheduler
+from .scraper import DriverPool, setup_driver
+
+PLATFORMS = tuple(PLATFORM_PARSERS)
+STAGE = "analyze"
+
+
+def read_companies(filepath: str) -> list[tuple[str, str]]:
+    companies = []
+    with open(filepath, "r", encoding="utf-8-sig") as f:
+        if filepath.endswith(".jsonl"):
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    companies.append((record["name"], record["site"]))
+        else:
+            for record in csv.DictReader(f):
+                companies.append((record["name"], record["site"]))
+    return companies
+
+
+def _run_task(task: dict, pool, db, cache, force: bool = False, archive: ReviewArchive | None = None) -> dict:
+    if task["platform"] not in PLATFORM_PARSERS:
+        raise ValueError(f"Unknown platform: {task['platform']}")
+    kind, factory = PLATFORM_PARSERS[task["platform"]]
+    if kind == BROWSER:
+        with pool.lease() as session, \
+                factory(task["company_name"], task["company_site"], session, cache, db, True, force, BATCH) as parser:
+            result = parser.analyze_platform_data()
+    else:
+        with factory(task["company_name"], task["company_site"], None, cache, db, True, force, BATCH) as parser:
+            result = parser.analyze_platform_data(max_workers=5)
+
+    if "error" not in result:
+        db.save_platform_result(task["company_name"], task["company_site"], result)
+        if archive is not None:
+            archive.append_platform_result(task["company_name"], task["company_site"], result)
+    return result
+
+
+def _export_metrics(metrics_dir: str, worker_name: str):
+    os.makedirs(metrics_dir, exist_ok=True)
+    Metrics.shared().write_prometheus(os.path.join(metrics_dir, f"{worker_name}.prom"))
+    Metrics.shared().write_profile(os.path.join(metrics_dir, f"{worker_name}.json"))
+
+
+def worker_main(queue_path: str, db_path: str, worker_name: str, metrics_dir: str = "metrics", force: bool = False,
+                workers: int = 1, archive_dir: str | None = None):
+    # Each worker process paces its own requests, so the per-host budget is split between them
+    RequestScheduler.shared().scale(1 / workers)
+    RequestScheduler.shared().share_priorities(PriorityBoard(queue_path))
+    queue = JobQueue(queue_path)
+    db = Database(db_path)
+    cache = PageCache()
+    archive = ReviewArchive(archive_dir) if archive_dir else None
+    pool = DriverPool(setup_driver, size=1)
+    try:
+        while True:
+            task = queue.claim(worker_name)
+            if task is None:
+                if not queue.has_open_tasks():
+                    break
+                time.sleep(2)
+                continue
+
+            label = f"{task['company_name']} / {task['platform']}"
+            try:
+                with queue.heartbeat(task["id"], worker_name):
+                    result = _run_task(task, pool, db, cache, force, archive)
+                if "error" in result:
+                    queue.fail(task["id"], result["error"])
+                    print(f"[{worker_name}] {label}: {result['error']} "
+                          f"(попытка {task['attempts']}/{task['max_attempts']})")
+                else:
+                    queue.complete(task["id"])
+                    print(f"[{worker_name}] {label}: ok")
+            except Exception as e:
+                queue.fail(task["id"], f"{e!r}\n{traceback.format_exc()}")
+                print(f"[{worker_name}] {label}: ошибка (попытка {task['attempts']}/{task['max_attempts']}): {e}")
+            _export_metrics(metrics_dir, worker_name)
+    finally:
+        _export_metrics(metrics_dir, worker_name)
+        pool.close()
+        db.close()
+        queue.close()
+
+
+def run_batch(companies_path: str | None, queue_path: str = "jobs.db", db_path: str = "company_parser.db",
+              workers: int = 2, platforms=PLATFORMS, max_attempts: int = 3, report_every: float = 30,
+              metrics_dir: str = "metrics", force: bool = False, archive_dir: str | None = None):
+    queue = JobQueue(queue_path, max_attempts=max_attempts)
+    if companies_path:
+        companies = read_companies(companies_path)
+        added = queue.enqueue((name, site, platform, STAGE) for name, site in companies for platform in platforms)
+        print(f"Добавлено задач: {added} (компаний в файле: {len(companies)})")
+
+    done_before = queue.counts().get(DONE, 0)
+    started = time.monotonic()
+    processes = [
+        multiprocessing.Process(target=worker_main, daemon=False,
+                                args=(queue_path, db_path, f"worker-{i}", metrics_dir, force, workers, archive_dir))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        while any(process.is_alive() for process in processes):
+            for process in processes:
+                process.join(timeout=report_every / len(processes))
+            _report_progress(queue, done_before, started, len(platforms))
+    finally:
+        for process in processes:
+            process.join()
+
+    _report_progress(queue, done_before, started, len(platforms))
+    for task in queue.dead_letters():
+        first_line = (task["last_error"] or "").split("\n", 1)[0]
+        print(f"Не обработано после {task['attempts']} попыток: {task['company_name']} / {task['platform']}: "
+              f"{first_line}")
+    queue.close()
+
+
+def _report_progress(queue: JobQueue, done_before: int, started: float, tasks_per_company: int):
+    counts = queue.counts()
+    done = counts.get(DONE, 0) - done_before
+    minutes = max((time.monotonic() - started) / 60, 1e-9)
+    print(f"Прогресс: {counts} | {done / tasks_per_company / minutes:.2f} компаний/мин")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетный анализ компаний на 2GIS и Яндекс.Картах")
+    parser.add_argument("companies", nargs="?",
+                        help="CSV (name,site) или JSONL с компаниями; без файла — продолжить очередь")
+    parser.add_argument("--queue", default="jobs.db")
+    parser.add_argument("--db", default="company_parser.db")
+    parser.add_argument("--workers", type=int, default=max(1, min(4, os.cpu_count() or 1)))
+    parser.add_argument("--platforms", nargs="+", choices=PLATFORMS, default=list(PLATFORMS))
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--metrics-dir", default="metrics",
+                        help="каталог для Prometheus textfile и JSON-профилей воркеров")
+    parser.add_argument("--archive", help="каталог Parquet-архива отзывов (по платформам и месяцам)")
+    parser.add_argument("--force", action="store_true",
+                        help="разбирать все карточки заново, даже если рейтинг и число отзывов не изменились")
+    args = parser.parse_args()
+
+    run_batch(args.companies, args.queue, args.db, args.workers, args.platforms, args.max_attempts,
+              metrics_dir=args.metrics_dir, force=args.force, archive_dir=args.archive)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from itertools import islice
+
+from .records import Card
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    site TEXT NOT NULL,
+    UNIQUE (name, site)
+);
+
+CREATE TABLE IF NOT EXISTS cards (
+    id INTEGER PRIMARY KEY,
+    company_id INTEGER NOT NULL REFERENCES companies (id),
+    platform TEXT NOT NULL,
+    url TEXT NOT NULL,
+    rating REAL,
+    total_reviews INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL,
+    UNIQUE (platform, url)
+);
+CREATE INDEX IF NOT EXISTS idx_cards_company_platform ON cards (company_id, platform);
+
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    card_id INTEGER NOT NULL REFERENCES cards (id),
+    review_key TEXT NOT NULL,
+    rating REAL,
+    text TEXT,
+    review_date TEXT,
+    UNIQUE (card_id, review_key)
+);
+CREATE INDEX IF NOT EXISTS idx_reviews_card_date ON reviews (card_id, review_date);
+
+CREATE TABLE IF NOT EXISTS responses (
+    review_id INTEGER PRIMARY KEY REFERENCES reviews (id),
+    text TEXT,
+    response_date TEXT
+);
+
+CREATE TABLE IF NOT EXISTS card_sync (
+    platform TEXT NOT NULL,
+    card_url TEXT NOT NULL,
+    last_review_id TEXT,
+    last_review_date TEXT,
+    answered_reviews INTEGER NOT NULL DEFAULT 0,
+    unanswered_reviews INTEGER NOT NULL DEFAULT 0,
+    negative_reviews INTEGER NOT NULL DEFAULT 0,
+    positive_reviews INTEGER NOT NULL DEFAULT 0,
+    response_time_sum REAL NOT NULL DEFAULT 0,
+    response_time_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (platform, card_url)
+);
+
+CREATE TABLE IF NOT EXISTS card_fingerprints (
+    platform TEXT NOT NULL,
+    card_url TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    incremental INTEGER NOT NULL DEFAULT 0,
+    card_data BLOB NOT NULL,
+    changed_at TEXT NOT NULL,
+    checked_at TEXT NOT NULL,
+    PRIMARY KEY (platform, card_url)
+);
+"""
+
+REVIEW_UPSERT = """
+INSERT INTO reviews (card_id, review_key, rating, text, review_date)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (card_id, review_key) DO UPDATE SET
+    rating = excluded.rating,
+    text = excluded.text,
+    review_date = excluded.review_date
+"""
+
+RESPONSE_UPSERT = """
+INSERT INTO responses (review_id, text, response_date)
+SELECT id, ?, ? FROM reviews WHERE card_id = ? AND review_key = ?
+ON CONFLICT (review_id) DO UPDATE SET
+    text = excluded.text,
+    response_date = excluded.response_date
+"""
+
+SYNC_COUNTERS = (
+    "answered_reviews",
+    "unanswered_reviews",
+    "negative_reviews",
+    "positive_reviews",
+    "response_time_sum",
+    "response_time_count",
+)
+
+
+def _encode_card(card_data: dict) -> bytes:
+    text = json.dumps(card_data, ensure_ascii=False, default=lambda value: value.isoformat())
+    return zlib.compress(text.encode("utf-8"), 1)
+
+
+def _decode_card(blob: bytes) -> dict:
+    card_data = json.loads(zlib.decompress(blob).decode("utf-8"))
+    for review in card_data.get("reviews", []):
+        if review.get("date"):
+            review["date"] = datetime.fromisoformat(review["date"])
+        response = review.get("response")
+        if response and response.get("date"):
+            response["date"] = datetime.fromisoformat(response["date"])
+    return card_data
+
+
+class Database:
+    def __init__(self, path: str = "company_parser.db", batch_size: int = 1000):
+        self.path = path
+        self.batch_size = batch_size
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA foreign_keys = ON")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def get_card_sync(self, platform: str, card_url: str) -> dict | None:
+        row = self._connection().execute(
+            "SELECT * FROM card_sync WHERE platform = ? AND card_url = ?", (platform, card_url)
+        ).fetchone()
+        if row is None:
+            return None
+        sync = dict(row)
+        if sync["last_review_date"]:
+            sync["last_review_date"] = datetime.fromisoformat(sync["last_review_date"])
+        return sync
+
+    def save_card_sync(self, platform: str, card_url: str, last_review_id: str | None,
+                       last_review_date: datetime | None, counters: dict):
+        values = [counters.get(name, 0) for name in SYNC_COUNTERS]
+        with self._connection() as conn:
+            conn.execute(
+                f"""
+                INSERT INTO card_sync (platform, card_url, last_review_id, last_review_date,
+                                       {", ".join(SYNC_COUNTERS)}, updated_at)
+                VALUES (?, ?, ?, ?, {", ".join("?" for _ in SYNC_COUNTERS)}, ?)
+                ON CONFLICT (platform, card_url) DO UPDATE SET
+                    last_review_id = excluded.last_review_id,
+                    last_review_date = excluded.last_review_date,
+                    {", ".join(f"{name} = excluded.{name}" for name in SYNC_COUNTERS)},
+                    updated_at = excluded.updated_at
+                """,
+                (platform, card_url, last_review_id,
+                 last_review_date.isoformat() if last_review_date else None,
+                 *values, datetime.now().isoformat()),
+            )
+
+    def get_card_fingerprint(self, platform: str, card_url: str, fingerprint: str) -> dict | None:
+        # Only a matching fingerprint loads the stored card; a hit also records when the card was last checked
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM card_fingerprints WHERE platform = ? AND card_url = ? AND fingerprint = ?",
+                (platform, card_url, fingerprint),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE card_fingerprints SET checked_at = ? WHERE platform = ? AND card_url = ?",
+                         (datetime.now().isoformat(), platform, card_url))
+        stored = dict(row)
+        stored["incremental"] = bool(stored["incremental"])
+        stored["card_data"] = _decode_card(stored["card_data"])
+        stored["changed_at"] = datetime.fromisoformat(stored["changed_at"])
+        return stored
+
+    def save_card_fingerprint(self, platform: str, card_url: str, fingerprint: str, card_data: dict,
+                              incremental: bool = False):
+        now = datetime.now().isoformat()
+        with self._connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO card_fingerprints (platform, card_url, fingerprint, incremental, card_data,
+                                               changed_at, checked_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (platform, card_url) DO UPDATE SET
+                    changed_at = CASE WHEN card_fingerprints.fingerprint = excluded.fingerprint
+                                      THEN card_fingerprints.changed_at ELSE excluded.changed_at END,
+                    fingerprint = excluded.fingerprint,
+                    incremental = excluded.incremental,
+                    card_data = excluded.card_data,
+                    checked_at = excluded.checked_at
+                """,
+                (platform, card_url, fingerprint, int(incremental), _encode_card(card_data), now, now),
+            )
+
+    def upsert_company(self, name: str, site: str) -> int:
+        with self._connection() as conn:
+            conn.execute("INSERT INTO companies (name, site) VALUES (?, ?) ON CONFLICT (name, site) DO NOTHING",
+                         (name, site))
+            return conn.execute("SELECT id FROM companies WHERE name = ? AND site = ?", (name, site)).fetchone()[0]
+
+    def upsert_card(self, company_id: int, platform: str, card: dict) -> int:
+        with self._connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO cards (company_id, platform, url, rating, total_reviews, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (platform, url) DO UPDATE SET
+                    company_id = excluded.company_id,
+                    rating = excluded.rating,
+                    total_reviews = excluded.total_reviews,
+                    updated_at = excluded.updated_at
+                """,
+                (company_id, platform, card["url"], card.get("rating"), card.get("total_reviews", 0),
+                 datetime.now().isoformat()),
+            )
+            return conn.execute("SELECT id FROM cards WHERE platform = ? AND url = ?",
+                                (platform, card["url"])).fetchone()[0]
+
+    @staticmethod
+    def review_key(review: dict) -> str:
+        if review.get("id"):
+            return str(review["id"])
+        date = review.get("date")
+        raw = f"{date.isoformat() if date else ''}|{review.get('text') or ''}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def save_reviews(self, card_id: int, reviews) -> int:
+        saved = 0
+        reviews = iter(reviews)
+        while True:
+            batch = list(islice(reviews, self.batch_size))
+            if not batch:
+                break
+
+            review_rows = []
+            response_rows = []
+            for review in batch:
+                key = self.review_key(review)
+                date = review.get("date")
+                review_rows.append((card_id, key, review.get("rating"), review.get("text"),
+                                    date.isoformat() if date else None))
+                response = review.get("response")
+                if response:
+                    response_date = response.get("date")
+                    response_rows.append((response.get("text"),
+                                          response_date.isoformat() if response_date else None,
+                                          card_id, key))
+
+            with self._connection() as conn:
+                conn.executemany(REVIEW_UPSERT, review_rows)
+                if response_rows:
+                    conn.executemany(RESPONSE_UPSERT, response_rows)
+            saved += len(batch)
+        return saved
+
+    def save_platform_result(self, company_name: str, company_site: str, result: dict) -> int | None:
+        if "error" in result:
+            return None
+        company_id = self.upsert_company(company_name, company_site)
+        platform = result.get("platform", "")
+        for card in result.get("cards_details", []):
+            if isinstance(card, Card):
+                card = card.to_dict()
+            card_id = self.upsert_card(company_id, platform, card)
+            if card.get("unchanged_since") is None:
+                self.save_reviews(card_id, card.get("reviews", []))
+        return company_id
+
+    def iter_reviews(self, card_id: int, since: datetime | None = None):
+        query = """
+            SELECT r.review_key, r.rating, r.text, r.review_date, p.text AS response_text, p.response_date
+            FROM reviews r LEFT JOIN responses p ON p.review_id = r.id
+            WHERE r.card_id = ?
+        """
+        params = [card_id]
+        if since is not None:
+            query += " AND r.review_date >= ?"
+            params.append(since.isoformat())
+        query += " ORDER BY r.review_date DESC"
+
+        cursor = self._connection().execute(query, params)
+        while True:
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
+
+    def company_cards(self, company_name: str, company_site: str, platform: str) -> list[dict]:
+        rows = self._connection().execute(
+            """
+            SELECT c.* FROM cards c JOIN companies co ON co.id = c.company_id
+            WHERE co.name = ? AND co.site = ? AND c.platform = ?
+            """,
+            (company_name, company_site, platform),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def card_summaries(self, company_name: str, company_site: str, platform: str) -> list[dict]:
+        rows = self._connection().execute(
+            """
+            SELECT c.id, c.url, c.rating, c.total_reviews,
+                   COUNT(r.id) AS stored_reviews,
+                   COALESCE(SUM(p.review_id IS NOT NULL), 0) AS answered_reviews,
+                   COALESCE(SUM(r.rating <= 3), 0) AS negative_reviews,
+                   COALESCE(SUM(r.rating > 3), 0) AS positive_reviews,
+                   AVG((julianday(p.response_date) - julianday(r.review_date)) * 86400) AS avg_response_time_seconds
+            FROM cards c
+            JOIN companies co ON co.id = c.company_id
+            LEFT JOIN reviews r ON r.card_id = c.id
+            LEFT JOIN responses p ON p.review_id = r.id
+            WHERE co.name = ? AND co.site = ? AND c.platform = ?
+            GROUP BY c.id
+            ORDER BY c.id
+            """,
+            (company_name, company_site, platform),
+        ).fetchall()
+        cards = []
+        for row in rows:
+            card = dict(row)
+            card["unanswered_reviews"] = card.pop("stored_reviews") - card["answered_reviews"]
+            cards.append(card)
+        return cards
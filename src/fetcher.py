@@ -0,0 +1,218 @@
+import asyncio
+import random
+import threading
+import time
+
+import httpx
+
+from .metrics import Metrics
+from .page_cache import PageCache, CacheMiss
+from .proxy_manager import ProxyManager
+from .scheduler import INTERACTIVE, RequestScheduler, parse_retry_after
+
+
+class FetchEngine:
+    def __init__(self, headers_factory=None, proxy_manager: ProxyManager | None = None, timeout: float = 20,
+                 retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8,
+                 max_connections_per_proxy: int = 10, http2: bool = True, cache: PageCache | None = None,
+                 platform: str = "", metrics: Metrics | None = None, scheduler: RequestScheduler | None = None,
+                 priority: int = INTERACTIVE):
+        self.headers_factory = headers_factory
+        self.proxy_manager = proxy_manager
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_connections_per_proxy = max_connections_per_proxy
+        self.http2 = http2 and self._http2_available()
+        self.cache = cache
+        self.platform = platform
+        self.metrics = metrics or Metrics.shared()
+        self.scheduler = scheduler or RequestScheduler.shared()
+        self.priority = priority
+        self._clients: dict[str | None, httpx.AsyncClient] = {}
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def _http2_available() -> bool:
+        try:
+            import h2
+            return True
+        except ImportError:
+            return False
+
+    def _client_for(self, proxy: str | None) -> httpx.AsyncClient:
+        client = self._clients.get(proxy)
+        if client is None:
+            limits = httpx.Limits(max_connections=self.max_connections_per_proxy,
+                                  max_keepalive_connections=self.max_connections_per_proxy)
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                proxy=f"http://{proxy}" if proxy else None,
+                limits=limits,
+                timeout=self.timeout,
+                follow_redirects=True,
+            )
+            self._clients[proxy] = client
+        return client
+
+    def _backoff_delay(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, delay)
+
+    async def fetch_async(self, url: str, validator=None, page_type: str = "page") -> str | None:
+        cached = None
+        if self.cache is not None:
+            cached = self.cache.lookup(self.platform, page_type, url)
+            if cached is not None and (cached.fresh or self.cache.replay):
+                self.metrics.inc("cache_hits_total", platform=self.platform, page_type=page_type)
+                return cached.body
+            self.metrics.inc("cache_misses_total", platform=self.platform, page_type=page_type)
+            if self.cache.replay:
+                raise CacheMiss(url)
+
+        for attempt in range(self.retries):
+            if attempt:
+                self.metrics.inc("http_retries_total", platform=self.platform)
+            proxy = None
+            if self.proxy_manager is not None and len(self.proxy_manager):
+                proxy = await self.proxy_manager.acquire_async(timeout=self.timeout)
+                if proxy is None:
+                    self.metrics.inc("proxy_unavailable_total", platform=self.platform)
+                    print(f"Нет доступных прокси для запроса {url} (попытка {attempt + 1}/{self.retries})")
+                    continue
+            ticket = await self.scheduler.acquire_async(url, proxy, self.priority, timeout=self.timeout)
+            if ticket is None:
+                print(f"Не дождался очереди запроса {url} (попытка {attempt + 1}/{self.retries})")
+                if proxy is not None:
+                    self.proxy_manager.release(proxy)
+                continue
+            headers = dict(self.headers_factory(proxy)) if self.headers_factory else {}
+            if cached is not None:
+                if cached.etag:
+                    headers["If-None-Match"] = cached.etag
+                if cached.last_modified:
+                    headers["If-Modified-Since"] = cached.last_modified
+
+            throttled, retry_after = None, None
+            try:
+                started = time.monotonic()
+                response = await self._client_for(proxy).get(url, headers=headers)
+                text = response.text
+                self.metrics.observe("http_request_seconds", time.monotonic() - started, platform=self.platform,
+                                     page_type=page_type)
+                self.metrics.inc("http_requests_total", platform=self.platform, status=response.status_code)
+
+                throttled = ProxyManager.is_ban_response(response.status_code, text)
+                if throttled:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+                if response.status_code == 304 and cached is not None:
+                    self.metrics.inc("cache_revalidated_total", platform=self.platform, page_type=page_type)
+                    self._report(proxy, ok=True, latency=time.monotonic() - started)
+                    self.cache.refresh(self.platform, page_type, url)
+                    return cached.body
+
+                if throttled:
+                    print(f"Похоже на блокировку при запросе {url} через {proxy}: HTTP {response.status_code}")
+                    self._report(proxy, ok=False, banned=True)
+                else:
+                    response.raise_for_status()
+                    self._report(proxy, ok=True, latency=time.monotonic() - started)
+                    if validator is None or validator(text):
+                        if self.cache is not None:
+                            self.cache.put(self.platform, page_type, url, text,
+                                           etag=response.headers.get("ETag"),
+                                           last_modified=response.headers.get("Last-Modified"))
+                        return text
+            except httpx.HTTPError as e:
+                throttled = None
+                self.metrics.inc("http_errors_total", platform=self.platform, error=type(e).__name__)
+                print(f"Ошибка запроса {url} (попытка {attempt + 1}/{self.retries}): {e!r}")
+                self._report(proxy, ok=False)
+            finally:
+                self.scheduler.release(ticket, throttled, retry_after)
+                if proxy is not None:
+                    self.proxy_manager.release(proxy)
+
+            if attempt + 1 < self.retries:
+                await asyncio.sleep(self._backoff_delay(attempt))
+
+        return None
+
+    def _report(self, proxy: str | None, ok: bool, latency: float = 0.0, banned: bool = False):
+        if proxy is None:
+            return
+        if ok:
+            self.proxy_manager.report_success(proxy, latency)
+        else:
+            self.metrics.inc("proxy_failures_total", platform=self.platform, banned=banned)
+            self.proxy_manager.report_failure(proxy, banned=banned)
+
+    async def fetch_many_async(self, urls: list[str], validator=None, max_in_flight: int = 10,
+                               page_type: str = "page") -> list[str | None]:
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def run(url: str):
+            async with semaphore:
+                try:
+                    return await self.fetch_async(url, validator, page_type)
+                except CacheMiss:
+                    print(f"Нет страницы в кэше (режим replay): {url}")
+                    return None
+
+        return await asyncio.gather(*(run(url) for url in urls))
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="fetch-engine", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not None and running is self._loop:
+            raise RuntimeError("Synchronous FetchEngine calls are not allowed inside its own event loop")
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+    async def fetch_from_any_loop(self, url: str, validator=None, page_type: str = "page") -> str | None:
+        future = asyncio.run_coroutine_threadsafe(self.fetch_async(url, validator, page_type), self._ensure_loop())
+        return await asyncio.wrap_future(future)
+
+    def fetch(self, url: str, validator=None, page_type: str = "page") -> str | None:
+        return self.run(self.fetch_async(url, validator, page_type))
+
+    def fetch_many(self, urls: list[str], validator=None, max_in_flight: int = 10,
+                   page_type: str = "page") -> list[str | None]:
+        return self.run(self.fetch_many_async(urls, validator, max_in_flight, page_type))
+
+    async def _aclose_clients(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+    def close(self):
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._aclose_clients(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
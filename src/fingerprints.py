@@ -0,0 +1,136 @@
+import random
+import re
+import threading
+
+BUILTIN_USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36 "
+    "Edg/130.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:132.0) Gecko/20100101 Firefox/132.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:132.0) Gecko/20100101 Firefox/132.0",
+)
+ACCEPT_LANGUAGES = (
+    "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+    "ru-RU,ru;q=0.9",
+    "ru,en-US;q=0.9,en;q=0.8",
+    "ru-RU,ru;q=0.8,en-US;q=0.5,en;q=0.3",
+)
+ACCEPT_HTML = ("text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,"
+               "application/signed-exchange;v=b3;q=0.7")
+
+_CHROMIUM_RE = re.compile(r"Chrome/(\d+)\.")
+_EDGE_RE = re.compile(r"Edg/(\d+)\.")
+_PLATFORMS = (("Windows", "Windows"), ("Macintosh", "macOS"), ("CrOS", "Chrome OS"), ("Linux", "Linux"))
+
+
+class FingerprintProfile:
+    __slots__ = ("user_agent", "accept_language", "platform", "brands", "headers")
+
+    def __init__(self, user_agent: str, accept_language: str):
+        self.user_agent = user_agent
+        self.accept_language = accept_language
+        self.platform = next((name for token, name in _PLATFORMS if token in user_agent), "Windows")
+        self.brands = self._brands(user_agent)
+
+        headers = {
+            "User-Agent": user_agent,
+            "Accept": ACCEPT_HTML,
+            "Accept-Language": accept_language,
+            "Upgrade-Insecure-Requests": "1",
+            "Sec-Fetch-Dest": "document",
+            "Sec-Fetch-Mode": "navigate",
+            "Sec-Fetch-Site": "same-origin",
+            "Sec-Fetch-User": "?1",
+        }
+        if self.brands:
+            # Firefox does not send client hints, so only Chromium profiles get them
+            headers["sec-ch-ua"] = ", ".join(f'"{brand}";v="{version}"' for brand, version in self.brands)
+            headers["sec-ch-ua-mobile"] = "?0"
+            headers["sec-ch-ua-platform"] = f'"{self.platform}"'
+        self.headers = headers
+
+    @staticmethod
+    def _brands(user_agent: str) -> tuple:
+        chromium = _CHROMIUM_RE.search(user_agent)
+        if not chromium:
+            return ()
+        version = chromium.group(1)
+        edge = _EDGE_RE.search(user_agent)
+        vendor = ("Microsoft Edge", edge.group(1)) if edge else ("Google Chrome", version)
+        return (("Chromium", version), vendor, ("Not?A_Brand", "99"))
+
+    def cdp_override(self) -> dict:
+        override = {"userAgent": self.user_agent, "acceptLanguage": self.accept_language}
+        if self.brands:
+            override["userAgentMetadata"] = {
+                "brands": [{"brand": brand, "version": version} for brand, version in self.brands],
+                "fullVersion": f"{self.brands[0][1]}.0.0.0",
+                "platform": self.platform,
+                "platformVersion": "",
+                "architecture": "x86",
+                "model": "",
+                "mobile": False,
+            }
+        return override
+
+
+def load_user_agents(count: int) -> list[str]:
+    try:
+        from fake_useragent import UserAgent
+
+        ua = UserAgent()
+        agents = {ua.random for _ in range(count * 4)}
+        agents = [agent for agent in agents if "Mobile" not in agent and "Android" not in agent]
+    except Exception as e:
+        print(f"Не удалось загрузить базу User-Agent, используется встроенный список: {e!r}")
+        agents = []
+    return agents[:count] or list(BUILTIN_USER_AGENTS)
+
+
+class FingerprintPool:
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, size: int = 32, user_agents: list[str] | None = None, seed: int | None = None):
+        rng = random.Random(seed)
+        user_agents = user_agents or load_user_agents(size)
+        self.profiles = [
+            FingerprintProfile(user_agents[i % len(user_agents)], rng.choice(ACCEPT_LANGUAGES))
+            for i in range(max(size, 1))
+        ]
+        rng.shuffle(self.profiles)
+        # Browser sessions run Chrome, so they only get Chromium identities
+        self._chromium = [profile for profile in self.profiles if profile.brands] or self.profiles
+        self._assigned: dict[str, FingerprintProfile] = {}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "FingerprintPool":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def next(self, chromium: bool = False) -> FingerprintProfile:
+        profiles = self._chromium if chromium else self.profiles
+        with self._lock:
+            profile = profiles[self._next % len(profiles)]
+            self._next += 1
+            return profile
+
+    def for_key(self, key: str | None) -> FingerprintProfile:
+        # Sticky assignment: a proxy keeps one identity across its keep-alive connections
+        key = key or "direct"
+        profile = self._assigned.get(key)
+        if profile is None:
+            profile = self.next()
+            with self._lock:
+                profile = self._assigned.setdefault(key, profile)
+        return profile
@@ -0,0 +1,205 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    company_name TEXT NOT NULL,
+    company_site TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_until REAL,
+    worker TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (company_name, company_site, platform, stage)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, lease_until);
+CREATE TABLE IF NOT EXISTS interactive_waits (
+    id INTEGER PRIMARY KEY,
+    host TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+DEAD = "dead"
+
+
+class JobQueue:
+    def __init__(self, path: str = "jobs.db", lease_seconds: float = 15 * 60, max_attempts: int = 3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def enqueue(self, tasks) -> int:
+        now = time.time()
+        rows = [(name, site, platform, stage, self.max_attempts, now, now) for name, site, platform, stage in tasks]
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                """
+                INSERT INTO tasks (company_name, company_site, platform, stage, max_attempts, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (company_name, company_site, platform, stage) DO NOTHING
+                """,
+                rows,
+            )
+            added = self.conn.total_changes - before
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def claim(self, worker: str) -> dict | None:
+        now = time.time()
+        # Running tasks with an expired lease belong to a crashed worker and are picked up again
+        row = self.conn.execute(
+            """
+            UPDATE tasks SET status = ?, attempts = attempts + 1, lease_until = ?, worker = ?, updated_at = ?
+            WHERE id = (
+                SELECT id FROM tasks
+                WHERE (status = ? OR (status = ? AND lease_until < ?)) AND attempts < max_attempts
+                ORDER BY id LIMIT 1
+            )
+            RETURNING *
+            """,
+            (RUNNING, now + self.lease_seconds, worker, now, PENDING, RUNNING, now),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def extend(self, task_id: int, worker: str, conn: sqlite3.Connection | None = None) -> bool:
+        now = time.time()
+        cursor = (conn or self.conn).execute(
+            "UPDATE tasks SET lease_until = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+            (now + self.lease_seconds, now, task_id, worker, RUNNING),
+        )
+        return cursor.rowcount == 1
+
+    @contextmanager
+    def heartbeat(self, task_id: int, worker: str, interval: float | None = None):
+        # Renews the lease while the task runs; a crashed worker stops renewing and the task is claimed again
+        interval = interval or self.lease_seconds / 3
+        stop = threading.Event()
+
+        def renew():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            try:
+                while not stop.wait(interval):
+                    if not self.extend(task_id, worker, conn):
+                        print(f"Аренда задачи {task_id} больше не принадлежит {worker}")
+                        return
+            finally:
+                conn.close()
+
+        thread = threading.Thread(target=renew, name=f"lease-{task_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, task_id: int):
+        self.conn.execute("UPDATE tasks SET status = ?, lease_until = NULL, last_error = NULL, updated_at = ? "
+                          "WHERE id = ?", (DONE, time.time(), task_id))
+
+    def fail(self, task_id: int, error: str):
+        self.conn.execute(
+            """
+            UPDATE tasks SET status = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END,
+                             lease_until = NULL, last_error = ?, updated_at = ?
+            WHERE id = ?
+            """,
+            (DEAD, PENDING, error, time.time(), task_id),
+        )
+
+    def bury_exhausted(self) -> int:
+        # Tasks whose worker crashed on the last allowed attempt never reach fail()
+        cursor = self.conn.execute(
+            "UPDATE tasks SET status = ?, updated_at = ? WHERE status = ? AND lease_until < ? "
+            "AND attempts >= max_attempts",
+            (DEAD, time.time(), RUNNING, time.time()),
+        )
+        return cursor.rowcount
+
+    def counts(self) -> dict:
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def dead_letters(self) -> list[dict]:
+        rows = self.conn.execute("SELECT * FROM tasks WHERE status = ? ORDER BY id", (DEAD,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def has_open_tasks(self) -> bool:
+        self.bury_exhausted()
+        row = self.conn.execute("SELECT 1 FROM tasks WHERE status IN (?, ?) LIMIT 1", (PENDING, RUNNING)).fetchone()
+        return row is not None
+
+
+class PriorityBoard:
+    # Hosts interactive lookups are waiting for, shared through the queue database with the batch worker processes
+    def __init__(self, path: str = "jobs.db", ttl: float = 30.0, check_interval: float = 0.25,
+                 owner: str | None = None):
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.owner = owner or f"pid-{os.getpid()}"
+        # Only called under the scheduler's lock, from whichever thread holds it
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._renewed = 0.0
+        self._checked = float("-inf")
+        self._hosts = frozenset()
+
+    def close(self):
+        self.conn.execute("DELETE FROM interactive_waits WHERE owner = ?", (self.owner,))
+        self.conn.close()
+
+    def post(self, host: str) -> int:
+        now = time.time()
+        self._renewed = now
+        cursor = self.conn.execute("INSERT INTO interactive_waits (host, owner, expires_at) VALUES (?, ?, ?)",
+                                   (host, self.owner, now + self.ttl))
+        return cursor.lastrowid
+
+    def remove(self, post_id: int):
+        self.conn.execute("DELETE FROM interactive_waits WHERE id = ?", (post_id,))
+
+    def renew(self):
+        now = time.time()
+        if now - self._renewed < self.ttl / 3:
+            return
+        self._renewed = now
+        self.conn.execute("UPDATE interactive_waits SET expires_at = ? WHERE owner = ?", (now + self.ttl, self.owner))
+
+    def waiting(self, host: str) -> bool:
+        # Posts of a crashed process expire on their own; this process's waiters are tracked by its scheduler
+        now = time.time()
+        if now - self._checked >= self.check_interval:
+            rows = self.conn.execute("SELECT DISTINCT host FROM interactive_waits WHERE expires_at > ? AND owner != ?",
+                                     (now, self.owner)).fetchall()
+            self._hosts = frozenset(row[0] for row in rows)
+            self._checked = now
+        return host in self._hosts
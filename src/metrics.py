@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+PREFIX = "company_parser_"
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                # Upper bound of the bucket; the overflow bucket reports the largest finite bound
+                return self.buckets[min(i, len(self.buckets) - 1)]
+        return self.buckets[-1]
+
+
+class Metrics:
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._counters: dict[tuple, float] = {}
+        self._histograms: dict[tuple, Histogram] = {}
+        self._buckets: dict[str, tuple] = {}
+
+    @classmethod
+    def shared(cls) -> "Metrics":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return (name,) + tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: tuple = SECONDS_BUCKETS, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self._buckets.setdefault(name, buckets))
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return sum(value for key, value in self._counters.items()
+                       if key[0] == name and all(item in key[1:] for item in self._key(name, labels)[1:]))
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started = time.time()
+
+    @staticmethod
+    def _format_labels(pairs, extra: tuple = ()) -> str:
+        pairs = tuple(pairs) + extra
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            histograms = [(key, list(h.counts), h.sum, h.count, h.buckets) for key, h in histograms]
+
+        typed = set()
+        for key, value in counters:
+            name = PREFIX + key[0]
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{self._format_labels(key[1:])} {value:g}")
+
+        for key, counts, total, count, buckets in histograms:
+            name = PREFIX + key[0]
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{self._format_labels(key[1:], (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{self._format_labels(key[1:])} {total:g}")
+            lines.append(f"{name}_count{self._format_labels(key[1:])} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        # Write-then-rename so the node_exporter textfile collector never reads a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def profile(self) -> dict:
+        with self._lock:
+            counters = [{"name": key[0], "labels": dict(key[1:]), "value": value}
+                        for key, value in sorted(self._counters.items())]
+            histograms = [{
+                "name": key[0],
+                "labels": dict(key[1:]),
+                "count": h.count,
+                "sum": round(h.sum, 6),
+                "mean": round(h.sum / h.count, 6) if h.count else None,
+                "p50": h.quantile(0.5),
+                "p90": h.quantile(0.9),
+                "p99": h.quantile(0.99),
+            } for key, h in sorted(self._histograms.items(), key=lambda item: item[0])]
+            card_seconds = sum(h.sum for key, h in self._histograms.items() if key[0] == "card_parse_seconds")
+
+        elapsed = time.time() - self.started
+        reviews = self.counter("reviews_parsed_total")
+        return {
+            "started": self.started,
+            "elapsed_seconds": round(elapsed, 3),
+            "reviews_per_second": round(reviews / elapsed, 2) if elapsed else None,
+            "reviews_per_card_second": round(reviews / card_seconds, 2) if card_seconds else None,
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+    def write_profile(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.profile(), f, ensure_ascii=False, indent=2)
@@ -0,0 +1,88 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .aggregation import summarize_cards
+from .parsers.gis2_parser import GIS2Parser
+from .parsers.yandex_parser import YandexParser
+from .scheduler import INTERACTIVE
+
+BROWSER = "browser"
+HTTP = "http"
+
+
+def _gis2_parser(company_name: str, company_site: str, session, cache, db, incremental: bool, force: bool = False,
+                 priority: int = INTERACTIVE):
+    return GIS2Parser(None, company_name, company_site, session=session, cache=cache, db=db, incremental=incremental,
+                      force=force, priority=priority)
+
+
+def _yandex_parser(company_name: str, company_site: str, session, cache, db, incremental: bool, force: bool = False,
+                   priority: int = INTERACTIVE):
+    return YandexParser(company_name, company_site, cache=cache, db=db, force=force, priority=priority)
+
+
+PLATFORMS = {
+    "gis2": (BROWSER, _gis2_parser),
+    "yandex": (HTTP, _yandex_parser),
+}
+
+
+def register_platform(name: str, kind: str, factory):
+    if kind not in (BROWSER, HTTP):
+        raise ValueError(f"Unknown platform kind: {kind}")
+    PLATFORMS[name] = (kind, factory)
+
+
+def _run_platform(name: str, company_name: str, company_site: str, pool, cache, db, incremental: bool,
+                  max_workers: int, force: bool = False, priority: int = INTERACTIVE) -> tuple[dict, float]:
+    kind, factory = PLATFORMS[name]
+    started = time.monotonic()
+    try:
+        if kind == BROWSER:
+            if pool is None:
+                raise ValueError(f"Platform '{name}' needs a driver pool")
+            with pool.lease() as session, \
+                    factory(company_name, company_site, session, cache, db, incremental, force, priority) as parser:
+                result = parser.analyze_platform_data()
+        else:
+            # HTTP platforms fan their cards out on their own event loop inside this thread
+            with factory(company_name, company_site, None, cache, db, incremental, force, priority) as parser:
+                result = parser.analyze_platform_data(max_workers=max_workers)
+    except Exception as e:
+        print(f"Ошибка платформы {name} для '{company_name}': {e!r}")
+        result = {"error": f"{name}: {e!r}"}
+    return result, time.monotonic() - started
+
+
+def merge_platform_results(company_name: str, company_site: str, results: dict[str, dict],
+                           elapsed: dict[str, float] | None = None) -> dict:
+    successful = {name: result for name, result in results.items() if "error" not in result}
+    all_cards = [card for result in successful.values() for card in result.get("cards_details", [])]
+
+    merged = summarize_cards(all_cards, "all")
+    del merged["cards_details"]
+    merged["company_name"] = company_name
+    merged["company_site"] = company_site
+    merged["platforms"] = successful
+    merged["errors"] = {name: result["error"] for name, result in results.items() if "error" in result}
+    merged["elapsed_seconds"] = {name: round(seconds, 2) for name, seconds in (elapsed or {}).items()}
+    return merged
+
+
+def analyze_company(company_name: str, company_site: str, pool=None, cache=None, db=None, incremental: bool = False,
+                    platforms=None, max_workers: int = 5, force: bool = False,
+                    priority: int = INTERACTIVE) -> dict:
+    platforms = list(platforms or PLATFORMS)
+    results = {}
+    elapsed = {}
+
+    with ThreadPoolExecutor(max_workers=len(platforms), thread_name_prefix="platform") as executor:
+        futures = {
+            name: executor.submit(_run_platform, name, company_name, company_site, pool, cache, db, incremental,
+                                  max_workers, force, priority)
+            for name in platforms
+        }
+        for name, future in futures.items():
+            results[name], elapsed[name] = future.result()
+
+    return merge_platform_results(company_name, company_site, results, elapsed)
@@ -0,0 +1,202 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_TTLS = {
+    "search": 60 * 60,
+    "card": 24 * 60 * 60,
+    "page": 60 * 60,
+}
+
+_SCRIPT_RE = re.compile(r"<script\b[^>]*>.*?</script\s*>", re.IGNORECASE | re.DOTALL)
+_SCRIPT_TAG_RE = re.compile(r"<script\b[^>]*>", re.IGNORECASE)
+_DATA_SCRIPT_RE = re.compile(r"""type=["']application/(?:ld\+)?json["']""", re.IGNORECASE)
+_STATE_SCRIPT_RE = re.compile(r"initialState|__INITIAL_STATE__|__PRELOADED_STATE__")
+
+
+class CacheMiss(LookupError):
+    pass
+
+
+class CacheEntry:
+    def __init__(self, body: str, meta: dict, fresh: bool):
+        self.body = body
+        self.meta = meta
+        self.fresh = fresh
+
+    @property
+    def etag(self) -> str | None:
+        return self.meta.get("etag")
+
+    @property
+    def last_modified(self) -> str | None:
+        return self.meta.get("last_modified")
+
+
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+def _keep_state(match: re.Match) -> str:
+    script = match.group(0)
+    tag = _SCRIPT_TAG_RE.match(script).group(0)
+    if _DATA_SCRIPT_RE.search(tag):
+        return script
+    if _STATE_SCRIPT_RE.search(script):
+        # The parsers read the embedded state from the cached page; as data it no longer runs when shown again
+        return '<script type="text/x-page-state">' + script[len(tag):]
+    return ""
+
+
+def strip_scripts(html: str) -> str:
+    return _SCRIPT_RE.sub(_keep_state, html)
+
+
+class PageCache:
+    def __init__(self, directory: str = ".cache/pages", max_bytes: int = 512 * 1024 * 1024,
+                 ttls: dict | None = None, replay: bool = False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.replay = replay
+        self._lock = threading.Lock()
+        self._index: dict[str, tuple[int, float]] = {}
+        self._total_bytes = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        for name in os.listdir(self.directory):
+            if not name.endswith(".gz"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            key = name[:-3]
+            self._index[key] = (st.st_size, st.st_mtime)
+            self._total_bytes += st.st_size
+
+    @staticmethod
+    def make_key(platform: str, page_type: str, url: str) -> str:
+        raw = f"{platform.lower()}|{page_type}|{normalize_url(url)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        base = os.path.join(self.directory, key)
+        return base + ".gz", base + ".json"
+
+    def lookup(self, platform: str, page_type: str, url: str) -> CacheEntry | None:
+        key = self.make_key(platform, page_type, url)
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with gzip.open(body_path, "rt", encoding="utf-8") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+
+        now = time.time()
+        ttl = self.ttls.get(page_type, self.ttls["page"])
+        fresh = now - meta.get("fetched_at", 0) < ttl
+        self._touch(key, body_path, now)
+        return CacheEntry(body, meta, fresh)
+
+    def get(self, platform: str, page_type: str, url: str) -> str | None:
+        entry = self.lookup(platform, page_type, url)
+        if entry is None:
+            return None
+        if entry.fresh or self.replay:
+            return entry.body
+        return None
+
+    def put(self, platform: str, page_type: str, url: str, body: str, etag: str | None = None,
+            last_modified: str | None = None):
+        key = self.make_key(platform, page_type, url)
+        body_path, meta_path = self._paths(key)
+        meta = {
+            "url": url,
+            "platform": platform,
+            "page_type": page_type,
+            "fetched_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+        tmp_body = f"{body_path}.{threading.get_ident()}.tmp"
+        tmp_meta = f"{meta_path}.{threading.get_ident()}.tmp"
+        try:
+            with gzip.open(tmp_body, "wt", encoding="utf-8", compresslevel=6) as f:
+                f.write(body)
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp_body, body_path)
+            os.replace(tmp_meta, meta_path)
+        except OSError as e:
+            print(f"Не удалось сохранить страницу в кэш {url}: {e}")
+            return
+
+        size = os.path.getsize(body_path)
+        with self._lock:
+            old = self._index.get(key)
+            if old is not None:
+                self._total_bytes -= old[0]
+            self._index[key] = (size, meta["fetched_at"])
+            self._total_bytes += size
+        self._evict()
+
+    def refresh(self, platform: str, page_type: str, url: str):
+        # Called after a 304 Not Modified: the stored body is valid for another TTL
+        key = self.make_key(platform, page_type, url)
+        _, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            meta["fetched_at"] = time.time()
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+        except (OSError, ValueError) as e:
+            print(f"Не удалось обновить запись кэша {url}: {e}")
+
+    def _touch(self, key: str, body_path: str, now: float):
+        try:
+            os.utime(body_path, (now, now))
+        except OSError:
+            return
+        with self._lock:
+            if key in self._index:
+                self._index[key] = (self._index[key][0], now)
+
+    def _evict(self):
+        with self._lock:
+            if self._total_bytes <= self.max_bytes:
+                return
+            victims = sorted(self._index.items(), key=lambda item: item[1][1])
+            removed = []
+            for key, (size, _) in victims:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._total_bytes -= size
+                removed.append(key)
+                del self._index[key]
+        for key in removed:
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._index), "bytes": self._total_bytes, "max_bytes": self.max_bytes}
@@ -1,19 +1,226 @@
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.remote.webdriver import WebDriver
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
 from urllib.parse import urlparse
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from ..adaptive_wait import AdaptiveWait, PageMarkerFound
+from ..aggregation import summarize_cards
+from ..fingerprints import FingerprintPool
+from ..metrics import Metrics, COUNT_BUCKETS
+from ..page_cache import CacheMiss, strip_scripts
+from ..records import Card
+from ..scheduler import INTERACTIVE, RequestScheduler
+from ..utils.date_utils import parse_date
 
 
 class BaseParser(ABC):
-    def __init__(self, driver: WebDriver, company_name: str, company_site: str, proxies=None):
+    def __init__(self, driver: WebDriver | None, company_name: str, company_site: str, proxies=None, session=None,
+                 pool=None, cache=None, db=None, incremental: bool = False, metrics: Metrics | None = None,
+                 force: bool = False, priority: int = INTERACTIVE):
+        if driver is None and session is not None:
+            driver = session.driver
         self.driver = driver
+        self.session = session
+        self.pool = pool
+        self.cache = cache
+        self.db = db
+        self.incremental = incremental
+        self.force = force
+        self.priority = priority
+        self.scheduler = RequestScheduler.shared()
+        self.metrics = metrics or Metrics.shared()
+        self.waits = AdaptiveWait.shared()
+        self.platform = self.__class__.__name__.replace("Parser", "")
+        self._roundtrips = 0
+        self._page_from_cache = False
+        self._traffic_url = None
+        self._unrewarded_url = None
+        self._own_fetch_engine = None
         self.proxies = proxies
         self.company_name = company_name
         self.company_site = company_site
         self.base_url = ""
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        if session is not None and session.fingerprint is not None:
+            self.fingerprint = session.fingerprint
+        else:
+            self.fingerprint = FingerprintPool.shared().next(chromium=driver is not None)
+        self.headers = dict(self.fingerprint.headers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        # Injected engines belong to the caller; only the one this parser started is shut down
+        if self._own_fetch_engine is not None:
+            self._own_fetch_engine.close()
+            self._own_fetch_engine = None
+
+    def _load_page(self, url: str, page_type: str = "page") -> bool:
+        self._flush_traffic()
+        self._page_from_cache = False
+        self._unrewarded_url = None
+        if self.cache is not None:
+            html = self.cache.get(self.platform, page_type, url)
+            if html is not None:
+                self.metrics.inc("cache_hits_total", platform=self.platform, page_type=page_type)
+                self._show_cached_page(html)
+                self._page_from_cache = True
+                return True
+            self.metrics.inc("cache_misses_total", platform=self.platform, page_type=page_type)
+            if self.cache.replay:
+                raise CacheMiss(url)
+
+        self._roundtrips += 1
+        ticket = self.scheduler.acquire(url, priority=self.priority)
+        try:
+            with self.metrics.timer("page_load_seconds", platform=self.platform, page_type=page_type):
+                self.driver.get(url)
+        finally:
+            # A captcha only shows up in the later waits: they throttle the host, or reward it once the page is real
+            self.scheduler.release(ticket, throttled=None)
+        self._traffic_url = url
+        self._unrewarded_url = url
+        if self.session is not None:
+            self.session.note_page()
+        return False
+
+    def _flush_traffic(self):
+        if self._traffic_url is None:
+            return
+        from ..scraper import drain_traffic
+
+        stats = drain_traffic(self.driver)
+        if self.session is not None:
+            self.session.note_traffic(stats)
+        self.metrics.observe("page_requests", stats["requests"], COUNT_BUCKETS, platform=self.platform)
+        self.metrics.inc("blocked_requests_total", stats["blocked"], platform=self.platform)
+        self.metrics.inc("downloaded_bytes_total", stats["bytes"], platform=self.platform)
+        print(f"Трафик {self._traffic_url}: запросов {stats['requests']}, заблокировано {stats['blocked']}, "
+              f"загружено {stats['bytes'] / 1024:.0f} КБ")
+        self._traffic_url = None
+
+    def _wait_for(self, target: str, selectors: list[str], markers=(), visible: bool = False):
+        self._roundtrips += 1
+        started = time.perf_counter()
+        try:
+            # Snapshots from the page cache render in milliseconds and would teach a timeout no live page meets
+            found = self.waits.wait_for(self.driver, target, selectors, markers, visible,
+                                        learn=not self._page_from_cache)
+            if self._unrewarded_url is not None:
+                self.scheduler.reward(self._unrewarded_url)
+                self._unrewarded_url = None
+            return found
+        except PageMarkerFound as e:
+            self.metrics.inc("page_markers_total", platform=self.platform, target=target, marker=e.marker)
+            if e.marker == "captcha":
+                self._unrewarded_url = None
+                if self._traffic_url is not None:
+                    self.scheduler.throttle(self._traffic_url)
+                if self.session is not None:
+                    self.session.mark_broken()
+            raise
+        except TimeoutException:
+            self.metrics.inc("wait_timeouts_total", platform=self.platform, target=target)
+            raise
+        finally:
+            self.metrics.observe("wait_seconds", time.perf_counter() - started, platform=self.platform, target=target)
+
+    def _show_cached_page(self, html: str):
+        fd, path = tempfile.mkstemp(suffix=".html")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(html)
+            self.driver.get(Path(path).as_uri())
+        finally:
+            os.remove(path)
+
+    def _store_page(self, url: str, page_type: str = "page"):
+        if self.cache is None or self._page_from_cache:
+            return
+        html = self._get_html_content()
+        if html:
+            self.cache.put(self.platform, page_type, url, strip_scripts(html))
+
+    def _get_watermark(self, card_url: str) -> dict | None:
+        if self.db is None or not self.incremental:
+            return None
+        return self.db.get_card_sync(self.platform, card_url)
+
+    def _is_known_review(self, review_key: str, review_date: datetime | None, watermark: dict) -> bool:
+        if review_key and review_key == watermark.get("last_review_id"):
+            return True
+        last_date = watermark.get("last_review_date")
+        return bool(review_date and last_date and review_date < last_date)
+
+    def _merge_with_watermark(self, card_data: dict, watermark: dict | None, response_times_seconds: list[float],
+                              newest_review: dict | None):
+        counters = {
+            "answered_reviews": card_data["answered_reviews"],
+            "unanswered_reviews": card_data["unanswered_reviews"],
+            "negative_reviews": card_data["negative_reviews"],
+            "positive_reviews": card_data["positive_reviews"],
+            "response_time_sum": sum(response_times_seconds),
+            "response_time_count": len(response_times_seconds),
         }
+        if watermark is not None:
+            for name in counters:
+                counters[name] += watermark.get(name) or 0
+            for name in ("answered_reviews", "unanswered_reviews", "negative_reviews", "positive_reviews"):
+                card_data[name] = counters[name]
+            card_data["new_reviews"] = len(card_data["reviews"])
+
+        if counters["response_time_count"]:
+            card_data["avg_response_time_seconds"] = counters["response_time_sum"] / counters["response_time_count"]
+
+        if self.db is not None:
+            if newest_review is not None:
+                last_review_id, last_review_date = newest_review.get("id"), newest_review.get("date")
+            elif watermark is not None:
+                last_review_id, last_review_date = watermark["last_review_id"], watermark["last_review_date"]
+            else:
+                last_review_id, last_review_date = None, None
+            self.db.save_card_sync(self.platform, card_data["url"], last_review_id, last_review_date, counters)
+
+    @staticmethod
+    def _card_fingerprint(*parts) -> str:
+        return hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+    def _reuse_unchanged_card(self, card_url: str, fingerprint: str) -> dict | None:
+        if self.db is None or self.force:
+            return None
+        stored = self.db.get_card_fingerprint(self.platform, card_url, fingerprint)
+        # Incremental snapshots carry no reviews, so a full run cannot reuse them
+        if stored is None or (stored["incremental"] and not self.incremental):
+            self.metrics.inc("card_fingerprints_total", platform=self.platform, result="changed")
+            return None
+        self.metrics.inc("card_fingerprints_total", platform=self.platform, result="unchanged")
+        print(f"Карточка не изменилась с {stored['changed_at']:%d.%m.%Y %H:%M}: {card_url}")
+        card_data = stored["card_data"]
+        if self.incremental:
+            card_data["reviews"] = []
+            card_data["new_reviews"] = 0
+        card_data["unchanged_since"] = stored["changed_at"]
+        return card_data
+
+    def _remember_card(self, card_data: dict, fingerprint: str):
+        if self.db is None:
+            return
+        snapshot = {key: value for key, value in card_data.items() if key != "unchanged_since"}
+        if self.incremental:
+            snapshot["reviews"] = []
+        self.db.save_card_fingerprint(self.platform, card_data["url"], fingerprint, snapshot, self.incremental)
 
     def _get_html_content(self) -> str | None:
         try:
@@ -34,62 +241,10 @@ class BaseParser(ABC):
             return ""
 
     def _parse_date(self, date_str: str) -> datetime | None:
-        try:
-            date_str = date_str.lower().strip()
-            now = datetime.now()
-
-            if "час назад" in date_str:
-                hours = int(date_str.split()[0])
-                return now - timedelta(hours=hours)
-            elif "дня назад" in date_str or "дней назад" in date_str:
-                days = int(date_str.split()[0])
-                return now - timedelta(days=days)
-            elif "минут назад" in date_str:
-                minutes = int(date_str.split()[0])
-                return now - timedelta(minutes=minutes)
-            elif "сегодня" in date_str:
-                time_part = date_str.replace("сегодня", "").strip()
-                if time_part and ":" in time_part:
-                    return datetime.combine(now.date(), datetime.strptime(time_part, "%H:%M").time())
-                return now.replace(hour=0, minute=0, second=0, microsecond=0)
-
-            parts = date_str.split()
-            day = None
-            month = None
-            year = now.year
-
-            if len(parts) >= 2:
-                try:
-                    day = int(parts[0])
-                    month_name = parts[1]
-
-                    month_map = {
-                        "января": 1, "февраля": 2, "марта": 3, "апреля": 4,
-                        "мая": 5, "июня": 6, "июля": 7, "августа": 8,
-                        "сентября": 9, "октября": 10, "ноября": 11, "декабря": 12
-                    }
-                    month = month_map.get(month_name)
-
-                    if len(parts) == 3:
-                        year = int(parts[2])
-
-                    if day and month:
-                        return datetime(year, month, day)
-                except ValueError:
-                    pass
-
-            if "." in date_str:
-                date_parts = date_str.split('.')
-                if len(date_parts) == 3:
-                    return datetime.strptime(date_str, "%d.%m.%Y")
-                elif len(date_parts) == 2:
-                    return datetime.strptime(date_str, "%d.%m").replace(year=now.year)
-
-            return None
-
-        except Exception as e:
-            print(f"Не удалось разобрать дату: '{date_str}'. Ошибка: {e}")
-            return None
+        parsed = parse_date(date_str)
+        if parsed is None:
+            self.metrics.inc("date_parse_failures_total", platform=self.platform)
+        return parsed
 
     @abstractmethod
     def search_company_urls(self) -> list[str]:
@@ -99,7 +254,8 @@ class BaseParser(ABC):
     def parse_card_details(self, card_url: str) -> dict | None:
         pass
 
-    def analyze_platform_data(self) -> dict:
+    def analyze_platform_data(self, max_workers: int = 1, card_timeout: float | None = None, compact: bool = False,
+                              drop_review_text: bool = False) -> dict:
         card_urls = self.search_company_urls()
 
         if not card_urls:
@@ -107,76 +263,135 @@ class BaseParser(ABC):
                 "error": f"Карточки для компании '{self.company_name}' не найдены на {self.__class__.__name__.replace('Parser', '')}"
             }
 
-        all_cards_data = []
-        valid_cards_count = 0
+        company_domain = self.get_website_domain(self.company_site)
+        platform_domain = self.get_website_domain(self.base_url)
+        matching_urls = []
         for url in card_urls:
             card_domain = self.get_website_domain(url)
-            company_domain = self.get_website_domain(self.company_site)
 
-            if card_domain.endswith(company_domain) or company_domain.endswith(card_domain):
-                card_data = self.parse_card_details(url)
-                if card_data:
-                    all_cards_data.append(card_data)
-                    valid_cards_count += 1
+            # Cards hosted by the platform itself came from the company search; only outside links are checked
+            if card_domain == platform_domain or card_domain.endswith(company_domain) or \
+                    company_domain.endswith(card_domain):
+                matching_urls.append(url)
             else:
                 print(
                     f"Skipping URL: {url} - domain mismatch. Card domain: '{card_domain}', Company domain: '{company_domain}'")
 
+        if hasattr(self, "parse_card_details_async") and max_workers > 1:
+            results = asyncio.run(self._parse_cards_async(matching_urls, max_workers, card_timeout))
+        elif max_workers > 1 and (self.driver is None or self.pool is not None):
+            results = self._parse_cards_threaded(matching_urls, max_workers, card_timeout)
+        else:
+            results = [self._parse_card_timed(url) for url in matching_urls]
+
+        all_cards_data = [card_data for card_data in results if card_data]
+        del results
+
         if not all_cards_data:
             return {
                 "error": f"Не найдено валидных карточек компании '{self.company_name}' с совпадающим сайтом ({self.company_site}) на {self.__class__.__name__.replace('Parser', '')}"
             }
 
-        return self.aggregate_platform_data(all_cards_data)
+        if compact or drop_review_text:
+            for i, card_data in enumerate(all_cards_data):
+                all_cards_data[i] = Card.from_dict(self.platform, card_data)
 
-    def aggregate_platform_data(self, cards_data: list[dict]) -> dict:
-        total_cards = len(cards_data)
-
-        summary = {
-            "platform": self.__class__.__name__.replace("Parser", ""),
-            "card_count": total_cards,
-            "overall_rating": 0.0,
-            "total_reviews_count": 0,
-            "answered_reviews_count": 0,
-            "unanswered_reviews_count": 0,
-            "negative_reviews_count": 0,
-            "positive_reviews_count": 0,
-            "avg_response_time_days": None,
-            "cards_details": cards_data
-        }
+        summary = self.aggregate_platform_data(all_cards_data)
+        if drop_review_text:
+            for card in all_cards_data:
+                card.drop_text()
+        return summary
 
-        total_rating_sum = 0
-        total_reviews = 0
-        total_answered = 0
-        total_unanswered = 0
-        all_response_times_seconds = []
-        total_negative = 0
-        total_positive = 0
-
-        for card in cards_data:
-            if card.get("rating") is not None:
-                total_rating_sum += card["rating"]
-            total_reviews += card.get("total_reviews", 0)
-            total_answered += card.get("answered_reviews", 0)
-            total_unanswered += card.get("unanswered_reviews", 0)
-
-            if card.get("avg_response_time_seconds") is not None:
-                all_response_times_seconds.append(card["avg_response_time_seconds"])
-
-            total_negative += card.get("negative_reviews", 0)
-            total_positive += card.get("positive_reviews", 0)
-
-        if total_cards > 0:
-            summary["overall_rating"] = round(total_rating_sum / total_cards, 2)
-
-        if all_response_times_seconds:
-            avg_seconds = sum(all_response_times_seconds) / len(all_response_times_seconds)
-            summary["avg_response_time_days"] = round(avg_seconds / (60 * 60 * 24), 2)
-
-        summary["total_reviews_count"] = total_reviews
-        summary["answered_reviews_count"] = total_answered
-        summary["unanswered_reviews_count"] = total_unanswered
-        summary["negative_reviews_count"] = total_negative
-        summary["positive_reviews_count"] = total_positive
-
-        return summary
\ No newline at end of file
+    def _parse_card_timed(self, card_url: str) -> dict | None:
+        self._roundtrips = 0
+        started = time.perf_counter()
+        card_data = None
+        try:
+            card_data = self.parse_card_details(card_url)
+            return card_data
+        finally:
+            self._record_card(started, card_data)
+
+    def _record_card(self, started: float, card_data: dict | None):
+        self.metrics.observe("card_parse_seconds", time.perf_counter() - started, platform=self.platform)
+        self.metrics.inc("cards_total", platform=self.platform, status="ok" if card_data else "failed")
+        if card_data:
+            self.metrics.inc("reviews_parsed_total", len(card_data.get("reviews", [])), platform=self.platform)
+        if self.driver is not None:
+            self.metrics.observe("card_roundtrips", self._roundtrips, COUNT_BUCKETS, platform=self.platform)
+
+    def _parse_card_in_worker(self, card_url: str) -> dict | None:
+        if self.pool is None:
+            return self._parse_card_timed(card_url)
+        with self.pool.lease() as session:
+            worker = self.__class__(None, self.company_name, self.company_site, self.proxies, session=session,
+                                    **self._worker_kwargs())
+            return worker._parse_card_timed(card_url)
+
+    def _worker_kwargs(self) -> dict:
+        return {"cache": self.cache, "db": self.db, "incremental": self.incremental, "metrics": self.metrics,
+                "force": self.force, "priority": self.priority}
+
+    def _parse_cards_threaded(self, card_urls: list[str], max_workers: int,
+                              card_timeout: float | None) -> list[dict | None]:
+        results = [None] * len(card_urls)
+        started = {}
+        lock = threading.Lock()
+
+        def run(index: int, url: str):
+            with lock:
+                started[index] = time.monotonic()
+            return self._parse_card_in_worker(url)
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = {executor.submit(run, i, url): i for i, url in enumerate(card_urls)}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=1 if card_timeout else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = futures[future]
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        print(f"Ошибка при парсинге карточки {card_urls[index]}: {e}")
+
+                if card_timeout:
+                    now = time.monotonic()
+                    with lock:
+                        expired = {f for f in pending if futures[f] in started and now - started[futures[f]] > card_timeout}
+                    for future in expired:
+                        print(f"Превышено время ожидания карточки {card_urls[futures[future]]} ({card_timeout} с)")
+                    pending -= expired
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
+
+    async def _parse_card_timed_async(self, card_url: str) -> dict | None:
+        started = time.perf_counter()
+        card_data = None
+        try:
+            card_data = await self.parse_card_details_async(card_url)
+            return card_data
+        finally:
+            self._record_card(started, card_data)
+
+    async def _parse_cards_async(self, card_urls: list[str], max_workers: int,
+                                 card_timeout: float | None) -> list[dict | None]:
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def run(url: str):
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(self._parse_card_timed_async(url), card_timeout)
+                except asyncio.TimeoutError:
+                    print(f"Превышено время ожидания карточки {url} ({card_timeout} с)")
+                except Exception as e:
+                    print(f"Ошибка при парсинге карточки {url}: {e}")
+                return None
+
+        return await asyncio.gather(*(run(url) for url in card_urls))
+
+    def aggregate_platform_data(self, cards_data: list[dict]) -> dict:
+        return summarize_cards(cards_data, self.__class__.__name__.replace("Parser", ""))
@@ -1,21 +1,73 @@
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from datetime import datetime, timedelta
-import time
 import re
 import os
-from urllib.parse import urljoin
+import hashlib
+import json
+from urllib.parse import urljoin, urlencode
 
 from .base_parser import BaseParser
-
+from ..adaptive_wait import CAPTCHA_MARKERS, NOT_FOUND_MARKERS, PageMarkerFound
+from .json_state import new_card_data, add_review, map_2gis_review, find_json_payloads, find_2gis_reviews
+from ..fetcher import FetchEngine
+from ..page_cache import CacheMiss
+from ..scheduler import INTERACTIVE
+from ..scraper import ScrollLoader
+
+REVIEWS_EXTRACTION_JS = """
+const [section, itemSel, ratingSel, textSel, dateSel, responseSel, responseTextSel, responseDateSel] = arguments;
+const textOf = (root, sel) => {
+    const el = root.querySelector(sel);
+    return el ? el.innerText.trim() : null;
+};
+return Array.from(section.querySelectorAll(itemSel), item => {
+    const ratingEl = item.querySelector(ratingSel);
+    const responseEl = item.querySelector(responseSel);
+    return {
+        id: item.getAttribute('data-review-id'),
+        rating: ratingEl ? (ratingEl.getAttribute('aria-label') || ratingEl.getAttribute('data-rating')) : null,
+        text: textOf(item, textSel),
+        date: textOf(item, dateSel),
+        response_text: responseEl ? textOf(responseEl, responseTextSel) : null,
+        response_date: responseEl ? textOf(responseEl, responseDateSel) : null,
+    };
+});
+"""
 
 class GIS2Parser(BaseParser):
-    def __init__(self, driver: WebDriver, company_name: str, company_site: str, proxies=None):
-        super().__init__(driver, company_name, company_site, proxies)
+    MAX_SEARCH_RESULTS = 50
+    MAX_REVIEW_SCROLLS = 30
+    REVIEWS_API_URL = "https://public-api.reviews.2gis.com/2.0/branches/{firm_id}/reviews"
+    REVIEWS_PAGE_SIZE = 50
+    MAX_REVIEW_PAGES = 40
+    PAGE_MARKERS = CAPTCHA_MARKERS + NOT_FOUND_MARKERS
+    NO_RESULTS_MARKERS = (("no_results", "text", "Ничего не нашлось"), ("no_results", "text", "Ничего не найдено"))
+    NO_REVIEWS_MARKERS = (("no_reviews", "text", "Нет отзывов"), ("no_reviews", "text", "Отзывов пока нет"))
+    # Review item, then its rating, text, date, response block, response text and response date
+    REVIEW_SELECTORS = ("div.review-item", "span.star-rating", "div.review-text", "span.review-date",
+                        "div.response-block", "div.response-text", "span.response-date")
+
+    def __init__(self, driver: WebDriver | None, company_name: str, company_site: str, proxies=None, session=None,
+                 pool=None, cache=None, db=None, incremental: bool = False, reviews_api_key: str | None = None,
+                 fetch_engine: FetchEngine | None = None, metrics=None, force: bool = False,
+                 priority: int = INTERACTIVE):
+        super().__init__(driver, company_name, company_site, proxies, session, pool, cache, db, incremental, metrics,
+                         force, priority)
         self.base_url = "https://2gis.ru"
-        self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {"userAgent": self.headers['User-Agent']})
+        self.reviews_api_key = reviews_api_key
+        self.fetch_engine = fetch_engine
+        if self.reviews_api_key and self.fetch_engine is None:
+            # API calls reuse the browser session's identity
+            self.fetch_engine = self._own_fetch_engine = FetchEngine(headers_factory=lambda proxy=None: self.headers,
+                                            cache=cache, platform=self.platform, metrics=self.metrics,
+                                            priority=priority)
+        user_agent = self.fingerprint.user_agent
+        if self.session is None or self.session.user_agent != user_agent:
+            self.driver.execute_cdp_cmd('Network.setUserAgentOverride', self.fingerprint.cdp_override())
+            if self.session is not None:
+                self.session.user_agent = user_agent
 
     def search_company_urls(self) -> list[str]:
         search_query = self.company_name.replace(" ", "+")
@@ -23,14 +75,20 @@ class GIS2Parser(BaseParser):
 
         urls = []
         try:
-            self.driver.get(search_url)
-            wait = WebDriverWait(self.driver, 50)
+            self._load_page(search_url, "search")
 
-            results_container_locator = (By.CSS_SELECTOR, "._1kf6gff")
             card_item_locator = (By.CSS_SELECTOR, "._zjunba")
             link_locator_to_try = (By.CSS_SELECTOR, "a._1rehek")
+            # Hashed class first, then the parent of the card items in case the class is renamed
+            results_container_selectors = ["._1kf6gff", f"div:has(> {card_item_locator[1]})"]
 
-            results_container = wait.until(EC.presence_of_element_located(results_container_locator))
+            _, results_container = self._wait_for("search_results", results_container_selectors,
+                                                  self.PAGE_MARKERS + self.NO_RESULTS_MARKERS)
+            if not self._page_from_cache:
+                loader = ScrollLoader(self.driver, results_container, card_item_locator[1])
+                loaded = loader.load(target_count=self.MAX_SEARCH_RESULTS)
+                print(f"2GIS: загружено {loaded} результатов поиска, прирост по прокруткам: {loader.yields}")
+            self._store_page(search_url, "search")
 
             card_elements = results_container.find_elements(By.CSS_SELECTOR, card_item_locator[1])
 
@@ -53,43 +111,51 @@ class GIS2Parser(BaseParser):
                     if "firms" in card_url_absolute and self.base_url in card_url_absolute:
                         urls.append(card_url_absolute)
 
+        except PageMarkerFound as e:
+            print(f"2GIS: поиск '{self.company_name}' вернул страницу {e.marker}")
+            return []
         except Exception as e:
+            self._discard_broken_session(e)
+            print(f"2GIS: ошибка при поиске '{self.company_name}': {e!r}")
+            self.metrics.inc("errors_total", platform=self.platform, stage="search", error=type(e).__name__)
             return []
 
-        return list(set(urls))
+        self._flush_traffic()
+        return list(dict.fromkeys(urls))
+
+    def _discard_broken_session(self, error: Exception):
+        # The pool only sees exceptions that escape the lease, so swallowed driver errors are reported here;
+        # a wait timeout means a slow page, not a dead browser
+        if self.session is not None and isinstance(error, WebDriverException) \
+                and not isinstance(error, TimeoutException):
+            self.session.mark_broken()
+
+    def _worker_kwargs(self) -> dict:
+        return {**super()._worker_kwargs(), "reviews_api_key": self.reviews_api_key,
+                "fetch_engine": self.fetch_engine}
 
     def parse_card_details(self, card_url: str) -> dict | None:
-        card_data = {
-            "url": card_url,
-            "rating": None,
-            "total_reviews": 0,
-            "answered_reviews": 0,
-            "unanswered_reviews": 0,
-            "avg_response_time_seconds": None,
-            "negative_reviews": 0,
-            "positive_reviews": 0,
-            "reviews": []
-        }
+        if self.reviews_api_key:
+            card_data = self._parse_card_from_api(card_url)
+            if card_data is not None:
+                return card_data
+
+        card_data = new_card_data(card_url)
 
         try:
-            self.driver.get(card_url)
-            wait = WebDriverWait(self.driver, 40)
-
-            rating_locator = (By.CSS_SELECTOR, "span[data-testid='rating-value']")
-            reviews_link_locator = (By.CSS_SELECTOR, "a[data-testid='reviews-link']")
-            reviews_section_locator = (By.CSS_SELECTOR, "section[data-id='reviews']")
-            review_item_locator = (By.CSS_SELECTOR, "div.review-item")
-            review_rating_locator = (By.CSS_SELECTOR, "span.star-rating")
-            review_text_locator = (By.CSS_SELECTOR, "div.review-text")
-            review_date_locator = (By.CSS_SELECTOR, "span.review-date")
-            response_block_locator = (By.CSS_SELECTOR, "div.response-block")
-            response_text_locator = (By.CSS_SELECTOR, "div.response-text")
-            response_date_locator = (By.CSS_SELECTOR, "span.response-date")
-
-            rating_element = wait.until(EC.visibility_of_element_located(rating_locator))
+            self._load_page(card_url, "card")
+
+            # Test ids first, then microdata and link targets that outlive a markup rebuild
+            rating_selectors = ["span[data-testid='rating-value']", "span[itemprop='ratingValue']"]
+            reviews_link_selectors = ["a[data-testid='reviews-link']", "a[href*='/tab/reviews']"]
+            review_selectors = list(self.REVIEW_SELECTORS)
+            reviews_section_selectors = ["section[data-id='reviews']", f"section:has({review_selectors[0]})"]
+
+            _, rating_element = self._wait_for("rating", rating_selectors, self.PAGE_MARKERS, visible=True)
             card_data["rating"] = float(rating_element.text.replace(",", "."))
 
-            reviews_link_element = wait.until(EC.visibility_of_element_located(reviews_link_locator))
+            _, reviews_link_element = self._wait_for("reviews_link", reviews_link_selectors, self.PAGE_MARKERS,
+                                                     visible=True)
             reviews_text = reviews_link_element.text
             match_reviews = re.search(r'(\d+)', reviews_text)
             if match_reviews:
@@ -97,85 +163,192 @@ class GIS2Parser(BaseParser):
             else:
                 card_data["total_reviews"] = 0
 
+            fingerprint = self._card_fingerprint(card_data["rating"], card_data["total_reviews"])
+            unchanged = self._reuse_unchanged_card(card_url, fingerprint)
+            if unchanged is not None:
+                self._flush_traffic()
+                return unchanged
+
+            watermark = self._get_watermark(card_url)
+            if self._reviews_from_state(card_data, watermark):
+                self._store_page(card_url, "card")
+                self._remember_card(card_data, fingerprint)
+                self._flush_traffic()
+                return card_data
+
             try:
-                reviews_section = wait.until(EC.presence_of_element_located(reviews_section_locator))
-            except Exception as e:
+                _, reviews_section = self._wait_for("reviews_section", reviews_section_selectors,
+                                                    self.PAGE_MARKERS + self.NO_REVIEWS_MARKERS)
+            except PageMarkerFound as e:
+                if e.marker != "no_reviews":
+                    raise
+                self._store_page(card_url, "card")
+                self._remember_card(card_data, fingerprint)
+                self._flush_traffic()
+                return card_data
+            except TimeoutException:
+                # The rating and review count are in; the page is cached for replays, but the card is not
+                # remembered, so the next live run parses its reviews
+                print(f"2GIS: не дождались отзывов карточки {card_url}")
+                self._store_page(card_url, "card")
+                self._flush_traffic()
                 return card_data
 
-            review_elements = reviews_section.find_elements(*review_item_locator)
+            if not self._page_from_cache:
+                # Full runs load every review the card reports; incremental ones stop at the watermark
+                loader = ScrollLoader(self.driver, reviews_section, review_selectors[0],
+                                      max_scrolls=self.MAX_REVIEW_SCROLLS)
+                stop_when = None
+                if watermark is not None:
+                    stop_when = lambda: self._watermark_loaded(reviews_section, review_selectors, watermark)
+                loader.load(target_count=card_data["total_reviews"] or None, stop_when=stop_when)
+                print(f"2GIS: прирост отзывов по прокруткам для {card_url}: {loader.yields}")
+            # Stored after scrolling, so a replay extracts the same reviews as this run
+            self._store_page(card_url, "card")
+
+            with self.metrics.timer("review_extraction_seconds", platform=self.platform):
+                raw_reviews = self._extract_reviews(reviews_section, review_selectors)
 
             response_times_seconds = []
 
-            for i, review_element in enumerate(review_elements):
+            for raw_review in raw_reviews:
                 review_detail = {}
 
-                try:
-                    rating_sub_element = review_element.find_element(*review_rating_locator)
-                    rating_val = rating_sub_element.get_attribute("aria-label") or rating_sub_element.get_attribute(
-                        "data-rating")
-                    if rating_val:
-                        match_rating = re.search(r'(\d+(\.\d+)?)', rating_val)
-                        if match_rating:
-                            review_detail["rating"] = float(match_rating.group(1))
-                except Exception as e:
+                rating_val = raw_review.get("rating")
+                if rating_val:
+                    match_rating = re.search(r'(\d+(\.\d+)?)', rating_val)
+                    if match_rating:
+                        review_detail["rating"] = float(match_rating.group(1))
+                else:
                     review_detail["rating"] = None
 
-                try:
-                    text_sub_element = review_element.find_element(*review_text_locator)
-                    review_detail["text"] = text_sub_element.text
-                except Exception as e:
-                    review_detail["text"] = ""
-
-                try:
-                    date_sub_element = review_element.find_element(*review_date_locator)
-                    review_date_str = date_sub_element.text
-                    review_detail["date"] = self._parse_date(review_date_str)
-                except Exception as e:
-                    review_detail["date"] = None
-
-                try:
-                    response_block = review_element.find_element(*response_block_locator)
-                    response_text_element = response_block.find_element(*response_text_locator)
-                    response_text = response_text_element.text
-                    response_date_element = response_block.find_element(*response_date_locator)
-                    response_date_str = response_date_element.text
-                    response_date = self._parse_date(response_date_str)
-                    review_detail["response"] = {"text": response_text, "date": response_date}
-                    card_data["answered_reviews"] += 1
-
-                    if review_detail["date"] and response_date:
-                        time_diff = response_date - review_detail["date"]
-                        response_times_seconds.append(time_diff.total_seconds())
-
-                except Exception as e:
-                    review_detail["response"] = None
-                    card_data["unanswered_reviews"] += 1
-
-                card_data["reviews"].append(review_detail)
-
-                if review_detail.get("rating") is not None:
-                    if review_detail["rating"] <= 3.0:
-                        card_data["negative_reviews"] += 1
-                    else:
-                        card_data["positive_reviews"] += 1
-
-            if response_times_seconds:
-                card_data["avg_response_time_seconds"] = sum(response_times_seconds) / len(response_times_seconds)
+                review_detail["text"] = raw_review.get("text") or ""
+                review_detail["date"] = self._parse_date(raw_review["date"]) if raw_review.get("date") else None
+
+                review_detail["id"] = self._review_key(raw_review.get("id"), review_detail["text"])
+                if watermark is not None and self._is_known_review(review_detail["id"], review_detail["date"],
+                                                                   watermark):
+                    break
+
+                review_detail["response"] = None
+                if raw_review.get("response_text") is not None and raw_review.get("response_date") is not None:
+                    response_date = self._parse_date(raw_review["response_date"])
+                    review_detail["response"] = {"text": raw_review["response_text"], "date": response_date}
 
+                add_review(card_data, review_detail, response_times_seconds)
+
+            newest_review = card_data["reviews"][0] if card_data["reviews"] else None
+            self._merge_with_watermark(card_data, watermark, response_times_seconds, newest_review)
+            self._remember_card(card_data, fingerprint)
+
+        except PageMarkerFound as e:
+            print(f"2GIS: карточка {card_url} вернула страницу {e.marker}")
+            return None
         except Exception as e:
+            self._discard_broken_session(e)
+            print(f"2GIS: ошибка при парсинге карточки {card_url}: {e!r}")
+            self.metrics.inc("errors_total", platform=self.platform, stage="card", error=type(e).__name__)
             return None
 
+        self._flush_traffic()
         return card_data
 
-    def _scroll_to_load_more_elements(self, wait: WebDriverWait):
-        last_height = self.driver.execute_script("return document.body.scrollHeight")
-        scroll_pause_time = 3
-        max_scrolls = 15
+    def _reviews_from_state(self, card_data: dict, watermark: dict | None) -> bool:
+        # The page ships its first reviews in the embedded state; the DOM is only scrolled when they fall short
+        self._roundtrips += 1
+        html = self._get_html_content()
+        payloads = find_json_payloads(html) if html else []
+        reviews = find_2gis_reviews(payloads) if payloads else []
+        if not reviews:
+            return False
+
+        parsed = new_card_data(card_data["url"])
+        response_times_seconds = []
+        reached_known = False
+        for review_detail in reviews:
+            review_detail["id"] = review_detail["id"] or self._review_key(None, review_detail["text"])
+            if watermark is not None and self._is_known_review(review_detail["id"], review_detail["date"],
+                                                               watermark):
+                reached_known = True
+                break
+            add_review(parsed, review_detail, response_times_seconds)
+        if not reached_known and len(parsed["reviews"]) < card_data["total_reviews"]:
+            return False
+
+        for name in ("reviews", "answered_reviews", "unanswered_reviews", "negative_reviews", "positive_reviews"):
+            card_data[name] = parsed[name]
+        newest_review = card_data["reviews"][0] if card_data["reviews"] else None
+        self._merge_with_watermark(card_data, watermark, response_times_seconds, newest_review)
+        self.metrics.inc("state_cards_total", platform=self.platform)
+        return True
+
+    def _parse_card_from_api(self, card_url: str) -> dict | None:
+        match = re.search(r'/firm/(\d+)', card_url)
+        if not match:
+            return None
+
+        params = {"limit": self.REVIEWS_PAGE_SIZE, "sort_by": "date_created", "rated": "true",
+                  "fields": "meta.branch_rating,meta.branch_reviews_count", "key": self.reviews_api_key}
+        next_url = f"{self.REVIEWS_API_URL.format(firm_id=match.group(1))}?{urlencode(params)}"
+
+        card_data = new_card_data(card_url)
+        watermark = self._get_watermark(card_url)
+        response_times_seconds = []
+        pages = 0
 
-        for _ in range(max_scrolls):
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(scroll_pause_time)
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
+        while next_url and pages < self.MAX_REVIEW_PAGES:
+            try:
+                body = self.fetch_engine.fetch(next_url, page_type="reviews_api")
+                payload = json.loads(body) if body else None
+            except (CacheMiss, ValueError) as e:
+                print(f"2GIS API: не удалось получить отзывы {card_url}: {e!r}")
+                payload = None
+            if payload is None:
+                if pages == 0:
+                    return None
+                fingerprint = None
                 break
-            last_height = new_height
\ No newline at end of file
+
+            meta = payload.get("meta") or {}
+            if pages == 0:
+                card_data["rating"] = meta.get("branch_rating")
+                card_data["total_reviews"] = meta.get("branch_reviews_count") or meta.get("total_count") or 0
+                fingerprint = self._card_fingerprint(card_data["rating"], card_data["total_reviews"])
+                unchanged = self._reuse_unchanged_card(card_url, fingerprint)
+                if unchanged is not None:
+                    return unchanged
+
+            reached_known = False
+            for raw_review in payload.get("reviews") or []:
+                review_detail = map_2gis_review(raw_review)
+                review_detail["id"] = review_detail["id"] or self._review_key(None, review_detail["text"])
+                if watermark is not None and self._is_known_review(review_detail["id"], review_detail["date"],
+                                                                   watermark):
+                    reached_known = True
+                    break
+                add_review(card_data, review_detail, response_times_seconds)
+
+            pages += 1
+            next_url = None if reached_known else meta.get("next_link")
+
+        newest_review = card_data["reviews"][0] if card_data["reviews"] else None
+        self._merge_with_watermark(card_data, watermark, response_times_seconds, newest_review)
+        if fingerprint:
+            # A card cut short by a failed page must be parsed in full next time
+            self._remember_card(card_data, fingerprint)
+        return card_data
+
+    def _extract_reviews(self, reviews_section, review_selectors: list[str]) -> list[dict]:
+        self._roundtrips += 1
+        return self.driver.execute_script(REVIEWS_EXTRACTION_JS, reviews_section, *review_selectors) or []
+
+    def _review_key(self, review_id: str | None, review_text: str) -> str:
+        if review_id:
+            return review_id
+        return hashlib.sha1(review_text.encode("utf-8")).hexdigest()
+
+    def _watermark_loaded(self, reviews_section, review_selectors: list[str], watermark: dict) -> bool:
+        for raw_review in self._extract_reviews(reviews_section, review_selectors):
+            if self._review_key(raw_review.get("id"), raw_review.get("text") or "") == watermark.get("last_review_id"):
+                return True
+        return False
@@ -0,0 +1,98 @@
+import json
+import re
+from functools import lru_cache
+
+_ORG_HREF_RE = re.compile(r'href=(["\'])(/maps/org/[^"\'?#]+)')
+_STATE_SCRIPT_RE = re.compile(r'<script[^>]*class=["\'][^"\']*state-view[^"\']*["\'][^>]*>')
+
+
+class SoupBackend:
+    name = "bs4"
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+
+        self._soup = BeautifulSoup
+
+    def select_attr(self, html: str, selector: str, attr: str) -> list[str]:
+        soup = self._soup(html, "html.parser")
+        return [node.get(attr) for node in soup.select(selector) if node.get(attr)]
+
+
+class LxmlBackend:
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+
+        self._fromstring = lxml.html.fromstring
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _compile(selector: str):
+        from lxml.cssselect import CSSSelector
+
+        return CSSSelector(selector)
+
+    def select_attr(self, html: str, selector: str, attr: str) -> list[str]:
+        tree = self._fromstring(html)
+        return [node.get(attr) for node in self._compile(selector)(tree) if node.get(attr)]
+
+
+class SelectolaxBackend:
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self._parser = LexborHTMLParser
+
+    def select_attr(self, html: str, selector: str, attr: str) -> list[str]:
+        tree = self._parser(html)
+        values = []
+        for node in tree.css(selector):
+            value = node.attributes.get(attr)
+            if value:
+                values.append(value)
+        return values
+
+
+BACKENDS = {
+    SelectolaxBackend.name: SelectolaxBackend,
+    LxmlBackend.name: LxmlBackend,
+    SoupBackend.name: SoupBackend,
+}
+
+
+def get_backend(name: str | None = None):
+    if name is not None:
+        return BACKENDS[name]()
+    for backend_class in BACKENDS.values():
+        try:
+            return backend_class()
+        except ImportError:
+            continue
+    raise ImportError("No HTML parser backend is available")
+
+
+def iter_org_links(html: str):
+    seen = set()
+    for match in _ORG_HREF_RE.finditer(html):
+        href = match.group(2)
+        if href not in seen:
+            seen.add(href)
+            yield href
+
+
+def extract_embedded_state(html: str) -> dict | None:
+    match = _STATE_SCRIPT_RE.search(html)
+    if not match:
+        return None
+    end = html.find("</script>", match.end())
+    if end == -1:
+        return None
+    try:
+        return json.loads(html[match.end():end])
+    except ValueError as e:
+        print(f"Не удалось разобрать встроенное состояние страницы: {e}")
+        return None
@@ -0,0 +1,196 @@
+import json
+import re
+from datetime import datetime
+
+_ASSIGNMENT_RE = re.compile(r'(?:window\.)?(__INITIAL_STATE__|initialState|__PRELOADED_STATE__)\s*=\s*')
+_JSON_PARSE_RE = re.compile(r'JSON\.parse\(\s*(["\'])')
+_JSON_SCRIPT_RE = re.compile(r'<script[^>]*type="application/(?:ld\+)?json"[^>]*>')
+
+_decoder = json.JSONDecoder()
+
+
+def _decode_at(text: str, start: int):
+    while start < len(text) and text[start].isspace():
+        start += 1
+    try:
+        value, _ = _decoder.raw_decode(text, start)
+        return value
+    except ValueError:
+        return None
+
+
+def _read_js_string(text: str, start: int) -> str | None:
+    quote = text[start]
+    if quote == '"':
+        value = _decode_at(text, start)
+        return value if isinstance(value, str) else None
+
+    end = start + 1
+    while end < len(text):
+        if text[end] == "\\":
+            end += 2
+            continue
+        if text[end] == quote:
+            break
+        end += 1
+    else:
+        return None
+    inner = text[start + 1:end].replace("\\'", "'")
+    inner = re.sub(r'(?<!\\)"', '\\"', inner)
+    return _decode_at('"' + inner + '"', 0)
+
+
+def find_json_payloads(html: str) -> list:
+    payloads = []
+
+    for match in _JSON_SCRIPT_RE.finditer(html):
+        value = _decode_at(html, match.end())
+        if value is not None:
+            payloads.append(value)
+
+    for match in _ASSIGNMENT_RE.finditer(html):
+        value = _decode_at(html, match.end())
+        if value is not None:
+            payloads.append(value)
+
+    for match in _JSON_PARSE_RE.finditer(html):
+        # JSON.parse("...") wraps the state in a JS string literal; decode the literal first
+        literal = _read_js_string(html, match.end() - 1)
+        if literal is not None:
+            try:
+                payloads.append(json.loads(literal))
+            except ValueError:
+                pass
+
+    return payloads
+
+
+def walk(obj):
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            yield current
+            stack.extend(current.values())
+        elif isinstance(current, list):
+            stack.extend(current)
+
+
+def find_first(obj, predicate) -> dict | None:
+    for node in walk(obj):
+        if predicate(node):
+            return node
+    return None
+
+
+def parse_timestamp(value) -> datetime | None:
+    # Naive local time, like parse_date and the DOM path, so dates from both compare and convert alike
+    if value is None or value == "":
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            seconds = value / 1000 if value > 1e11 else value
+            return datetime.fromtimestamp(seconds)
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone().replace(tzinfo=None)
+        return parsed
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def new_card_data(card_url: str) -> dict:
+    return {
+        "url": card_url,
+        "rating": None,
+        "total_reviews": 0,
+        "answered_reviews": 0,
+        "unanswered_reviews": 0,
+        "avg_response_time_seconds": None,
+        "negative_reviews": 0,
+        "positive_reviews": 0,
+        "reviews": []
+    }
+
+
+def add_review(card_data: dict, review_detail: dict, response_times_seconds: list[float]):
+    response = review_detail.get("response")
+    if response:
+        card_data["answered_reviews"] += 1
+        if review_detail.get("date") and response.get("date"):
+            response_times_seconds.append((response["date"] - review_detail["date"]).total_seconds())
+    else:
+        card_data["unanswered_reviews"] += 1
+
+    card_data["reviews"].append(review_detail)
+
+    if review_detail.get("rating") is not None:
+        if review_detail["rating"] <= 3.0:
+            card_data["negative_reviews"] += 1
+        else:
+            card_data["positive_reviews"] += 1
+
+
+def map_2gis_review(raw: dict) -> dict:
+    answer = raw.get("official_answer") or None
+    response = None
+    if answer and answer.get("text"):
+        response = {"text": answer.get("text"), "date": parse_timestamp(answer.get("date_created"))}
+    rating = raw.get("rating")
+    return {
+        "id": str(raw["id"]) if raw.get("id") is not None else None,
+        "rating": float(rating) if rating is not None else None,
+        "text": raw.get("text") or "",
+        "date": parse_timestamp(raw.get("date_created")),
+        "response": response,
+    }
+
+
+def find_2gis_reviews(payload) -> list[dict]:
+    node = find_first(
+        payload, lambda node: isinstance(node.get("reviews"), list) and
+        any(isinstance(review, dict) and "date_created" in review for review in node["reviews"]))
+    return [map_2gis_review(raw) for raw in (node or {}).get("reviews", [])]
+
+
+def map_yandex_review(raw: dict) -> dict:
+    comment = raw.get("businessComment") or None
+    response = None
+    if comment and comment.get("text"):
+        response = {"text": comment.get("text"), "date": parse_timestamp(comment.get("updatedTime"))}
+    rating = raw.get("rating")
+    return {
+        "id": raw.get("reviewId"),
+        "rating": float(rating) if rating is not None else None,
+        "text": raw.get("text") or "",
+        "date": parse_timestamp(raw.get("updatedTime")),
+        "response": response,
+    }
+
+
+def find_yandex_reviews(payload) -> list[dict]:
+    node = find_first(
+        payload, lambda node: isinstance(node.get("reviews"), list) and
+        any(isinstance(review, dict) and "reviewId" in review for review in node["reviews"]))
+    return [map_yandex_review(raw) for raw in (node or {}).get("reviews", [])]
+
+
+def extract_yandex_card(state) -> tuple[dict, list[dict], dict]:
+    rating_node = find_first(
+        state, lambda node: "ratingValue" in node and ("reviewCount" in node or "ratingCount" in node))
+    reviews_node = find_first(
+        state, lambda node: isinstance(node.get("reviews"), list) and
+        any(isinstance(review, dict) and "reviewId" in review for review in node["reviews"]))
+    business_node = find_first(state, lambda node: "businessId" in node or ("id" in node and "seoname" in node))
+
+    summary = {
+        "rating": float(rating_node["ratingValue"]) if rating_node and rating_node.get("ratingValue") else None,
+        "total_reviews": int((rating_node or {}).get("reviewCount") or 0),
+    }
+    reviews = [map_yandex_review(raw) for raw in (reviews_node or {}).get("reviews", [])]
+    paging = {
+        "business_id": (business_node or {}).get("businessId") or (business_node or {}).get("id"),
+        "csrf_token": (find_first(state, lambda node: "csrfToken" in node) or {}).get("csrfToken"),
+        "pages": ((reviews_node or {}).get("params") or {}).get("totalPages") or 1,
+    }
+    return summary, reviews, paging
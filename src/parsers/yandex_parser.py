@@ -1,86 +1,82 @@
+import asyncio
 import time
 import json
 import os
-from urllib.parse import quote_plus, urlparse
+from urllib.parse import quote_plus, urljoin, urlparse, urlencode
 import re
-import requests
-from fake_useragent import UserAgent
-import random
 
-from bs4 import BeautifulSoup
+import numpy as np
 
 from .base_parser import BaseParser
+from .html_backend import get_backend, iter_org_links, extract_embedded_state
+from .json_state import find_json_payloads, extract_yandex_card, find_yandex_reviews, add_review
+from ..aggregation import card_column
+from ..fetcher import FetchEngine
+from ..fingerprints import FingerprintPool
+from ..metrics import COUNT_BUCKETS
+from ..page_cache import PageCache, CacheMiss
+from ..proxy_manager import ProxyManager
+from ..scheduler import INTERACTIVE
+
+SNIPPET_LINK_SELECTOR = ".search-business-snippet-view .search-business-snippet-view__content .link-overlay[role='link']"
+
 
 class YandexParser(BaseParser):
-    def __init__(self, company_name: str, website: str):
-        super().__init__(company_name, website)
+    REVIEWS_API_URL = "https://yandex.ru/maps/api/business/fetchReviews"
+    REVIEWS_PAGE_SIZE = 50
+    MAX_REVIEW_PAGES = 20
+
+    def __init__(self, company_name: str, website: str, fetch_engine: FetchEngine | None = None,
+                 proxy_manager: ProxyManager | None = None, cache: PageCache | None = None,
+                 html_backend: str | None = None, metrics=None, db=None, force: bool = False,
+                 priority: int = INTERACTIVE):
+        super().__init__(None, company_name, website, cache=cache, db=db, metrics=metrics, force=force,
+                         priority=priority)
+        self.website = website
         self.base_url = "https://yandex.ru/maps/"
         self.search_base_url = "https://yandex.ru/maps/"
         self.search_query_template = "search/?text={query}"
+        self.html_backend = get_backend(html_backend)
+        self.fingerprints = FingerprintPool.shared()
         self.headers = self._get_default_headers()
-        self.proxies = self._load_proxies()
-        self.current_proxy = None
-
-    def _get_default_headers(self) -> dict:
-        ua = UserAgent()
-        return {
-            'User-Agent': ua.random,
-            'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'Referer': 'https://yandex.ru/maps/',
-            'Upgrade-Insecure-Requests': '1',
-            'DNT': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'same-origin',
-            'Sec-Fetch-User': '?1',
-        }
-
-    def _load_proxies(self) -> list[str]:
-        proxies_file = "proxies.txt"
+        self.proxy_manager = proxy_manager if proxy_manager is not None else ProxyManager.shared()
+        self.fetch_engine = fetch_engine
+        if self.fetch_engine is None:
+            self.fetch_engine = self._own_fetch_engine = FetchEngine(
+                headers_factory=self._get_default_headers,
+                proxy_manager=self.proxy_manager,
+                cache=cache,
+                platform=self.platform,
+                metrics=self.metrics,
+                priority=priority,
+            )
+
+    def _get_default_headers(self, proxy: str | None = None) -> dict:
+        headers = dict(self.fingerprints.for_key(proxy).headers)
+        headers['Referer'] = 'https://yandex.ru/maps/'
+        headers['DNT'] = '1'
+        return headers
+
+    @staticmethod
+    def _is_valid_html(text: str) -> bool:
+        if not text or "404" in text.lower() or "Page not found" in text:
+            return False
+        return len(text) >= 500
+
+    def _get_html_requests(self, url: str, page_type: str = "card") -> str | None:
         try:
-            with open(proxies_file, "r") as f:
-                proxies = [line.strip() for line in f if line.strip()]
-                return proxies
-        except FileNotFoundError:
-            return []
-        except Exception as e:
-            return []
-
-    def _get_proxy(self) -> dict | None:
-        if self.proxies:
-            proxy = random.choice(self.proxies)
-            return {"http": f"http://{proxy}", "https": f"https://{proxy}"}
-        else:
+            return self.fetch_engine.fetch(url, validator=self._is_valid_html, page_type=page_type)
+        except CacheMiss:
+            print(f"Нет страницы в кэше (режим replay): {url}")
             return None
 
-    def _get_html_requests(self, url: str, retries=3) -> str | None:
-        for attempt in range(retries):
-            proxy = self._get_proxy()
-            headers = self._get_default_headers()
-
-            try:
-                response = requests.get(url, headers=headers, proxies=proxy, timeout=20)
-                response.raise_for_status()
-
-                if not response.text or "404" in response.text.lower() or "Page not found" in response.text:
-                    continue
-
-                if len(response.text) < 500:
-                    continue
-
-                return response.text
-
-            except requests.exceptions.Timeout:
-                pass
-            except requests.exceptions.HTTPError as http_err:
-                pass
-            except requests.exceptions.RequestException as req_err:
-                pass
-            except Exception as e:
-                pass
-
-        return None
+    async def _get_html_async(self, url: str, page_type: str = "card") -> str | None:
+        try:
+            return await self.fetch_engine.fetch_from_any_loop(url, validator=self._is_valid_html,
+                                                               page_type=page_type)
+        except CacheMiss:
+            print(f"Нет страницы в кэше (режим replay): {url}")
+            return None
 
     def search_company_urls(self) -> list[str]:
         search_query_text = f"{self.company_name}"
@@ -91,29 +87,16 @@ class YandexParser(BaseParser):
 
         all_found_urls = set()
 
-        html = self._get_html_requests(search_request_url)
+        html = self._get_html_requests(search_request_url, page_type="search")
         if not html:
             return []
 
-        soup = BeautifulSoup(html, 'html.parser')
+        snippet_links = self.html_backend.select_attr(html, SNIPPET_LINK_SELECTOR, "href")
+        hrefs = snippet_links if snippet_links else iter_org_links(html)
 
-        org_snippets = soup.select('.search-business-snippet-view')
-
-        if not org_snippets:
-            for link_tag in soup.find_all('a', href=True):
-                href = link_tag.get('href')
-                if href and href.startswith('/maps/org/'):
-                    full_url = "https://yandex.ru" + href
-                    all_found_urls.add(full_url)
-        else:
-            for snippet in org_snippets:
-                link_tag = snippet.select_one('.search-business-snippet-view__content .link-overlay[role=\'link\']')
-
-                if link_tag:
-                    href = link_tag.get('href')
-                    if href and href.startswith('/maps/org/'):
-                        full_url = "https://yandex.ru" + href
-                        all_found_urls.add(full_url)
+        for href in hrefs:
+            if href.startswith('/maps/org/'):
+                all_found_urls.add(urljoin(self.base_url, href))
 
         filtered_card_urls = []
         for url in list(all_found_urls):
@@ -128,26 +111,124 @@ class YandexParser(BaseParser):
 
         return unique_card_urls
 
-    def parse_card_data(self, card_url: str) -> dict:
+    def parse_card_data(self, card_url: str, html: str | None = None) -> dict:
         print(f"Парсинг данных с карточки: {card_url}")
-        html = self._get_html_requests(card_url)
+        if html is None:
+            html = self._get_html_requests(card_url)
+        if not html:
+            return {}
+
+        summary, reviews, paging = self._extract_state(html)
+        fingerprint = self._state_fingerprint(summary, reviews)
+        unchanged = self._reuse_unchanged_card(card_url, fingerprint) if fingerprint else None
+        if unchanged is not None:
+            return unchanged
+
+        review_page_urls = self._review_page_urls(paging)
+        self.metrics.observe("card_roundtrips", 1 + len(review_page_urls), COUNT_BUCKETS, platform=self.platform)
+        pages = self.fetch_engine.fetch_many(review_page_urls, page_type="reviews_api") if review_page_urls else []
+        return self._finish_card(card_url, summary, reviews, pages, fingerprint)
+
+    def parse_card_details(self, card_url: str) -> dict | None:
+        return self.parse_card_data(card_url)
+
+    async def parse_card_details_async(self, card_url: str) -> dict | None:
+        html = await self._get_html_async(card_url)
         if not html:
             return {}
 
-        soup = BeautifulSoup(html, 'html.parser')
+        summary, reviews, paging = self._extract_state(html)
+        fingerprint = self._state_fingerprint(summary, reviews)
+        unchanged = self._reuse_unchanged_card(card_url, fingerprint) if fingerprint else None
+        if unchanged is not None:
+            return unchanged
+
+        review_page_urls = self._review_page_urls(paging)
+        self.metrics.observe("card_roundtrips", 1 + len(review_page_urls), COUNT_BUCKETS, platform=self.platform)
+        pages = await asyncio.gather(*(
+            self.fetch_engine.fetch_from_any_loop(url, page_type="reviews_api")
+            for url in review_page_urls), return_exceptions=True)
+        pages = [page if isinstance(page, str) else None for page in pages]
+        return self._finish_card(card_url, summary, reviews, pages, fingerprint)
+
+    def _state_fingerprint(self, summary: dict, reviews: list[dict]) -> str | None:
+        if summary.get("rating") is None:
+            return None
+        # The first review page ships with the card, so new replies to recent reviews change the probe too
+        first_page = ",".join(f"{review['id']}:{int(bool(review.get('response')))}" for review in reviews)
+        return self._card_fingerprint(summary["rating"], summary.get("total_reviews", 0), first_page)
+
+    def _finish_card(self, card_url: str, summary: dict, reviews: list[dict], pages: list[str | None],
+                     fingerprint: str | None) -> dict:
+        card_data = self._build_card_data(card_url, summary, reviews, pages)
+        if fingerprint and None not in pages:
+            self._remember_card(card_data, fingerprint)
+        return card_data
+
+    def _extract_state(self, html: str) -> tuple[dict, list[dict], dict]:
+        state = extract_embedded_state(html)
+        if state is None:
+            payloads = find_json_payloads(html)
+            state = payloads or None
+        if state is None:
+            return {}, [], {}
+        return extract_yandex_card(state)
+
+    def _review_page_urls(self, paging: dict) -> list[str]:
+        if not paging.get("business_id") or paging.get("pages", 1) <= 1:
+            return []
+        urls = []
+        for page in range(2, min(paging["pages"], self.MAX_REVIEW_PAGES) + 1):
+            params = {
+                "ajax": 1,
+                "businessId": paging["business_id"],
+                "csrfToken": paging.get("csrf_token") or "",
+                "page": page,
+                "pageSize": self.REVIEWS_PAGE_SIZE,
+                "ranking": "by_time",
+            }
+            urls.append(f"{self.REVIEWS_API_URL}?{urlencode(params)}")
+        return urls
+
+    def _build_card_data(self, card_url: str, summary: dict, reviews: list[dict], pages: list[str | None]) -> dict:
         card_data = {"url": card_url}
 
         card_data["company_name"] = self.company_name
-        card_data["rating"] = 0.0
-        card_data["reviews_count"] = 0
+        card_data["rating"] = summary.get("rating")
+        card_data["reviews_count"] = summary.get("total_reviews", 0)
         card_data["address"] = "N/A"
         card_data["working_hours"] = "N/A"
         card_data["reviews"] = []
-        card_data["total_reviews"] = 0
+        card_data["total_reviews"] = summary.get("total_reviews", 0)
         card_data["answered_reviews"] = 0
         card_data["unanswered_reviews"] = 0
+        card_data["negative_reviews"] = 0
+        card_data["positive_reviews"] = 0
+        card_data["avg_response_time_seconds"] = None
         card_data["response_time"] = "N/A"
 
+        for page in pages:
+            if not page:
+                continue
+            try:
+                reviews.extend(find_yandex_reviews(json.loads(page)))
+            except ValueError as e:
+                print(f"Не удалось разобрать страницу отзывов Яндекса: {e}")
+
+        seen_ids = set()
+        response_times_seconds = []
+        for review in reviews:
+            # Reviews without an id cannot be matched across pages, so each one counts
+            if review["id"] is not None:
+                if review["id"] in seen_ids:
+                    continue
+                seen_ids.add(review["id"])
+            add_review(card_data, review, response_times_seconds)
+
+        if response_times_seconds:
+            card_data["avg_response_time_seconds"] = sum(response_times_seconds) / len(response_times_seconds)
+            card_data["response_time"] = f"{card_data['avg_response_time_seconds'] / (60 * 60 * 24):.2f} дн."
+
         return card_data
 
     def analyze_cards(self) -> dict:
@@ -156,14 +237,13 @@ class YandexParser(BaseParser):
         if not card_urls:
             return {"error": f"Карточки для '{self.company_name}' не найдены на Яндекс."}
 
-        all_cards_data = []
         MAX_CARDS_TO_PARSE = 5
+        card_urls = card_urls[:MAX_CARDS_TO_PARSE]
 
-        for i, url in enumerate(card_urls):
-            if i >= MAX_CARDS_TO_PARSE:
-                break
-
-            card_data = self.parse_card_data(url)
+        pages = self.fetch_engine.fetch_many(card_urls, validator=self._is_valid_html, page_type="card")
+        all_cards_data = []
+        for url, html in zip(card_urls, pages):
+            card_data = self.parse_card_data(url, html or "")
             if card_data:
                 all_cards_data.append(card_data)
 
@@ -194,10 +274,11 @@ class YandexParser(BaseParser):
         if not cards_data:
             return aggregated_result
 
-        overall_rating_sum = sum(card.get("rating", 0.0) for card in cards_data if card.get("rating") is not None)
-        aggregated_result["average_rating"] = round(overall_rating_sum / total_cards, 1) if total_cards > 0 else 0.0
-        aggregated_result["total_reviews"] = sum(card.get("reviews_count", 0) for card in cards_data)
-        aggregated_result["answered_reviews"] = sum(card.get("answered_reviews", 0) for card in cards_data)
+        ratings = card_column(cards_data, "rating", np.nan)
+        rated = ~np.isnan(ratings)
+        aggregated_result["average_rating"] = round(float(ratings[rated].mean()), 1) if rated.any() else 0.0
+        aggregated_result["total_reviews"] = int(card_column(cards_data, "reviews_count").sum())
+        aggregated_result["answered_reviews"] = int(card_column(cards_data, "answered_reviews").sum())
         aggregated_result["unanswered_reviews"] = aggregated_result["total_reviews"] - aggregated_result["answered_reviews"]
 
         for card in cards_data:
@@ -0,0 +1,181 @@
+import asyncio
+import os
+import random
+import threading
+import time
+
+CAPTCHA_MARKERS = ("showcaptcha", "smartcaptcha", "checkcaptcha")
+BAN_STATUS_CODES = (403, 429)
+
+
+class ProxyStats:
+    def __init__(self, address: str):
+        self.address = address
+        self.latency = None
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.recent_starts: list[float] = []
+
+    @property
+    def success_rate(self) -> float:
+        # Laplace smoothing so fresh proxies get a fair chance
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    def weight(self) -> float:
+        latency = self.latency if self.latency is not None else 1.0
+        return self.success_rate ** 2 / max(latency, 0.05)
+
+
+class ProxyManager:
+    _shared: dict[str, "ProxyManager"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, proxies: list[str], max_concurrency: int = 4, max_requests_per_minute: int = 60,
+                 base_cooldown: float = 30, max_cooldown: float = 30 * 60, latency_alpha: float = 0.3):
+        self.max_concurrency = max_concurrency
+        self.max_requests_per_minute = max_requests_per_minute
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.latency_alpha = latency_alpha
+        self._stats = {proxy: ProxyStats(proxy) for proxy in dict.fromkeys(proxies)}
+        self._lock = threading.Condition()
+
+    @classmethod
+    def from_file(cls, filepath: str = "proxies.txt", **kwargs) -> "ProxyManager":
+        proxies = []
+        if not os.path.exists(filepath):
+            print(f"Proxy file not found: {filepath}")
+            return cls(proxies, **kwargs)
+        try:
+            with open(filepath, "r") as f:
+                proxies = [line.strip() for line in f if line.strip()]
+        except Exception as e:
+            print(f"Error loading proxies from {filepath}: {e}")
+        return cls(proxies, **kwargs)
+
+    @classmethod
+    def shared(cls, filepath: str = "proxies.txt") -> "ProxyManager":
+        key = os.path.abspath(filepath)
+        with cls._shared_lock:
+            manager = cls._shared.get(key)
+            if manager is None:
+                manager = cls._shared[key] = cls.from_file(filepath)
+            return manager
+
+    def __len__(self):
+        return len(self._stats)
+
+    def _available(self, now: float) -> list[ProxyStats]:
+        window_start = now - 60
+        available = []
+        for stats in self._stats.values():
+            stats.recent_starts = [t for t in stats.recent_starts if t > window_start]
+            if stats.cooldown_until > now:
+                continue
+            if stats.in_flight >= self.max_concurrency:
+                continue
+            if len(stats.recent_starts) >= self.max_requests_per_minute:
+                continue
+            available.append(stats)
+        return available
+
+    def try_acquire(self) -> str | None:
+        with self._lock:
+            now = time.monotonic()
+            candidates = self._available(now)
+            if not candidates:
+                return None
+            chosen = random.choices(candidates, weights=[s.weight() for s in candidates])[0]
+            chosen.in_flight += 1
+            chosen.recent_starts.append(now)
+            return chosen.address
+
+    def acquire(self, timeout: float | None = None) -> str | None:
+        if not self._stats:
+            return None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                proxy = self.try_acquire()
+                if proxy is not None:
+                    return proxy
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._lock.wait(min(1.0, remaining) if remaining is not None else 1.0)
+
+    async def acquire_async(self, timeout: float | None = None) -> str | None:
+        if not self._stats:
+            return None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            proxy = self.try_acquire()
+            if proxy is not None:
+                return proxy
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(0.2)
+
+    def pick(self) -> str | None:
+        # For long-lived users such as a browser session: chosen by health, not held as in-flight
+        proxy = self.try_acquire()
+        if proxy is not None:
+            self.release(proxy)
+        return proxy
+
+    def release(self, proxy: str):
+        with self._lock:
+            stats = self._stats.get(proxy)
+            if stats is not None and stats.in_flight > 0:
+                stats.in_flight -= 1
+            self._lock.notify_all()
+
+    def report_success(self, proxy: str, latency: float):
+        with self._lock:
+            stats = self._stats.get(proxy)
+            if stats is None:
+                return
+            stats.successes += 1
+            stats.consecutive_failures = 0
+            if stats.latency is None:
+                stats.latency = latency
+            else:
+                stats.latency = self.latency_alpha * latency + (1 - self.latency_alpha) * stats.latency
+
+    def report_failure(self, proxy: str, banned: bool = False):
+        with self._lock:
+            stats = self._stats.get(proxy)
+            if stats is None:
+                return
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            if banned or stats.consecutive_failures >= 3:
+                cooldown = min(self.max_cooldown, self.base_cooldown * (2 ** (stats.consecutive_failures - 1)))
+                stats.cooldown_until = time.monotonic() + cooldown
+                print(f"Прокси {proxy} отправлен в карантин на {cooldown:.0f} с")
+
+    @staticmethod
+    def is_ban_response(status_code: int | None, text: str | None) -> bool:
+        if status_code in BAN_STATUS_CODES:
+            return True
+        if text:
+            lowered = text[:20000].lower()
+            return any(marker in lowered for marker in CAPTCHA_MARKERS)
+        return False
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            now = time.monotonic()
+            return [
+                {
+                    "proxy": s.address,
+                    "latency": s.latency,
+                    "success_rate": round(s.success_rate, 3),
+                    "in_flight": s.in_flight,
+                    "quarantined_for": max(0.0, s.cooldown_until - now),
+                }
+                for s in self._stats.values()
+            ]
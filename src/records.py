@@ -0,0 +1,112 @@
+import sys
+from datetime import datetime
+
+
+def _to_ts(value: datetime | None) -> int | None:
+    return int(value.timestamp()) if value is not None else None
+
+
+def _from_ts(value: int | None) -> datetime | None:
+    return datetime.fromtimestamp(value) if value is not None else None
+
+
+class Response:
+    __slots__ = ("text", "date")
+
+    def __init__(self, text: str | None, date: int | None):
+        self.text = text
+        self.date = date
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "Response | None":
+        if not data:
+            return None
+        return cls(data.get("text"), _to_ts(data.get("date")))
+
+    def to_dict(self) -> dict:
+        return {"text": self.text, "date": _from_ts(self.date)}
+
+
+class Review:
+    __slots__ = ("id", "rating", "text", "date", "response")
+
+    def __init__(self, id: str | None, rating: float | None, text: str | None, date: int | None,
+                 response: Response | None):
+        self.id = id
+        self.rating = rating
+        self.text = text
+        self.date = date
+        self.response = response
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Review":
+        return cls(data.get("id"), data.get("rating"), data.get("text"), _to_ts(data.get("date")),
+                   Response.from_dict(data.get("response")))
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "rating": self.rating,
+            "text": self.text,
+            "date": _from_ts(self.date),
+            "response": self.response.to_dict() if self.response is not None else None,
+        }
+
+
+class Card:
+    FIELDS = ("url", "rating", "total_reviews", "answered_reviews", "unanswered_reviews",
+              "avg_response_time_seconds", "negative_reviews", "positive_reviews", "reviews")
+
+    __slots__ = FIELDS + ("platform", "extra")
+
+    def __init__(self, platform: str, url: str, rating: float | None = None, total_reviews: int = 0,
+                 answered_reviews: int = 0, unanswered_reviews: int = 0,
+                 avg_response_time_seconds: float | None = None, negative_reviews: int = 0,
+                 positive_reviews: int = 0, reviews: list[Review] | None = None, extra: dict | None = None):
+        self.platform = sys.intern(platform)
+        self.url = sys.intern(url) if url else url
+        self.rating = rating
+        self.total_reviews = total_reviews
+        self.answered_reviews = answered_reviews
+        self.unanswered_reviews = unanswered_reviews
+        self.avg_response_time_seconds = avg_response_time_seconds
+        self.negative_reviews = negative_reviews
+        self.positive_reviews = positive_reviews
+        self.reviews = reviews if reviews is not None else []
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, platform: str, data: dict) -> "Card":
+        extra = {key: value for key, value in data.items() if key not in cls.FIELDS}
+        return cls(
+            platform,
+            data.get("url"),
+            data.get("rating"),
+            data.get("total_reviews", 0),
+            data.get("answered_reviews", 0),
+            data.get("unanswered_reviews", 0),
+            data.get("avg_response_time_seconds"),
+            data.get("negative_reviews", 0),
+            data.get("positive_reviews", 0),
+            [Review.from_dict(review) for review in data.get("reviews", [])],
+            extra,
+        )
+
+    def get(self, key: str, default=None):
+        # Read-only dict access so aggregation and reporting code accepts cards and records alike
+        if key in self.FIELDS:
+            return getattr(self, key)
+        return (self.extra or {}).get(key, default)
+
+    def drop_text(self):
+        for review in self.reviews:
+            review.text = None
+            if review.response is not None:
+                review.response.text = None
+
+    def to_dict(self) -> dict:
+        data = {field: getattr(self, field) for field in self.FIELDS if field != "reviews"}
+        data["reviews"] = [review.to_dict() for review in self.reviews]
+        if self.extra:
+            data.update(self.extra)
+        return data
@@ -0,0 +1,293 @@
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+from .metrics import Metrics
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+# Starting requests per second and burst per host suffix; rates then adapt to throttling feedback
+HOST_LIMITS = {
+    "yandex.ru": (1.0, 3),
+    "2gis.ru": (1.0, 3),
+    "reviews.2gis.com": (3.0, 6),
+}
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "min_rate", "max_rate", "step", "tokens", "updated", "paused_until")
+
+    def __init__(self, rate: float, burst: int, min_rate: float, max_rate: float, step: float):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.step = step
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def delay(self, now: float) -> float:
+        if now < self.paused_until:
+            return self.paused_until - now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def slow_down(self, now: float, factor: float, pause: float | None = None):
+        # Multiplicative decrease, and nothing goes out until the host has had a breather
+        self.rate = max(self.min_rate, self.rate * factor)
+        self.tokens = min(self.tokens, 0.0)
+        self.updated = now
+        self.paused_until = max(self.paused_until, now + (pause if pause is not None else 1 / self.rate))
+
+    def speed_up(self):
+        self.rate = min(self.max_rate, self.rate + self.step)
+
+
+class Ticket:
+    __slots__ = ("host", "proxy", "priority", "granted_at")
+
+    def __init__(self, host: str, proxy: str | None, priority: int, granted_at: float):
+        self.host = host
+        self.proxy = proxy
+        self.priority = priority
+        self.granted_at = granted_at
+
+
+class RequestScheduler:
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_concurrency: int = 16, interactive_reserve: int = 4, host_rate: float = 2.0,
+                 host_burst: int = 4, proxy_rate: float = 1.0, proxy_burst: int = 2, max_rate_factor: float = 4.0,
+                 min_rate: float = 0.05, backoff_factor: float = 0.5, recovery_share: float = 0.05,
+                 poll_interval: float = 0.05, host_limits: dict | None = None, metrics: Metrics | None = None):
+        self.max_concurrency = max_concurrency
+        self.interactive_reserve = min(interactive_reserve, max_concurrency - 1)
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.proxy_rate = proxy_rate
+        self.proxy_burst = proxy_burst
+        self.max_rate_factor = max_rate_factor
+        self.min_rate = min_rate
+        self.backoff_factor = backoff_factor
+        self.recovery_share = recovery_share
+        self.poll_interval = poll_interval
+        self.host_limits = dict(HOST_LIMITS if host_limits is None else host_limits)
+        self.metrics = metrics or Metrics.shared()
+        self._hosts: dict[str, TokenBucket] = {}
+        self._proxies: dict[str, TokenBucket] = {}
+        self._in_flight = 0
+        self._interactive_waiting: dict[str, int] = {}
+        self._waiting = 0
+        self._cond = threading.Condition()
+        self.board = None
+        self._board_posts: dict[str, int] = {}
+
+    @classmethod
+    def shared(cls) -> "RequestScheduler":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return (urlsplit(url).hostname or url).lower()
+
+    def set_host_limit(self, host: str, rate: float, burst: int | None = None):
+        with self._cond:
+            self.host_limits[host] = (rate, burst or self.host_burst)
+            for name in [name for name in self._hosts if name == host or name.endswith("." + host)]:
+                del self._hosts[name]
+            self._cond.notify_all()
+
+    def scale(self, factor: float):
+        # Workers in separate processes split one budget between them
+        with self._cond:
+            self.host_rate *= factor
+            self.proxy_rate *= factor
+            self.host_limits = {host: (rate * factor, burst) for host, (rate, burst) in self.host_limits.items()}
+            self._hosts.clear()
+            self._proxies.clear()
+
+    def share_priorities(self, board):
+        # Interactive waiters are posted to a board other processes read, so their batch requests hold back too
+        with self._cond:
+            self.board = board
+
+    def _limit_for(self, host: str) -> tuple[float, int]:
+        for suffix, limit in self.host_limits.items():
+            if host == suffix or host.endswith("." + suffix):
+                return limit
+        return self.host_rate, self.host_burst
+
+    def _bucket(self, buckets: dict, key: str, rate: float, burst: int) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(rate, burst, min(self.min_rate, rate), rate * self.max_rate_factor,
+                                                rate * self.recovery_share)
+        return bucket
+
+    def _buckets(self, host: str, proxy: str | None) -> list[TokenBucket]:
+        buckets = [self._bucket(self._hosts, host, *self._limit_for(host))]
+        if proxy:
+            buckets.append(self._bucket(self._proxies, proxy, self.proxy_rate, self.proxy_burst))
+        return buckets
+
+    def _try_grant(self, host: str, proxy: str | None, priority: int) -> tuple[Ticket | None, float]:
+        # Called under the lock; returns a ticket or how long to sleep before checking again
+        limit = self.max_concurrency if priority == INTERACTIVE else self.max_concurrency - self.interactive_reserve
+        if self._in_flight >= limit:
+            return None, self.poll_interval
+        if priority != INTERACTIVE and (self._interactive_waiting.get(host) or
+                                        (self.board is not None and self.board.waiting(host))):
+            # Interactive lookups get the next token for a host before any batch refresh does
+            return None, self.poll_interval
+        now = time.monotonic()
+        buckets = self._buckets(host, proxy)
+        delay = max(bucket.delay(now) for bucket in buckets)
+        if delay > 0:
+            return None, delay
+        for bucket in buckets:
+            bucket.take()
+        self._in_flight += 1
+        return Ticket(host, proxy, priority, now), 0.0
+
+    def _post_waiter(self, host: str, delay: float) -> float:
+        # Called under the lock once an interactive request has to wait; one renewed post per host and process
+        if self.board is None:
+            return delay
+        if host not in self._board_posts:
+            self._board_posts[host] = self.board.post(host)
+        self.board.renew()
+        # Posts expire unless renewed, so a long wait wakes up in time to renew them
+        return min(delay, self.board.ttl / 3)
+
+    def _enter(self, host: str, priority: int):
+        self._waiting += 1
+        if priority == INTERACTIVE:
+            self._interactive_waiting[host] = self._interactive_waiting.get(host, 0) + 1
+
+    def _leave(self, host: str, priority: int, ticket: Ticket | None, started: float):
+        self._waiting -= 1
+        if priority == INTERACTIVE:
+            self._interactive_waiting[host] -= 1
+            if not self._interactive_waiting[host]:
+                del self._interactive_waiting[host]
+                if host in self._board_posts:
+                    self.board.remove(self._board_posts.pop(host))
+            self._cond.notify_all()
+        name = PRIORITY_NAMES.get(priority, str(priority))
+        if ticket is None:
+            self.metrics.inc("scheduler_timeouts_total", priority=name)
+        else:
+            self.metrics.observe("scheduler_wait_seconds", ticket.granted_at - started, priority=name)
+
+    def acquire(self, url: str, proxy: str | None = None, priority: int = BATCH,
+                timeout: float | None = None) -> Ticket | None:
+        host = self.host_of(url)
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        ticket = None
+        with self._cond:
+            self._enter(host, priority)
+            try:
+                while True:
+                    ticket, delay = self._try_grant(host, proxy, priority)
+                    if ticket is not None:
+                        return ticket
+                    if priority == INTERACTIVE:
+                        delay = self._post_waiter(host, delay)
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return None
+                        delay = min(delay, remaining)
+                    self._cond.wait(delay)
+            finally:
+                self._leave(host, priority, ticket, started)
+
+    async def acquire_async(self, url: str, proxy: str | None = None, priority: int = BATCH,
+                            timeout: float | None = None) -> Ticket | None:
+        host = self.host_of(url)
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        ticket = None
+        with self._cond:
+            self._enter(host, priority)
+        try:
+            while True:
+                with self._cond:
+                    ticket, delay = self._try_grant(host, proxy, priority)
+                    if ticket is None and priority == INTERACTIVE:
+                        delay = self._post_waiter(host, delay)
+                if ticket is not None:
+                    return ticket
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    delay = min(delay, remaining)
+                await asyncio.sleep(min(delay, self.poll_interval * 4))
+        finally:
+            with self._cond:
+                self._leave(host, priority, ticket, started)
+
+    def release(self, ticket: Ticket | None, throttled: bool | None = False, retry_after: float | None = None):
+        # throttled=None frees the slot without a rate signal, e.g. after a network error
+        if ticket is None:
+            return
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self._slow_down(ticket.host, ticket.proxy, retry_after)
+            elif throttled is not None:
+                for bucket in self._buckets(ticket.host, ticket.proxy):
+                    bucket.speed_up()
+            self._cond.notify_all()
+
+    def reward(self, url: str, proxy: str | None = None):
+        # Success signal for requests released with throttled=None, once their response proved usable
+        with self._cond:
+            for bucket in self._buckets(self.host_of(url), proxy):
+                bucket.speed_up()
+            self._cond.notify_all()
+
+    def throttle(self, url: str, proxy: str | None = None, retry_after: float | None = None):
+        with self._cond:
+            self._slow_down(self.host_of(url), proxy, retry_after)
+            self._cond.notify_all()
+
+    def _slow_down(self, host: str, proxy: str | None, retry_after: float | None):
+        now = time.monotonic()
+        buckets = self._buckets(host, proxy)
+        for bucket in buckets:
+            bucket.slow_down(now, self.backoff_factor, retry_after)
+        self.metrics.inc("scheduler_throttled_total", host=host)
+        print(f"Снижаю темп запросов к {host}: {buckets[0].rate:.2f} запр./с")
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "hosts": {host: round(bucket.rate, 3) for host, bucket in self._hosts.items()},
+                "proxies": {proxy: round(bucket.rate, 3) for proxy, bucket in self._proxies.items()},
+            }
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
@@ -0,0 +1,373 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from .fingerprints import FingerprintPool, FingerprintProfile
+from .proxy_manager import ProxyManager
+
+
+RESOURCE_CATEGORIES = {
+    "images": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*"],
+    "fonts": ["*.woff*", "*.ttf*", "*.otf*", "*.eot*"],
+    "media": ["*.mp4*", "*.webm*", "*.mp3*"],
+    "map_tiles": ["*tile*.maps.2gis.com/*", "*.pbf*", "*core-renderer-tiles.maps.yandex.net/*",
+                  "*core-jams-rdr*.maps.yandex.net/*", "*/tiles?*"],
+    "analytics": ["*google-analytics.com/*", "*googletagmanager.com/*", "*mc.yandex.ru/*", "*doubleclick.net/*",
+                  "*top-fwz1.mail.ru/*", "*stat.2gis.ru/*", "*an.yandex.ru/*", "*yandex.ru/clck/*"],
+}
+
+# URLs that must keep working for a platform; any blocked pattern matching one of them is dropped
+BLOCK_PROFILES = {
+    "none": {"block": [], "allow": []},
+    "gis2": {
+        "block": ["images", "fonts", "media", "map_tiles", "analytics"],
+        "allow": ["https://catalog.api.2gis.ru/3.0/items/byid?key=x",
+                  "https://public-api.reviews.2gis.com/2.0/branches/1/reviews?key=x"],
+    },
+    "yandex": {
+        "block": ["images", "fonts", "media", "map_tiles", "analytics"],
+        "allow": ["https://yandex.ru/maps/api/business/fetchReviews?ajax=1",
+                  "https://yandex.ru/maps/api/search?ajax=1"],
+    },
+}
+
+
+@lru_cache(maxsize=256)
+def _compile_block_pattern(pattern: str) -> re.Pattern:
+    # Network.setBlockedURLs knows only '*'; '?' and '[' are literal characters there, unlike in fnmatch
+    return re.compile(".*".join(re.escape(part) for part in pattern.split("*")), re.DOTALL)
+
+
+def matches_block_pattern(url: str, pattern: str) -> bool:
+    return _compile_block_pattern(pattern).fullmatch(url) is not None
+
+
+def blocked_url_patterns(profile: str) -> list[str]:
+    config = BLOCK_PROFILES[profile]
+    patterns = []
+    for category in config["block"]:
+        for pattern in RESOURCE_CATEGORIES[category]:
+            if not any(matches_block_pattern(url, pattern) for url in config["allow"]):
+                patterns.append(pattern)
+    return patterns
+
+
+def apply_block_profile(driver: WebDriver, profile: str):
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {"urls": blocked_url_patterns(profile)})
+
+
+def drain_traffic(driver: WebDriver) -> dict:
+    stats = {"requests": 0, "blocked": 0, "bytes": 0}
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return stats
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        method = message.get("method")
+        params = message.get("params", {})
+        if method == "Network.requestWillBeSent":
+            stats["requests"] += 1
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            stats["blocked"] += 1
+        elif method == "Network.loadingFinished":
+            stats["bytes"] += int(params.get("encodedDataLength") or 0)
+    return stats
+
+
+def setup_driver(proxy_manager: ProxyManager | None = None, block_profile: str = "gis2"):
+    options = webdriver.ChromeOptions()
+    # options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.page_load_strategy = "eager"
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    if proxy_manager is not None:
+        proxy = proxy_manager.pick()
+        if proxy:
+            options.add_argument(f'--proxy-server={proxy}')
+            print(f"Using proxy: {proxy}")
+
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    driver_path = os.path.join(project_dir, 'chromedriver.exe')
+
+    if not os.path.exists(driver_path):
+        raise FileNotFoundError(
+            f"ChromeDriver not found at {driver_path}. Please ensure it's in the project root or specify the correct path.")
+
+    service = Service(executable_path=driver_path)
+    driver = webdriver.Chrome(service=service, options=options)
+    if block_profile != "none":
+        apply_block_profile(driver, block_profile)
+    return driver
+
+
+class DriverSession:
+    def __init__(self, driver: WebDriver, fingerprint: FingerprintProfile):
+        self.driver = driver
+        self.fingerprint = fingerprint
+        self.user_agent = fingerprint.user_agent
+        self.pages = 0
+        self.leases = 0
+        self.broken = False
+        self.created_at = time.monotonic()
+        self.traffic = {"requests": 0, "blocked": 0, "bytes": 0}
+
+    def note_page(self):
+        self.pages += 1
+
+    def note_traffic(self, stats: dict):
+        for key, value in stats.items():
+            self.traffic[key] = self.traffic.get(key, 0) + value
+
+    def mark_broken(self):
+        self.broken = True
+
+
+class DriverPool:
+    def __init__(self, driver_factory, size: int = 2, max_pages_per_session: int = 200,
+                 fingerprints: FingerprintPool | None = None):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.driver_factory = driver_factory
+        self.size = size
+        self.max_pages_per_session = max_pages_per_session
+        self.fingerprints = fingerprints or FingerprintPool.shared()
+        self._idle: list[DriverSession] = []
+        self._sessions: set[DriverSession] = set()
+        self._reserved = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def warm_up(self, count: int | None = None):
+        count = self.size if count is None else min(count, self.size)
+        sessions = []
+        try:
+            while len(sessions) < count:
+                with self._cond:
+                    if len(self._sessions) + self._reserved >= count:
+                        break
+                sessions.append(self.acquire())
+        finally:
+            for session in sessions:
+                self.release(session)
+
+    def acquire(self, timeout: float | None = None) -> DriverSession:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Driver pool is closed")
+                if self._idle:
+                    session = self._idle.pop()
+                    break
+                if len(self._sessions) + self._reserved < self.size:
+                    self._reserved += 1
+                    session = None
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No free driver session within {timeout} s")
+                self._cond.wait(remaining)
+
+        if session is None:
+            try:
+                session = self._create_session()
+            except Exception:
+                with self._cond:
+                    self._reserved -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._reserved -= 1
+                self._sessions.add(session)
+
+        session.leases += 1
+        return session
+
+    def release(self, session: DriverSession, broken: bool = False):
+        if broken:
+            session.mark_broken()
+
+        recycle = session.broken or session.pages >= self.max_pages_per_session or self._closed
+        if not recycle:
+            try:
+                self._reset_session(session)
+            except Exception as e:
+                print(f"Не удалось сбросить сессию браузера, пересоздаю: {e}")
+                recycle = True
+
+        if recycle:
+            self._discard(session)
+            return
+
+        with self._cond:
+            self._idle.append(session)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout: float | None = None):
+        session = self.acquire(timeout)
+        broken = False
+        try:
+            yield session
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.release(session, broken=broken)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = self._idle
+            self._idle = []
+            self._cond.notify_all()
+        for session in idle:
+            self._discard(session)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self.size,
+                "live": len(self._sessions),
+                "idle": len(self._idle),
+                "busy": len(self._sessions) - len(self._idle),
+            }
+
+    def _create_session(self) -> DriverSession:
+        driver = self.driver_factory()
+        fingerprint = self.fingerprints.next(chromium=True)
+        try:
+            driver.execute_cdp_cmd('Network.setUserAgentOverride', fingerprint.cdp_override())
+        except Exception:
+            driver.quit()
+            raise
+        return DriverSession(driver, fingerprint)
+
+    def _reset_session(self, session: DriverSession):
+        driver = session.driver
+        session.note_traffic(drain_traffic(driver))
+        origin = driver.execute_script("return window.location.origin")
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        if origin and origin.startswith("http"):
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {"origin": origin, "storageTypes": "all"})
+        driver.get("about:blank")
+        if session.user_agent != session.fingerprint.user_agent:
+            driver.execute_cdp_cmd('Network.setUserAgentOverride', session.fingerprint.cdp_override())
+            session.user_agent = session.fingerprint.user_agent
+
+    def _discard(self, session: DriverSession):
+        with self._cond:
+            self._sessions.discard(session)
+            self._cond.notify()
+        try:
+            session.driver.quit()
+        except Exception as e:
+            print(f"Ошибка при закрытии браузера: {e}")
+
+
+SCROLL_AND_WAIT_JS = """
+const [container, itemSelector, previousCount, settleMs, waitMs, done] = arguments;
+const count = () => container.querySelectorAll(itemSelector).length;
+
+let scroller = container;
+while (scroller && scroller !== document.body) {
+    const style = getComputedStyle(scroller);
+    if (/(auto|scroll)/.test(style.overflowY) && scroller.scrollHeight > scroller.clientHeight) {
+        break;
+    }
+    scroller = scroller.parentElement;
+}
+if (!scroller || scroller === document.body) {
+    scroller = document.scrollingElement;
+}
+
+let settleTimer = null;
+let finished = false;
+const observer = new MutationObserver(() => {
+    if (count() > previousCount) {
+        clearTimeout(settleTimer);
+        settleTimer = setTimeout(finish, settleMs);
+    }
+});
+const giveUpTimer = setTimeout(finish, waitMs);
+
+function finish() {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(settleTimer);
+    clearTimeout(giveUpTimer);
+    done(count());
+}
+
+observer.observe(container, {childList: true, subtree: true});
+scroller.scrollTop = scroller.scrollHeight;
+if (count() > previousCount) {
+    settleTimer = setTimeout(finish, settleMs);
+}
+"""
+
+
+class ScrollLoader:
+    def __init__(self, driver: WebDriver, container, item_selector: str, settle_ms: int = 250,
+                 wait_ms: int = 5000, max_scrolls: int = 50):
+        self.driver = driver
+        self.container = container
+        self.item_selector = item_selector
+        self.settle_ms = settle_ms
+        self.wait_ms = wait_ms
+        self.max_scrolls = max_scrolls
+        self.yields: list[int] = []
+
+    def count(self) -> int:
+        return self.driver.execute_script(
+            "return arguments[0].querySelectorAll(arguments[1]).length", self.container, self.item_selector)
+
+    def load(self, target_count: int | None = None, stop_when=None) -> int:
+        # Pooled sessions outlive this loader, so the driver gets its own script timeout back
+        previous_timeout = self.driver.timeouts.script
+        self.driver.set_script_timeout(self.wait_ms / 1000 + 5)
+        try:
+            return self._load(target_count, stop_when)
+        finally:
+            self.driver.set_script_timeout(previous_timeout)
+
+    def _load(self, target_count: int | None, stop_when) -> int:
+        self.yields = []
+        count = self.count()
+
+        for _ in range(self.max_scrolls):
+            if target_count is not None and count >= target_count:
+                break
+            if stop_when is not None and stop_when():
+                break
+            new_count = self.driver.execute_async_script(
+                SCROLL_AND_WAIT_JS, self.container, self.item_selector, count, self.settle_ms, self.wait_ms)
+            self.yields.append(new_count - count)
+            if new_count <= count:
+                break
+            count = new_count
+
+        return count
@@ -0,0 +1,68 @@
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+MONTHS = {
+    "января": 1, "февраля": 2, "марта": 3, "апреля": 4,
+    "мая": 5, "июня": 6, "июля": 7, "августа": 8,
+    "сентября": 9, "октября": 10, "ноября": 11, "декабря": 12
+}
+
+_RELATIVE_RE = re.compile(r"^(\d+)\s+(минут[уы]?|час[аов]*|дн[яей]+|день)\s+назад")
+_TODAY_RE = re.compile(r"^сегодня(?:\s*,?\s*(?:в\s+)?(\d{1,2}):(\d{2}))?")
+_TEXT_DATE_RE = re.compile(r"^(\d{1,2})\s+([а-яё]+)(?:\s+(\d{4}))?")
+_DOTTED_DATE_RE = re.compile(r"^(\d{1,2})\.(\d{1,2})(?:\.(\d{4}))?$")
+
+_RELATIVE_UNITS = {"м": "minutes", "ч": "hours", "д": "days"}
+
+
+@lru_cache(maxsize=65536)
+def _tokenize(raw: str) -> tuple | None:
+    date_str = raw.lower().strip()
+
+    match = _RELATIVE_RE.match(date_str)
+    if match:
+        return "relative", _RELATIVE_UNITS[match.group(2)[0]], int(match.group(1))
+
+    match = _TODAY_RE.match(date_str)
+    if match:
+        if match.group(1):
+            return "today", int(match.group(1)), int(match.group(2))
+        return "today", 0, 0
+
+    match = _TEXT_DATE_RE.match(date_str)
+    if match:
+        month = MONTHS.get(match.group(2))
+        if month:
+            return "absolute", int(match.group(1)), month, int(match.group(3)) if match.group(3) else None
+
+    match = _DOTTED_DATE_RE.match(date_str)
+    if match:
+        return "absolute", int(match.group(1)), int(match.group(2)), int(match.group(3)) if match.group(3) else None
+
+    return None
+
+
+def parse_date(date_str: str, now: datetime | None = None) -> datetime | None:
+    try:
+        tokens = _tokenize(date_str)
+        if tokens is None:
+            return None
+
+        now = now or datetime.now()
+        kind = tokens[0]
+        if kind == "absolute":
+            _, day, month, year = tokens
+            return datetime(year or now.year, month, day)
+        if kind == "relative":
+            return now - timedelta(**{tokens[1]: tokens[2]})
+        return now.replace(hour=tokens[1], minute=tokens[2], second=0, microsecond=0)
+
+    except Exception as e:
+        print(f"Не удалось разобрать дату: '{date_str}'. Ошибка: {e}")
+        return None
+
+
+def parse_dates(date_strings: list[str], now: datetime | None = None) -> list[datetime | None]:
+    now = now or datetime.now()
+    return [parse_date(date_str, now) for date_str in date_strings]
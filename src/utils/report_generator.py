@@ -0,0 +1,155 @@
+import csv
+import json
+from datetime import datetime
+from functools import lru_cache
+from html import escape
+from itertools import islice
+from pathlib import Path
+from string import Template
+
+from ..aggregation import summarize_cards
+from ..records import Review
+
+TEMPLATE_PATH = Path(__file__).resolve().parents[2] / "static" / "report.html"
+CONTENT_MARKER = "<!-- content -->"
+
+SUMMARY_FIELDS = (
+    ("card_count", "Карточек"),
+    ("overall_rating", "Средний рейтинг"),
+    ("total_reviews_count", "Всего отзывов"),
+    ("answered_reviews_count", "С ответом"),
+    ("unanswered_reviews_count", "Без ответа"),
+    ("negative_reviews_count", "Негативных"),
+    ("positive_reviews_count", "Позитивных"),
+    ("avg_response_time_days", "Среднее время ответа, дней"),
+)
+REVIEW_COLUMNS = ("review_id", "rating", "date", "text", "response_text", "response_date")
+CSV_COLUMNS = ("platform", "card_url", "card_rating") + REVIEW_COLUMNS
+
+SECTION_HTML = Template('<h2>$platform</h2>\n<table>\n$rows</table>\n').substitute
+SUMMARY_ROW_HTML = "<tr><th>{}</th><td>{}</td></tr>\n".format
+CARD_HTML = Template('<h3><a href="$url">$url</a> — рейтинг $rating</h3>\n'
+                     '<table>\n<tr><th>Дата</th><th>Оценка</th><th class="review-text">Отзыв</th>'
+                     '<th>Ответ</th><th>Дата ответа</th></tr>\n').substitute
+CARD_END_HTML = "</table>\n"
+REVIEW_ROW_HTML = ('<tr><td>{2}</td><td>{1}</td><td class="review-text">{3}</td><td>{4}</td><td>{5}</td></tr>\n'
+                   .format)
+
+
+@lru_cache(maxsize=1)
+def _page_template() -> tuple[Template, Template]:
+    head, _, tail = TEMPLATE_PATH.read_text(encoding="utf-8").partition(CONTENT_MARKER)
+    return Template(head), Template(tail)
+
+
+def _iso(value) -> str | None:
+    if value is None:
+        return None
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def review_row(review) -> tuple:
+    if isinstance(review, Review):
+        review = review.to_dict()
+    if "review_key" in review:
+        # Rows from Database.iter_reviews are already flat
+        return (review["review_key"], review.get("rating"), review.get("review_date"), review.get("text"),
+                review.get("response_text"), review.get("response_date"))
+    response = review.get("response") or {}
+    return (review.get("id"), review.get("rating"), _iso(review.get("date")), review.get("text"),
+            response.get("text"), _iso(response.get("date")))
+
+
+def sections_from_summaries(summaries: list[dict]):
+    for summary in summaries:
+        if "error" in summary:
+            continue
+        cards = ((card, map(review_row, card.get("reviews") or [])) for card in summary.get("cards_details", []))
+        yield summary, cards
+
+
+def sections_from_db(db, company_name: str, company_site: str, platforms):
+    for platform in platforms:
+        card_summaries = db.card_summaries(company_name, company_site, platform)
+        if not card_summaries:
+            continue
+        summary = summarize_cards(card_summaries, platform)
+        cards = ((card, map(review_row, db.iter_reviews(card["id"]))) for card in card_summaries)
+        yield summary, cards
+
+
+def _chunks(rows, size: int):
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_html(sections, path: str, title: str, chunk_rows: int = 5000) -> int:
+    head, tail = _page_template()
+    values = {"title": escape(title), "generated": datetime.now().strftime("%Y-%m-%d %H:%M")}
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(head.substitute(values))
+        for summary, cards in sections:
+            rows = "".join(SUMMARY_ROW_HTML(label, escape(str(summary.get(key))))
+                           for key, label in SUMMARY_FIELDS)
+            f.write(SECTION_HTML(platform=escape(str(summary.get("platform"))), rows=rows))
+            for card, reviews in cards:
+                f.write(CARD_HTML(url=escape(card.get("url") or ""), rating=escape(str(card.get("rating")))))
+                for chunk in _chunks(reviews, chunk_rows):
+                    f.write("".join(REVIEW_ROW_HTML(*(escape(str(value)) if value is not None else ""
+                                                      for value in row)) for row in chunk))
+                    written += len(chunk)
+                f.write(CARD_END_HTML)
+        f.write(tail.substitute(values))
+    return written
+
+
+def write_csv(sections, path: str, chunk_rows: int = 5000) -> int:
+    written = 0
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for summary, cards in sections:
+            platform = summary.get("platform")
+            for card, reviews in cards:
+                prefix = (platform, card.get("url"), card.get("rating"))
+                for chunk in _chunks(reviews, chunk_rows):
+                    writer.writerows(prefix + row for row in chunk)
+                    written += len(chunk)
+    return written
+
+
+def write_jsonl(sections, path: str, chunk_rows: int = 5000) -> int:
+    written = 0
+    dumps = json.JSONEncoder(ensure_ascii=False, default=str).encode
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for summary, cards in sections:
+            platform = summary.get("platform")
+            header = {key: value for key, value in summary.items() if key != "cards_details"}
+            f.write(dumps({"type": "summary", **header}) + "\n")
+            for card, reviews in cards:
+                card_url = card.get("url")
+                f.write(dumps({"type": "card", "platform": platform, "url": card_url, "rating": card.get("rating"),
+                               "total_reviews": card.get("total_reviews")}) + "\n")
+                for chunk in _chunks(reviews, chunk_rows):
+                    f.write("".join(dumps({"type": "review", "card_url": card_url, **dict(zip(REVIEW_COLUMNS, row))})
+                                    + "\n" for row in chunk))
+                    written += len(chunk)
+    return written
+
+
+WRITERS = {
+    ".html": lambda sections, path, title, chunk_rows: write_html(sections, path, title, chunk_rows),
+    ".csv": lambda sections, path, title, chunk_rows: write_csv(sections, path, chunk_rows),
+    ".jsonl": lambda sections, path, title, chunk_rows: write_jsonl(sections, path, chunk_rows),
+}
+
+
+def generate_report(sections, path: str, title: str = "Отчёт по отзывам", chunk_rows: int = 5000) -> int:
+    suffix = Path(path).suffix.lower()
+    if suffix not in WRITERS:
+        raise ValueError(f"Unsupported report format: {suffix or path}")
+    return WRITERS[suffix](sections, path, title, chunk_rows)
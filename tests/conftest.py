@@ -0,0 +1,18 @@
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+
+@pytest.fixture(scope="session")
+def chrome():
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    try:
+        driver = webdriver.Chrome(options=options)
+    except WebDriverException as e:
+        pytest.skip(f"headless Chrome is not available: {e.msg}")
+    yield driver
+    driver.quit()
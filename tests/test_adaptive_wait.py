@@ -0,0 +1,73 @@
+import time
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from src.adaptive_wait import AdaptiveWait, PageMarkerFound
+
+
+class SlowPage:
+    # Answers FIND_ANY_JS with the first selector once `ready_after` seconds have passed
+    def __init__(self, ready_after: float = 0.0, marker: str | None = None):
+        self.loaded = time.monotonic()
+        self.ready_after = ready_after
+        self.marker = marker
+
+    def execute_script(self, script: str, selectors: list[str], markers: list, visible: bool):
+        if self.marker is not None:
+            return {"marker": self.marker}
+        if time.monotonic() - self.loaded >= self.ready_after:
+            return {"index": 0, "element": selectors[0]}
+        return None
+
+
+def waits(**kwargs) -> AdaptiveWait:
+    kwargs.setdefault("poll_interval", 0.005)
+    return AdaptiveWait(min_samples=3, **kwargs)
+
+
+def test_fast_pages_shrink_the_timeout_to_the_floor():
+    wait = waits(default_timeout=1.0, min_timeout=0.05)
+    for _ in range(5):
+        wait.wait_for(SlowPage(), "rating", ["span"])
+
+    assert wait.timeout_for("rating") == 0.05
+
+
+def test_cached_pages_do_not_teach_the_timeout():
+    wait = waits(default_timeout=1.0, min_timeout=0.05)
+    for _ in range(5):
+        wait.wait_for(SlowPage(), "rating", ["span"], learn=False)
+
+    assert wait.timeout_for("rating") == 1.0
+    assert wait.stats() == {}
+
+
+def test_a_miss_widens_the_timeout_until_live_pages_fit_again():
+    wait = waits(default_timeout=1.0, min_timeout=0.05)
+    for _ in range(5):
+        wait.wait_for(SlowPage(), "rating", ["span"])
+
+    with pytest.raises(TimeoutException):
+        wait.wait_for(SlowPage(ready_after=0.08), "rating", ["span"])
+    assert wait.timeout_for("rating") == pytest.approx(0.1)
+
+    assert wait.wait_for(SlowPage(ready_after=0.08), "rating", ["span"]) == (0, "span")
+    assert wait.timeout_for("rating") > 0.15
+
+
+def test_page_markers_end_the_wait_without_a_sample():
+    wait = waits()
+    with pytest.raises(PageMarkerFound) as error:
+        wait.wait_for(SlowPage(marker="captcha"), "rating", ["span"])
+
+    assert error.value.marker == "captcha"
+    assert wait.stats() == {}
+
+
+def test_the_first_matching_alternative_is_reported():
+    class SecondOnly(SlowPage):
+        def execute_script(self, script, selectors, markers, visible):
+            return {"index": 1, "element": selectors[1]}
+
+    assert waits().wait_for(SecondOnly(), "rating", ["span.old", "span.new"]) == (1, "span.new")
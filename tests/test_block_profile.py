@@ -0,0 +1,14 @@
+from src.scraper import BLOCK_PROFILES, blocked_url_patterns, matches_block_pattern
+
+
+def test_question_mark_is_literal_like_in_cdp():
+    assert matches_block_pattern("https://tile0.maps.2gis.com/tiles?x=1&y=2", "*/tiles?*")
+    assert not matches_block_pattern("https://example.com/tilesets/1.json", "*/tiles?*")
+    assert not matches_block_pattern("https://example.com/a.png", "*.[pj]ng*")
+
+
+def test_profiles_keep_required_api_urls():
+    for name, config in BLOCK_PROFILES.items():
+        patterns = blocked_url_patterns(name)
+        for url in config["allow"]:
+            assert not any(matches_block_pattern(url, pattern) for pattern in patterns)
@@ -0,0 +1,38 @@
+from src.parsers.gis2_parser import GIS2Parser
+from src.parsers.json_state import new_card_data
+from src.parsers.yandex_parser import YandexParser
+
+COMPANY_SITE = "https://igevsk.magazinmayak.ru/"
+
+
+class BlankPage:
+    def execute_cdp_cmd(self, cmd: str, params: dict):
+        return {}
+
+
+def analyze(parser, card_urls: list[str]) -> dict:
+    parser.search_company_urls = lambda: card_urls
+    parser.parse_card_details = lambda url: dict(new_card_data(url), rating=4.5)
+    return parser.analyze_platform_data()
+
+
+def test_yandex_cards_on_the_platform_host_are_kept():
+    with YandexParser("Маяк", COMPANY_SITE) as parser:
+        result = analyze(parser, ["https://yandex.ru/maps/org/mayak/1234567890/"])
+
+    assert "error" not in result
+    assert [card["url"] for card in result["cards_details"]] == ["https://yandex.ru/maps/org/mayak/1234567890/"]
+
+
+def test_gis2_cards_on_the_platform_host_are_kept():
+    parser = GIS2Parser(BlankPage(), "Маяк", COMPANY_SITE)
+    result = analyze(parser, ["https://2gis.ru/moscow/firm/70000001020304050"])
+
+    assert result["card_count"] == 1
+
+
+def test_outside_links_must_match_the_company_site():
+    parser = GIS2Parser(BlankPage(), "Маяк", COMPANY_SITE)
+    result = analyze(parser, ["https://shop.magazinmayak.ru/contacts", "https://other-shop.ru/mayak"])
+
+    assert [card["url"] for card in result["cards_details"]] == ["https://shop.magazinmayak.ru/contacts"]
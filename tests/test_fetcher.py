@@ -0,0 +1,108 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.fetcher import FetchEngine
+from src.metrics import Metrics
+from src.scheduler import RequestScheduler
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.connections.add(self.client_address)
+            calls = server.calls[self.path] = server.calls.get(self.path, 0) + 1
+
+        if self.path == "/flaky" and calls <= 2:
+            status, body = 503, "temporarily unavailable"
+        elif self.path == "/partial" and calls == 1:
+            status, body = 200, "<div class='loading'></div>"
+        else:
+            status, body = 200, f"<div class='reviews'>{self.path}</div>"
+
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RecordingEngine(FetchEngine):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.delays = []
+
+    def _backoff_delay(self, attempt: int) -> float:
+        delay = super()._backoff_delay(attempt)
+        self.delays.append((attempt, delay))
+        return delay
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    httpd.daemon_threads = True
+    httpd.lock = threading.Lock()
+    httpd.connections = set()
+    httpd.calls = {}
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    host, port = httpd.server_address[:2]
+    httpd.base_url = f"http://{host}:{port}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def engine():
+    metrics = Metrics()
+    scheduler = RequestScheduler(metrics=metrics, host_rate=1000.0, host_burst=100, host_limits={})
+    with RecordingEngine(metrics=metrics, scheduler=scheduler, backoff_base=0.01, backoff_max=0.04) as engine:
+        yield engine
+
+
+def test_sequential_requests_reuse_one_keep_alive_connection(server, engine):
+    for i in range(10):
+        assert engine.fetch(f"{server.base_url}/page/{i}") == f"<div class='reviews'>/page/{i}</div>"
+
+    assert len(server.connections) == 1
+
+
+def test_concurrent_requests_stay_within_the_connection_limit(server, engine):
+    urls = [f"{server.base_url}/page/{i}" for i in range(40)]
+
+    assert all(engine.fetch_many(urls, max_in_flight=4))
+    assert len(server.connections) <= 4
+
+
+def test_503_is_retried_with_growing_backoff(server, engine):
+    assert engine.fetch(f"{server.base_url}/flaky") == "<div class='reviews'>/flaky</div>"
+
+    assert server.calls["/flaky"] == 3
+    assert [attempt for attempt, _ in engine.delays] == [0, 1]
+    assert all(0 <= delay <= min(0.04, 0.01 * 2 ** attempt) for attempt, delay in engine.delays)
+    assert engine.metrics.counter("http_retries_total") == 2
+
+
+def test_gives_up_after_the_last_retry(server, engine):
+    engine.retries = 2
+
+    assert engine.fetch(f"{server.base_url}/flaky") is None
+    assert server.calls["/flaky"] == 2
+
+
+def test_validator_rejection_triggers_a_retry(server, engine):
+    body = engine.fetch(f"{server.base_url}/partial", validator=lambda text: "reviews" in text)
+
+    assert body == "<div class='reviews'>/partial</div>"
+    assert server.calls["/partial"] == 2
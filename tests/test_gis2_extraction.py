@@ -0,0 +1,80 @@
+import re
+from pathlib import Path
+
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+from src.parsers.gis2_parser import GIS2Parser
+
+FIXTURE = Path(__file__).parent / "fixtures" / "gis2_card.html"
+
+
+def legacy_reviews(parser: GIS2Parser, reviews_section) -> list[dict]:
+    # The per-element extraction REVIEWS_EXTRACTION_JS replaced: several chromedriver roundtrips per review
+    item, rating, text, date, response_block, response_text, response_date = parser.REVIEW_SELECTORS
+    reviews = []
+    for review_element in reviews_section.find_elements(By.CSS_SELECTOR, item):
+        review_detail = {}
+        try:
+            rating_element = review_element.find_element(By.CSS_SELECTOR, rating)
+            rating_val = rating_element.get_attribute("aria-label") or rating_element.get_attribute("data-rating")
+            if rating_val:
+                match_rating = re.search(r'(\d+(\.\d+)?)', rating_val)
+                if match_rating:
+                    review_detail["rating"] = float(match_rating.group(1))
+        except NoSuchElementException:
+            review_detail["rating"] = None
+
+        try:
+            review_detail["text"] = review_element.find_element(By.CSS_SELECTOR, text).text
+        except NoSuchElementException:
+            review_detail["text"] = ""
+
+        try:
+            review_detail["date"] = parser._parse_date(review_element.find_element(By.CSS_SELECTOR, date).text)
+        except NoSuchElementException:
+            review_detail["date"] = None
+
+        review_detail["id"] = parser._review_key(review_element.get_attribute("data-review-id"),
+                                                 review_detail["text"])
+
+        try:
+            block = review_element.find_element(By.CSS_SELECTOR, response_block)
+            response_text_value = block.find_element(By.CSS_SELECTOR, response_text).text
+            response_date_value = parser._parse_date(block.find_element(By.CSS_SELECTOR, response_date).text)
+            review_detail["response"] = {"text": response_text_value, "date": response_date_value}
+        except NoSuchElementException:
+            review_detail["response"] = None
+        reviews.append(review_detail)
+    return reviews
+
+
+def test_injected_script_matches_per_element_extraction(chrome):
+    parser = GIS2Parser(chrome, "Маяк", "https://mayak-shop.ru")
+    card_data = parser.parse_card_details(FIXTURE.as_uri())
+
+    assert card_data is not None
+    assert card_data["rating"] == 4.3
+    assert card_data["total_reviews"] == 6
+
+    reviews_section = chrome.find_element(By.CSS_SELECTOR, "section[data-id='reviews']")
+    expected = legacy_reviews(parser, reviews_section)
+    assert len(expected) == 6
+    assert card_data["reviews"] == expected
+    assert card_data["answered_reviews"] == 2
+    assert card_data["unanswered_reviews"] == 4
+
+
+def test_extract_reviews_is_one_roundtrip(chrome):
+    parser = GIS2Parser(chrome, "Маяк", "https://mayak-shop.ru")
+    chrome.get(FIXTURE.as_uri())
+    reviews_section = chrome.find_element(By.CSS_SELECTOR, "section[data-id='reviews']")
+
+    raw_reviews = parser._extract_reviews(reviews_section, list(parser.REVIEW_SELECTORS))
+
+    assert parser._roundtrips == 1
+    assert [raw["id"] for raw in raw_reviews] == ["107734521", "107731988", "107729410", None, "107720077",
+                                                  "107718302"]
+    assert raw_reviews[1]["text"] == "Долго ждали на кассе,\nработала только одна касса из четырёх."
+    assert raw_reviews[4]["response_text"] == "Сергей, уборку усилили."
+    assert raw_reviews[4]["response_date"] is None
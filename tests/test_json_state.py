@@ -0,0 +1,131 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src.page_cache import strip_scripts
+from src.parsers.gis2_parser import GIS2Parser
+from src.parsers.html_backend import extract_embedded_state
+from src.parsers.json_state import extract_yandex_card, find_2gis_reviews, find_json_payloads
+from src.parsers.yandex_parser import YandexParser
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def read_fixture(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def local(*args) -> datetime:
+    # Parsed dates are naive local time, like the ones parse_date produces
+    return datetime(*args, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+
+class FixturePage:
+    # Stands in for a browser that has already rendered a saved page
+    def __init__(self, html: str):
+        self.page_source = html
+
+    def execute_cdp_cmd(self, cmd: str, params: dict):
+        return {}
+
+
+class FixtureEngine:
+    def __init__(self, body: str):
+        self.body = body
+        self.urls = []
+
+    def fetch(self, url: str, validator=None, page_type: str = "page") -> str:
+        self.urls.append(url)
+        return self.body
+
+
+def test_2gis_reviews_from_json_parse_state():
+    reviews = find_2gis_reviews(find_json_payloads(read_fixture("gis2_card_state.html")))
+
+    assert [review["id"] for review in reviews] == ["9051201", "9049876", "9047310"]
+    assert reviews[0]["date"] == local(2025, 3, 12, 6, 41, 17)
+    assert reviews[0]["response"] == {"text": "Анна, спасибо за тёплые слова!", "date": local(2025, 3, 13, 7, 2)}
+    assert reviews[2]["text"] == "Удобная парковка и широкий ассортимент. It's fine."
+    assert reviews[2]["response"] is None
+
+
+def test_gis2_card_from_embedded_state():
+    parser = GIS2Parser(FixturePage(read_fixture("gis2_card_state.html")), "Маяк", "https://mayak-shop.ru")
+    card_data = {"url": "https://2gis.ru/moscow/firm/70000001020304050", "rating": 4.3, "total_reviews": 3}
+
+    assert parser._reviews_from_state(card_data, None)
+    assert len(card_data["reviews"]) == 3
+    assert (card_data["answered_reviews"], card_data["unanswered_reviews"]) == (2, 1)
+    assert (card_data["positive_reviews"], card_data["negative_reviews"]) == (2, 1)
+    assert card_data["avg_response_time_seconds"] == (87643 + 50141) / 2
+
+
+def test_cached_card_page_keeps_the_state():
+    cached = strip_scripts(read_fixture("gis2_card_state.html"))
+    parser = GIS2Parser(FixturePage(cached), "Маяк", "https://mayak-shop.ru")
+    card_data = {"url": "https://2gis.ru/moscow/firm/70000001020304050", "rating": 4.3, "total_reviews": 3}
+
+    assert "<script>" not in cached
+    assert parser._reviews_from_state(card_data, None)
+    assert len(card_data["reviews"]) == 3
+
+
+def test_state_dates_compare_with_watermark_dates():
+    parser = GIS2Parser(FixturePage(read_fixture("gis2_card_state.html")), "Маяк", "https://mayak-shop.ru")
+    card_data = {"url": "https://2gis.ru/moscow/firm/70000001020304050", "rating": 4.3, "total_reviews": 3}
+    # The last run stopped at a review dated by parse_date, in local time
+    watermark = {"last_review_id": None, "last_review_date": local(2025, 3, 5, 15, 20, 3)}
+
+    assert parser._reviews_from_state(card_data, watermark)
+    assert [review["id"] for review in card_data["reviews"]] == ["9051201", "9049876"]
+
+
+def test_gis2_state_short_of_total_falls_back_to_dom():
+    parser = GIS2Parser(FixturePage(read_fixture("gis2_card_state.html")), "Маяк", "https://mayak-shop.ru")
+    card_data = {"url": "https://2gis.ru/moscow/firm/70000001020304050", "rating": 4.3, "total_reviews": 40}
+
+    assert not parser._reviews_from_state(card_data, None)
+    assert "reviews" not in card_data
+
+
+def test_gis2_card_from_reviews_api():
+    engine = FixtureEngine(read_fixture("gis2_reviews_api.json"))
+    parser = GIS2Parser(FixturePage(""), "Маяк", "https://mayak-shop.ru", reviews_api_key="key",
+                        fetch_engine=engine)
+
+    card_data = parser._parse_card_from_api("https://2gis.ru/moscow/firm/70000001020304050")
+
+    assert len(engine.urls) == 1
+    assert "/branches/70000001020304050/reviews?" in engine.urls[0]
+    assert card_data["rating"] == 4.3
+    assert card_data["total_reviews"] == 3
+    assert [review["id"] for review in card_data["reviews"]] == ["9051201", "9049876", "9047310"]
+    assert card_data["answered_reviews"] == 2
+
+
+def test_yandex_card_from_state_view():
+    summary, reviews, paging = extract_yandex_card(extract_embedded_state(read_fixture("yandex_card.html")))
+
+    assert summary == {"rating": 4.4, "total_reviews": 152}
+    assert [review["id"] for review in reviews] == ["Yk3nQ0aF1", "Yk3nP9bZ7", "Yk3nM2cQ4"]
+    assert reviews[1]["response"] is None
+    assert paging == {"business_id": "1234567890", "csrf_token": "4a1c3f0e9b7d2a61:1743600000", "pages": 4}
+
+
+def test_yandex_reviews_without_id_are_not_merged():
+    parser = YandexParser("Маяк", "https://mayak-shop.ru")
+    try:
+        summary, reviews, _ = extract_yandex_card(extract_embedded_state(read_fixture("yandex_card.html")))
+        next_page = json.dumps({"data": {"reviews": [
+            {"reviewId": "Yk3nM2cQ4", "rating": 3, "text": "Цены выше, чем у конкурентов."},
+            {"rating": 5, "text": "Без идентификатора"},
+            {"rating": 2, "text": "Тоже без идентификатора"},
+        ]}}, ensure_ascii=False)
+
+        card_data = parser._build_card_data("https://yandex.ru/maps/org/mayak/1234567890/", summary, reviews,
+                                            [next_page])
+    finally:
+        parser.close()
+
+    assert [review["id"] for review in card_data["reviews"]] == ["Yk3nQ0aF1", "Yk3nP9bZ7", "Yk3nM2cQ4", None, None]
+    assert (card_data["positive_reviews"], card_data["negative_reviews"]) == (2, 3)
@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.fetcher import FetchEngine
+from src.metrics import Metrics
+from src.page_cache import CacheMiss, PageCache
+from src.scheduler import RequestScheduler
+
+URL = "https://2gis.ru/moscow/firm/70000001020304050"
+
+
+def page(size: int = 20_000) -> str:
+    # Random hex only gzips about twofold, so every page takes roughly 11 KB on disk
+    return os.urandom(size // 2).hex()
+
+
+def test_pages_expire_after_their_page_type_ttl(tmp_path):
+    cache = PageCache(str(tmp_path), ttls={"card": 0.05})
+    cache.put("GIS2", "card", URL, "<html>card</html>")
+    cache.put("GIS2", "search", URL, "<html>search</html>")
+
+    assert cache.get("GIS2", "card", URL) == "<html>card</html>"
+    time.sleep(0.06)
+    assert cache.get("GIS2", "card", URL) is None
+    assert cache.lookup("GIS2", "card", URL).body == "<html>card</html>"
+    assert cache.get("GIS2", "search", URL) == "<html>search</html>"
+
+
+def test_urls_are_normalized_into_one_key(tmp_path):
+    cache = PageCache(str(tmp_path))
+    cache.put("GIS2", "card", "https://2GIS.ru/moscow/firm/1/?b=2&a=1#reviews", "<html></html>")
+
+    assert cache.get("gis2", "card", "https://2gis.ru/moscow/firm/1?a=1&b=2") == "<html></html>"
+
+
+def test_least_recently_used_pages_are_evicted_first(tmp_path):
+    cache = PageCache(str(tmp_path), max_bytes=25_000)
+    for i in range(2):
+        cache.put("GIS2", "card", f"{URL}/{i}", page())
+        time.sleep(0.01)
+    assert cache.get("GIS2", "card", f"{URL}/0") is not None
+    time.sleep(0.01)
+
+    cache.put("GIS2", "card", f"{URL}/2", page())
+
+    assert cache.get("GIS2", "card", f"{URL}/1") is None
+    assert cache.get("GIS2", "card", f"{URL}/0") is not None
+    assert cache.get("GIS2", "card", f"{URL}/2") is not None
+    assert cache.stats()["bytes"] <= 25_000
+
+
+def test_a_reopened_cache_keeps_its_size_budget(tmp_path):
+    PageCache(str(tmp_path)).put("GIS2", "card", URL, page())
+    cache = PageCache(str(tmp_path), max_bytes=15_000)
+
+    cache.put("GIS2", "card", f"{URL}/new", page())
+
+    assert cache.get("GIS2", "card", URL) is None
+
+
+def test_replay_serves_stale_pages(tmp_path):
+    PageCache(str(tmp_path), ttls={"card": 0}).put("GIS2", "card", URL, "<html>old</html>")
+    cache = PageCache(str(tmp_path), ttls={"card": 0}, replay=True)
+
+    assert cache.get("GIS2", "card", URL) == "<html>old</html>"
+
+
+class RevalidatingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.seen.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = b"<html>v1</html>"
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RevalidatingHandler)
+    httpd.daemon_threads = True
+    httpd.seen = []
+    threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    host, port = httpd.server_address[:2]
+    httpd.url = f"http://{host}:{port}/firm/1"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def engine_with(cache: PageCache) -> FetchEngine:
+    metrics = Metrics()
+    scheduler = RequestScheduler(metrics=metrics, host_rate=1000.0, host_burst=100, host_limits={})
+    return FetchEngine(cache=cache, platform="GIS2", metrics=metrics, scheduler=scheduler)
+
+
+def test_stale_page_is_revalidated_with_its_etag(tmp_path, server):
+    cache = PageCache(str(tmp_path), ttls={"card": 0.05})
+    with engine_with(cache) as engine:
+        assert engine.fetch(server.url, page_type="card") == "<html>v1</html>"
+        assert engine.fetch(server.url, page_type="card") == "<html>v1</html>"
+        time.sleep(0.06)
+        assert engine.fetch(server.url, page_type="card") == "<html>v1</html>"
+
+        assert server.seen == [None, '"v1"']
+        assert engine.metrics.counter("cache_revalidated_total") == 1
+    assert cache.get("GIS2", "card", server.url) == "<html>v1</html>"
+
+
+def test_replay_miss_never_reaches_the_network(tmp_path, server):
+    with engine_with(PageCache(str(tmp_path), replay=True)) as engine:
+        with pytest.raises(CacheMiss):
+            engine.fetch(server.url, page_type="card")
+
+    assert server.seen == []
@@ -0,0 +1,112 @@
+import threading
+import time
+
+from src.job_queue import PriorityBoard
+from src.metrics import Metrics
+from src.scheduler import BATCH, INTERACTIVE, RequestScheduler, TokenBucket
+
+URL = "https://2gis.ru/moscow/firm/70000001020304050"
+
+
+def scheduler(**kwargs) -> RequestScheduler:
+    kwargs.setdefault("host_limits", {"2gis.ru": (1.0, 2)})
+    return RequestScheduler(metrics=Metrics(), poll_interval=0.01, **kwargs)
+
+
+def test_bucket_spends_its_burst_then_refills_at_its_rate():
+    bucket = TokenBucket(rate=2.0, burst=2, min_rate=0.1, max_rate=8.0, step=0.5)
+    now = bucket.updated
+
+    for _ in range(2):
+        assert bucket.delay(now) == 0.0
+        bucket.take()
+    assert bucket.delay(now) == 0.5
+    assert bucket.delay(now + 0.5) == 0.0
+    assert bucket.delay(now + 60) == 0.0 and bucket.tokens == 2
+
+
+def test_throttle_halves_the_rate_and_pauses_the_host():
+    requests = scheduler()
+    requests.throttle(URL, retry_after=5)
+
+    assert requests.stats()["hosts"]["2gis.ru"] == 0.5
+    assert requests.acquire(URL, timeout=0.05) is None
+
+
+def test_rewards_recover_a_host_throttled_to_the_floor():
+    requests = scheduler(min_rate=0.05, recovery_share=0.05)
+    for _ in range(6):
+        requests.throttle(URL, retry_after=0)
+    assert requests.stats()["hosts"]["2gis.ru"] == 0.05
+
+    for _ in range(19):
+        requests.reward(URL)
+    assert requests.stats()["hosts"]["2gis.ru"] == 1.0
+
+
+def test_release_without_a_rate_signal_keeps_the_rate():
+    requests = scheduler()
+    ticket = requests.acquire(URL)
+    requests.release(ticket, throttled=None)
+    assert requests.stats() == {"in_flight": 0, "waiting": 0, "hosts": {"2gis.ru": 1.0}, "proxies": {}}
+
+    requests.release(requests.acquire(URL))
+    assert requests.stats()["hosts"]["2gis.ru"] == 1.05
+
+
+def test_interactive_waiter_holds_back_batch_requests_for_its_host():
+    requests = scheduler(host_limits={"2gis.ru": (20.0, 1)})
+    requests.release(requests.acquire(URL), throttled=None)
+    order = []
+
+    def run(priority: int, delay: float):
+        time.sleep(delay)
+        ticket = requests.acquire(URL, priority=priority)
+        order.append(priority)
+        requests.release(ticket, throttled=None)
+
+    threads = [threading.Thread(target=run, args=(BATCH, 0.0)), threading.Thread(target=run, args=(INTERACTIVE, 0.01))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert order == [INTERACTIVE, BATCH]
+
+
+def test_batch_request_holds_back_while_another_process_waits(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    interactive = PriorityBoard(path, owner="web")
+    batch = PriorityBoard(path, owner="worker", check_interval=0)
+    requests = scheduler()
+    requests.share_priorities(batch)
+
+    post = interactive.post("2gis.ru")
+    assert batch.waiting("2gis.ru") and not batch.waiting("yandex.ru")
+    assert requests.acquire(URL, priority=BATCH, timeout=0.05) is None
+    assert requests.acquire("https://yandex.ru/maps/", priority=BATCH, timeout=0.05) is not None
+
+    interactive.remove(post)
+    assert requests.acquire(URL, priority=BATCH, timeout=0.05) is not None
+    interactive.close()
+    batch.close()
+
+
+def test_waiting_interactive_request_posts_its_host_until_granted(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    worker = PriorityBoard(path, owner="worker", check_interval=0)
+    requests = scheduler(host_limits={"2gis.ru": (10.0, 1)})
+    requests.share_priorities(PriorityBoard(path, owner="web"))
+    requests.release(requests.acquire(URL), throttled=None)
+    seen = []
+
+    waiter = threading.Thread(target=lambda: requests.acquire(URL, priority=INTERACTIVE))
+    waiter.start()
+    while waiter.is_alive():
+        seen.append(worker.waiting("2gis.ru"))
+        time.sleep(0.005)
+    waiter.join()
+
+    assert any(seen)
+    assert not worker.waiting("2gis.ru")
+    worker.close()